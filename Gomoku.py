@@ -1,34 +1,30 @@
 #====== بسم الله الرحمن الرخيم ======
-import math
-import random
-import copy
-
-# ======== Game Settings ========
-BOARD_SIZE = 15
-WIN_COUNT = 5
-EMPTY = "."
-HUMAN = "X"
-AI_MINIMAX = "O"
-AI_ALPHABETA = "A"
-MAX_DEPTH = 2  # Adjustable search depth, increased for better AI
-
-# Heuristic scores
-SCORE_WIN = 100000
-SCORE_OPEN_FOUR = 10000
-SCORE_SEMI_FOUR = 1000
-SCORE_OPEN_THREE = 500
-SCORE_SEMI_THREE = 100
-SCORE_OPEN_TWO = 50
-SCORE_SEMI_TWO = 10
-SCORE_OPEN_ONE = 1  # Slight preference for own pieces
-
-
-# ======== Board Creation & Display ========
-def create_board():
-    return [[EMPTY for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-
-
+# ======== Command-Line Game ========
+# Board printout, prompts and the two game modes; the search itself is the
+# gomoku_engine package. Settings are chosen at the prompts (and with
+# --evaluation classic|pattern, --workers N and --parallel-mode root|lazy_smp)
+# and passed to the Engine, so nothing here is reassigned at run time.
+# --piskvork runs the engine as a Gomocup/Piskvork brain on stdin/stdout
+# instead (gomoku_engine/piskvork.py). --record FILE appends every game to a
+# game-record file (gomoku_engine/game_records.py).
+import sys
+
+from gomoku_engine import (AI_ALPHABETA, AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, BitBoard, Engine, MoveOrderer,
+                           SearchStats, check_win_at, count_stones, create_board, is_board_full, is_valid_move)
+from gomoku_engine.game_records import GameRecordWriter
+
+DEFAULT_DEPTH = 2  # Search depth when none is entered
+DEFAULT_EVALUATION = "classic"  # "classic" or "pattern" (the GUI's evaluator), see gomoku_engine/evaluation.py
+DEFAULT_WORKERS = 1  # Search processes; 1 searches in this process
+DEFAULT_PARALLEL_MODE = "root"  # With several workers: "root" splits root moves, "lazy_smp" shares one table
+USAGE = ("usage: python Gomoku.py [--evaluation classic|pattern] [--workers N] [--parallel-mode root|lazy_smp] "
+         "[--stats] [--record FILE] | --piskvork")
+
+
+# ======== Board Display ========
 def print_board(board):
+    if isinstance(board, BitBoard):
+        board = board.to_list()
     title = "GOMOKU - FIVE IN A ROW"
     board_width_chars = 3 + (4 * BOARD_SIZE)
     print("\n" + "╔" + "═" * (board_width_chars - 2) + "╗")
@@ -50,232 +46,6 @@ def print_board(board):
     print(f"Players: Human='{HUMAN}', Minimax AI='{AI_MINIMAX}', AlphaBeta AI='{AI_ALPHABETA}', Empty='{EMPTY}'\n")
 
 
-# ======== Move Handling ========
-def is_valid_move(board, r, c):
-    return 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE and board[r][c] == EMPTY
-
-
-# ======== Win & Terminal Checking ========
-def check_win(board, player):
-    if player == EMPTY: return False  # Empty player cannot win
-    directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # Vertical, Horizontal, Diagonal /, Diagonal \
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c] == player:
-                for dr, dc in directions:
-                    count = 0
-                    for i in range(WIN_COUNT):
-                        rr, cc = r + dr * i, c + dc * i
-                        if 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE and board[rr][cc] == player:
-                            count += 1
-                        else:
-                            break
-                    if count == WIN_COUNT:
-                        return True
-    return False
-
-
-def is_board_full(board):
-    return all(cell != EMPTY for row in board for cell in row)
-
-
-def terminal_test(board, depth, player_ai, opponent_in_game):
-    return depth == 0 or \
-           check_win(board, player_ai) or \
-           check_win(board, opponent_in_game) or \
-           is_board_full(board)
-
-
-# ======== Evaluation Function (Heuristic) ========
-def evaluate_line(line, player_ai, opponent_in_game):
-    score = 0
-    # Evaluate for player_ai
-    score += count_patterns_in_line(line, player_ai, opponent_in_game, True)
-    # Evaluate for opponent_in_game (subtract from player_ai's score)
-    score -= count_patterns_in_line(line, opponent_in_game, player_ai, False)
-    return score
-
-
-def count_patterns_in_line(line_segment, player, opponent, is_ai_perspective):
-    line_str = "".join(line_segment)
-    player_char = player
-    opponent_char = opponent
-    empty_char = EMPTY
-    n = len(line_segment)
-    line_score = 0
-
-    # Winning five is handled by check_win directly in evaluate_board
-
-    # Open Fours: .XXXX.
-    pattern = empty_char + player_char * 4 + empty_char
-    line_score += line_str.count(pattern) * SCORE_OPEN_FOUR
-
-    # Semi-Open Fours: OXXXX. or .XXXXO (opponent blocking one side)
-    pattern1 = opponent_char + player_char * 4 + empty_char
-    pattern2 = empty_char + player_char * 4 + opponent_char
-    line_score += (line_str.count(pattern1) + line_str.count(pattern2)) * SCORE_SEMI_FOUR
-    # Also consider board edge as a block for semi-open
-    # if line_str.startswith(player_char*4 + empty_char): line_score += SCORE_SEMI_FOUR
-    # if line_str.endswith(empty_char + player_char*4): line_score += SCORE_SEMI_FOUR
-
-    # Open Threes: .XXX.
-    pattern = empty_char + player_char * 3 + empty_char
-    line_score += line_str.count(pattern) * SCORE_OPEN_THREE
-
-    # Semi-Open Threes: OXXX. or .XXXO or .X.XX. or .XX.X.
-    pattern1 = opponent_char + player_char * 3 + empty_char
-    pattern2 = empty_char + player_char * 3 + opponent_char
-    line_score += (line_str.count(pattern1) + line_str.count(pattern2)) * SCORE_SEMI_THREE
-    # if line_str.startswith(player_char*3 + empty_char): line_score += SCORE_SEMI_THREE
-    # if line_str.endswith(empty_char + player_char*3): line_score += SCORE_SEMI_THREE
-    # More complex semi-open threes like X.XX or XX.X with open ends
-    # .X.XX. (already covered by .XXX. if X's are together)
-    # For simplicity, we are using simpler string counts. A more robust way involves iterating and checking segments.
-
-    # Open Twos: .XX.
-    pattern = empty_char + player_char * 2 + empty_char
-    line_score += line_str.count(pattern) * SCORE_OPEN_TWO
-
-    # Semi-Open Twos: OXX. or .XXO
-    pattern1 = opponent_char + player_char * 2 + empty_char
-    pattern2 = empty_char + player_char * 2 + opponent_char
-    line_score += (line_str.count(pattern1) + line_str.count(pattern2)) * SCORE_SEMI_TWO
-    # if line_str.startswith(player_char*2 + empty_char): line_score += SCORE_SEMI_TWO
-    # if line_str.endswith(empty_char + player_char*2): line_score += SCORE_SEMI_TWO
-
-    # Single pieces in open space (less important, but can break ties)
-    pattern = empty_char + player_char + empty_char
-    line_score += line_str.count(pattern) * SCORE_OPEN_ONE
-
-    return line_score
-
-
-def evaluate_board(board, player_ai, opponent_in_game):
-    if check_win(board, player_ai):
-        return SCORE_WIN
-    if check_win(board, opponent_in_game):
-        return -SCORE_WIN
-    if is_board_full(board):
-        return 0  # Draw
-
-    total_score = 0
-    lines = []
-    # Rows
-    for r in range(BOARD_SIZE):
-        lines.append([board[r][c] for c in range(BOARD_SIZE)])
-    # Columns
-    for c in range(BOARD_SIZE):
-        lines.append([board[r][c] for r in range(BOARD_SIZE)])
-    # Diagonals (top-left to bottom-right)
-    for k in range(-(BOARD_SIZE - WIN_COUNT), BOARD_SIZE - WIN_COUNT + 1):
-        lines.append([board[r][r + k] for r in range(BOARD_SIZE) if 0 <= r + k < BOARD_SIZE])
-    # Diagonals (top-right to bottom-left)
-    for k in range(WIN_COUNT - 1, 2 * BOARD_SIZE - WIN_COUNT):
-        lines.append([board[r][k - r] for r in range(BOARD_SIZE) if 0 <= k - r < BOARD_SIZE])
-
-    for line in lines:
-        if len(line) >= WIN_COUNT:  # Only evaluate lines long enough for a win
-            total_score += evaluate_line(line, player_ai, opponent_in_game)
-
-    # Add a small random factor to break ties if scores are identical, makes AI less predictable
-    # total_score += random.randint(-3, 3)
-    return total_score
-
-
-# ======== Successor Generation ========
-def get_all_moves(board):
-    # Consider only moves near existing pieces for efficiency (optional optimization)
-    # For now, return all empty cells
-    return [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE) if board[r][c] == EMPTY]
-
-
-# ======== Minimax Implementation ========
-def minimax_decision(board, player_ai, opponent_in_game):
-    best_score = -math.inf
-    best_action = None
-    possible_moves = get_all_moves(board)
-    if not possible_moves: return None  # No moves left
-
-    for (r, c) in possible_moves:
-        board[r][c] = player_ai
-        score = min_value(board, MAX_DEPTH - 1, player_ai, opponent_in_game)
-        board[r][c] = EMPTY  # Backtrack
-        if score > best_score:
-            best_score = score
-            best_action = (r, c)
-    return best_action if best_action is not None else random.choice(possible_moves)  # Fallback if all scores are -inf
-
-
-def max_value(board, depth, player_ai, opponent_in_game):
-    if terminal_test(board, depth, player_ai, opponent_in_game):
-        return evaluate_board(board, player_ai, opponent_in_game)
-    v = -math.inf
-    for (r, c) in get_all_moves(board):
-        board[r][c] = player_ai  # AI's turn
-        v = max(v, min_value(board, depth - 1, player_ai, opponent_in_game))
-        board[r][c] = EMPTY  # Backtrack
-    return v
-
-
-def min_value(board, depth, player_ai, opponent_in_game):
-    if terminal_test(board, depth, player_ai, opponent_in_game):
-        return evaluate_board(board, player_ai, opponent_in_game)
-    v = math.inf
-    for (r, c) in get_all_moves(board):
-        board[r][c] = opponent_in_game  # Opponent's turn
-        v = min(v, max_value(board, depth - 1, player_ai, opponent_in_game))
-        board[r][c] = EMPTY  # Backtrack
-    return v
-
-
-# ======== Alpha-Beta Implementation ========
-def alpha_beta_search(board, player_ai, opponent_in_game):
-    alpha = -math.inf
-    beta = math.inf
-    best_score = -math.inf
-    best_action = None
-    possible_moves = get_all_moves(board)
-    if not possible_moves: return None
-
-    for (r, c) in possible_moves:
-        board[r][c] = player_ai
-        score = min_value_ab(board, MAX_DEPTH - 1, alpha, beta, player_ai, opponent_in_game)
-        board[r][c] = EMPTY  # Backtrack
-        if score > best_score:
-            best_score = score
-            best_action = (r, c)
-        alpha = max(alpha, best_score)  # Update alpha for the root
-    return best_action if best_action is not None else random.choice(possible_moves)
-
-
-def max_value_ab(board, depth, alpha, beta, player_ai, opponent_in_game):
-    if terminal_test(board, depth, player_ai, opponent_in_game):
-        return evaluate_board(board, player_ai, opponent_in_game)
-    v = -math.inf
-    for (r, c) in get_all_moves(board):
-        board[r][c] = player_ai  # AI's turn
-        v = max(v, min_value_ab(board, depth - 1, alpha, beta, player_ai, opponent_in_game))
-        board[r][c] = EMPTY  # Backtrack
-        if v >= beta:
-            return v  # Beta cutoff
-        alpha = max(alpha, v)
-    return v
-
-
-def min_value_ab(board, depth, alpha, beta, player_ai, opponent_in_game):
-    if terminal_test(board, depth, player_ai, opponent_in_game):
-        return evaluate_board(board, player_ai, opponent_in_game)
-    v = math.inf
-    for (r, c) in get_all_moves(board):
-        board[r][c] = opponent_in_game  # Opponent's turn
-        v = min(v, max_value_ab(board, depth - 1, alpha, beta, player_ai, opponent_in_game))
-        board[r][c] = EMPTY  # Backtrack
-        if v <= alpha:
-            return v  # Alpha cutoff
-        beta = min(beta, v)
-    return v
-
-
 # ======== Custom Board Input Function ========
 def get_initial_board():
     while True:
@@ -304,11 +74,14 @@ def get_initial_board():
 
 
 # ======== Game Modes ========
-def play_human_vs_ai():
+def play_human_vs_ai(engine, show_stats=False, records=None):
     board = get_initial_board()
     human_player_symbol = HUMAN
     ai_player_symbol = AI_MINIMAX  # Default AI for Human vs AI
     current_player_symbol = human_player_symbol  # Human starts by default
+    stones = count_stones(board)
+    clock = engine.new_clock()
+    game = records.new_game(board, human_player_symbol, ai_player_symbol) if records is not None else None
 
     while True:
         print_board(board)
@@ -327,11 +100,18 @@ def play_human_vs_ai():
         else:  # AI's turn
             print(f"AI ({ai_player_symbol}) is thinking...")
             # For Human vs AI, AI is Minimax, opponent is Human
-            move = minimax_decision(board, ai_player_symbol, human_player_symbol)
+            move = engine.get_book_move(board, ai_player_symbol, human_player_symbol)
+            if move is not None:
+                print(f"AI ({ai_player_symbol}) plays from the opening book")
+            else:
+                stats = SearchStats() if show_stats else None
+                move = engine.choose_move(board, ai_player_symbol, human_player_symbol, False, clock=clock, stats=stats)
+                if stats is not None:
+                    print(stats)
 
             if move is None:
                 print_board(board)
-                if is_board_full(board):
+                if is_board_full(board, stones):
                     print("Draw!")
                 else:
                     print(f"AI ({ai_player_symbol}) cannot make a move. Game Over or Error.")
@@ -343,38 +123,72 @@ def play_human_vs_ai():
             continue
 
         board[move[0]][move[1]] = current_player_symbol
+        stones += 1
+        if game is not None:
+            game.move(*move)
 
-        if check_win(board, current_player_symbol):
+        if check_win_at(board, *move):
             print_board(board)
             print(f"Player {current_player_symbol} wins!")
             break
-        if is_board_full(board):
+        if is_board_full(board, stones):
             print_board(board)
             print("Draw!")
             break
 
         current_player_symbol = ai_player_symbol if current_player_symbol == human_player_symbol else human_player_symbol
+    if game is not None:
+        game.close()  # Recorded as unfinished unless it ended in a win or a full board
 
 
-def play_ai_vs_ai():
+def play_ai_vs_ai(engine, show_stats=False, records=None):
     board = get_initial_board()
     player1_ai_symbol = AI_MINIMAX
     player2_ai_symbol = AI_ALPHABETA
     current_player_symbol = player1_ai_symbol  # Minimax starts
+    stones = count_stones(board)
+    tt = engine.new_table()  # Kept for the whole game
+    orderer = MoveOrderer()
+    clocks = {player1_ai_symbol: engine.new_clock(), player2_ai_symbol: engine.new_clock()}
+    game = records.new_game(board, player1_ai_symbol, player2_ai_symbol) if records is not None else None
 
     while True:
         print_board(board)
         print(f"Turn for AI: {current_player_symbol}")
         if current_player_symbol == player1_ai_symbol:  # Minimax's turn
             print(f"{player1_ai_symbol} (Minimax) is thinking...")
-            move = minimax_decision(board, player1_ai_symbol, player2_ai_symbol)
+            stats = SearchStats() if show_stats else None
+            move = engine.choose_move(board, player1_ai_symbol, player2_ai_symbol, False, clock=clocks[player1_ai_symbol],
+                                      stats=stats)
         else:  # player2_ai_symbol (AlphaBeta)'s turn
             print(f"{player2_ai_symbol} (AlphaBeta) is thinking...")
-            move = alpha_beta_search(board, player2_ai_symbol, player1_ai_symbol)
+            stats = SearchStats() if show_stats else None
+            parallel = engine.get_parallel_search()
+            lazy_smp = parallel is not None and parallel.mode == "lazy_smp"
+            if lazy_smp:
+                parallel.last_report = None  # Stays None when the move is found at the root without the workers
+            move = engine.choose_move(board, player2_ai_symbol, player1_ai_symbol, True, tt, orderer,
+                                      clocks[player2_ai_symbol], stats=stats)
+            if lazy_smp:
+                report = parallel.last_report
+                if report is not None:
+                    print("Lazy SMP: " + ", ".join(f"worker {w['worker']} depth {w['depth']} {w['nodes']} nodes"
+                                                   for w in report["workers"]))
+                    print(f"Shared table: {report['hit_rate']:.0%} hit rate, "
+                          f"{report['nodes_per_second']:.0f} nodes/s")
+            else:
+                table = tt.stats()
+                print(f"Transposition table: {table['hits']} hits, {table['misses']} misses, "
+                      f"{table['collisions']} collisions ({table['hit_rate']:.0%} hit rate)")
+            print(f"Move ordering: {orderer.cutoffs} cutoffs, "
+                  f"{orderer.first_move_cutoff_rate():.0%} on the first move")
+
+        if stats is not None:
+            print(stats)
 
         if move is None:
             print_board(board)
-            if is_board_full(board):
+            if is_board_full(board, stones):
                 print("Draw!")
             else:
                 print(f"AI ({current_player_symbol}) cannot make a move. Game Over or Error.")
@@ -382,42 +196,94 @@ def play_ai_vs_ai():
 
         print(f"AI ({current_player_symbol}) plays at {move}")
         board[move[0]][move[1]] = current_player_symbol
+        stones += 1
+        if game is not None:
+            game.move(*move)
 
-        if check_win(board, current_player_symbol):
+        if check_win_at(board, *move):
             print_board(board)
             print(f"Player {current_player_symbol} wins!")
             break
-        if is_board_full(board):
+        if is_board_full(board, stones):
             print_board(board)
             print("Draw!")
             break
 
         current_player_symbol = player2_ai_symbol if current_player_symbol == player1_ai_symbol else player1_ai_symbol
+    if game is not None:
+        game.close()
 
 
 # ======== Entry Point ========
-if __name__ == "__main__":
-    print("Welcome to Gomoku!")
-    MAX_DEPTH = 2  # Default depth, can be adjusted
+def read_limits():
+    # Engine keyword arguments from the depth / time limit prompt
+    limit_input = input(f"Enter search depth for AI (e.g., 1, 2, 3 - default is {DEFAULT_DEPTH}), "
+                        f"or a time limit: seconds per move (e.g., 2s) or minutes per game (e.g., 5m): ").strip().lower()
     try:
-        depth_input = input(f"Enter search depth for AI (e.g., 1, 2, 3 - default is {MAX_DEPTH}): ").strip()
-        if depth_input:
-            MAX_DEPTH = int(depth_input)
-            if MAX_DEPTH <= 0:
-                print("Depth must be positive. Using default.")
-                MAX_DEPTH = 2
+        if limit_input.endswith("s"):
+            time_per_move = float(limit_input[:-1])
+            if time_per_move > 0:
+                print(f"Using iterative deepening with {time_per_move:g} seconds per move")
+                return {"time_per_move": time_per_move}
+            print("Time must be positive. Using default depth.")
+        elif limit_input.endswith("m"):
+            game_time = float(limit_input[:-1]) * 60
+            if game_time > 0:
+                print(f"Using iterative deepening with {game_time / 60:g} minutes per game for each AI")
+                return {"game_time": game_time}
+            print("Time must be positive. Using default depth.")
+        elif limit_input:
+            depth = int(limit_input)
+            if depth > 0:
+                print(f"Using search depth: {depth}")
+                return {"max_depth": depth}
+            print("Depth must be positive. Using default.")
     except ValueError:
         print("Invalid depth input. Using default.")
-        MAX_DEPTH = 2
-    print(f"Using search depth: {MAX_DEPTH}")
+    print(f"Using search depth: {DEFAULT_DEPTH}")
+    return {"max_depth": DEFAULT_DEPTH}
+
+
+def main(argv):
+    if "--piskvork" in argv:  # Gomocup/Piskvork protocol on stdin/stdout instead of the prompts
+        from gomoku_engine.piskvork import main as piskvork_main
+        return piskvork_main()
+    show_stats = "--stats" in argv  # Print search statistics after each AI move
+    evaluation = argv[argv.index("--evaluation") + 1] if "--evaluation" in argv[:-1] else DEFAULT_EVALUATION
+    workers = argv[argv.index("--workers") + 1] if "--workers" in argv[:-1] else str(DEFAULT_WORKERS)
+    parallel_mode = (argv[argv.index("--parallel-mode") + 1] if "--parallel-mode" in argv[:-1]
+                     else DEFAULT_PARALLEL_MODE)
+    # Checked before the prompts, so a typo does not cost the depth and time entered
+    error = None
+    if evaluation not in ("classic", "pattern"):
+        error = f"Unknown evaluation: {evaluation}"
+    elif not workers.isdigit() or int(workers) < 1:
+        error = f"--workers must be a whole number of at least 1, not {workers}"
+    elif parallel_mode not in ("root", "lazy_smp"):
+        error = f"Unknown parallel mode: {parallel_mode}"
+    if error is not None:
+        print(error)
+        print(USAGE)
+        return 2
+    print("Welcome to Gomoku!")
+    engine = Engine(evaluation, workers=int(workers), parallel_mode=parallel_mode, **read_limits())
+    records = GameRecordWriter(argv[argv.index("--record") + 1]) if "--record" in argv[:-1] else None
+    try:
+        while True:
+            mode = input("Select Mode: 1) Human vs AI (Minimax)  2) AI (Minimax) vs AI (Alpha-Beta) : ").strip()
+            if mode == "1":
+                play_human_vs_ai(engine, show_stats, records)
+                break
+            elif mode == "2":
+                play_ai_vs_ai(engine, show_stats, records)
+                break
+            else:
+                print("Invalid mode selected. Please enter 1 or 2.")
+    finally:
+        engine.close()
+        if records is not None:
+            records.close()  # A game left by an interrupt is recorded as unfinished
 
-    while True:
-        mode = input("Select Mode: 1) Human vs AI (Minimax)  2) AI (Minimax) vs AI (Alpha-Beta) : ").strip()
-        if mode == "1":
-            play_human_vs_ai()
-            break
-        elif mode == "2":
-            play_ai_vs_ai()
-            break
-        else:
-            print("Invalid mode selected. Please enter 1 or 2.")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
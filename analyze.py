@@ -0,0 +1,263 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Batch Analysis ========
+# Analyses a stream of positions over a process pool and writes one JSON line
+# per position, in input order: the best move, its score and the principal
+# variation. Positions are read and results written as they go, with at most
+# --window positions in flight, so memory stays flat however long the input.
+#
+# Input is JSON lines or rows (detected from the first line, or --format):
+#   {"id": "g12-m30", "board": ["...............", ...], "player": "X", "depth": 4}
+#   {"board": [[".", "X", ...], ...], "time": 0.5}
+# or BOARD_SIZE rows of BOARD_SIZE symbols per position, as get_initial_board
+# takes them; blank lines and lines starting with "#" between positions are
+# skipped. Every field but "board" is optional: "player"/"opponent" default to
+# the side with fewer stones (HUMAN on a tie), "depth" and "time" to --depth
+# and --time. A time limit searches iteratively and starts when a worker
+# picks the position up.
+#
+#   {"index": 0, "id": "g12-m30", "move": [7, 8], "score": 1520, "pv": [[7, 8], [6, 9], ...],
+#    "depth": 4, "book": false, "seconds": 0.41}
+# A position that cannot be analysed gets {"index", "id", "error"} instead.
+# Scores are from the side to move, as the engine's evaluation counts them;
+# score and pv come from the search's transposition table, so a move found by
+# the threat search has no score and a one-move pv. A book move ("book": true)
+# has a one-move pv, depth 0 and the book's score, or no score when the book
+# was built with another evaluation than --evaluation.
+#
+#   python analyze.py positions.jsonl [--output results.jsonl] [--depth 3 | --time 0.5]
+#                     [--workers N] [--window N] [--evaluation pattern] [--format auto|jsonl|rows]
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from gomoku_engine import (AI_ALPHABETA, AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, Deadline, Engine, MoveOrderer,
+                           check_win, is_board_full)
+from gomoku_engine.board import to_bitboard
+
+SYMBOLS = (HUMAN, AI_MINIMAX, AI_ALPHABETA)
+DEFAULT_EVALUATION = "pattern"
+DEFAULT_DEPTH = 3
+WINDOW_PER_WORKER = 4  # Positions in flight per worker, enough to keep the pool busy
+TABLE_MB = 16  # Per worker
+
+
+# ======== Input ========
+def read_jsonl(lines):
+    # (id, board, fields) per JSON line; a line that does not parse yields an error instead
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+            board = [list(row) for row in fields["board"]]
+        except (ValueError, TypeError, KeyError) as e:
+            yield None, None, {"error": f"line {number}: {type(e).__name__}: {e}"}
+            continue
+        yield fields.get("id"), board, fields
+
+
+def read_rows(lines):
+    # (None, board, {}) per BOARD_SIZE rows
+    rows = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        rows.append(list(line))
+        if len(rows) == BOARD_SIZE:
+            yield None, rows, {}
+            rows = []
+    if rows:
+        yield None, None, {"error": f"last position has {len(rows)} of {BOARD_SIZE} rows"}
+
+
+def read_positions(lines, format="auto"):
+    lines = iter(lines)
+    if format == "auto":
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            return iter(())
+        format = "jsonl" if first.lstrip().startswith("{") else "rows"
+        lines = itertools.chain([first], lines)
+    return read_jsonl(lines) if format == "jsonl" else read_rows(lines)
+
+
+def sides(board, player=None, opponent=None):
+    # (side to move, other side) for board; the side with fewer stones moves unless player is given
+    counts = {}
+    for row in board:
+        for cell in row:
+            if cell != EMPTY:
+                counts[cell] = counts.get(cell, 0) + 1
+    if player is None:
+        present = sorted(counts, key=lambda s: (counts[s], s != HUMAN))
+        if len(present) == 2:
+            player = present[0]
+        else:  # The first stone's owner has moved once more than the side to move
+            player = AI_ALPHABETA if present == [HUMAN] else HUMAN
+    if opponent is None:
+        others = [s for s in counts if s != player]
+        opponent = others[0] if others else AI_ALPHABETA if player == HUMAN else HUMAN
+    return player, opponent
+
+
+def check_position(board, player, opponent):
+    # Why board cannot be analysed, or None
+    if len(board) != BOARD_SIZE or any(len(row) != BOARD_SIZE for row in board):
+        return f"board must be {BOARD_SIZE}x{BOARD_SIZE}"
+    symbols = {cell for row in board for cell in row} - {EMPTY}
+    if not symbols <= set(SYMBOLS):
+        return f"unknown symbols {sorted(symbols - set(SYMBOLS))}, expected {EMPTY} or {'/'.join(SYMBOLS)}"
+    if player == opponent or not {player, opponent} <= set(SYMBOLS):
+        return f"bad sides {player!r} and {opponent!r}"
+    if not symbols <= {player, opponent}:
+        return "more than two players on the board"
+    if check_win(board, player) or check_win(board, opponent):
+        return "the game is already won"
+    if is_board_full(board):
+        return "the board is full"
+    return None
+
+
+# ======== Analysis Workers ========
+_worker = None  # (settings, Engine) of this worker process
+
+
+def _analyze(settings, board, player, opponent, depth, time_limit):
+    # Runs in a worker: the position is searched with a fresh table and history, so its result does not depend
+    # on which positions the worker analysed before
+    global _worker
+    if _worker is None or _worker[0] != settings:
+        _worker = (settings, Engine(**settings))
+    engine = _worker[1]
+    started = time.monotonic()
+    entry = engine.get_book_entry(board, player, opponent)
+    if entry is not None:
+        move, score = entry
+        return {"move": move, "score": score, "pv": [move], "depth": 0, "book": True,
+                "seconds": time.monotonic() - started}
+    tt, orderer = engine.new_table(), MoveOrderer()
+    completed = [0]
+
+    def search(b, p, o, d, dl):
+        found = engine.alpha_beta_search(b, p, o, d, tt, orderer, dl)
+        completed[0] = d
+        return found
+
+    if time_limit is None:
+        move = search(board, player, opponent, depth, None)
+    else:
+        move = engine.iterative_deepening_search(board, player, opponent, None, search, max_depth=depth,
+                                                 deadline=Deadline(time_limit))
+    root = tt.probe(to_bitboard(board, engine.radius).hash)  # Stored by the root, unless the move was forced
+    if root is None or root[4] != move:
+        return {"move": move, "score": None, "pv": [move], "depth": completed[0], "book": False,
+                "seconds": time.monotonic() - started}
+    return {"move": move, "score": root[3], "pv": engine.principal_variation(board, player, opponent, tt),
+            "depth": completed[0], "book": False, "seconds": time.monotonic() - started}
+
+
+def _failed(error):
+    future = Future()
+    future.set_result({"error": error})
+    return future
+
+
+def _limits(fields, depth, time_limit):
+    # (depth, time limit) for one position: its own "time" (with "depth" as the deepest iteration) or "depth",
+    # else the command line's
+    if "time" in fields:
+        if isinstance(fields["time"], bool):
+            raise ValueError(f"bad time {fields['time']!r}")
+        depth, time_limit = fields.get("depth"), float(fields["time"])
+    elif "depth" in fields:
+        depth, time_limit = fields["depth"], None
+    if depth is not None and (not isinstance(depth, int) or isinstance(depth, bool) or depth < 1):
+        raise ValueError(f"bad depth {depth!r}")
+    return depth, time_limit
+
+
+# ======== Streaming ========
+def analyze_stream(positions, pool, settings, depth=DEFAULT_DEPTH, time_limit=None, window=WINDOW_PER_WORKER):
+    # Result records for (id, board, fields) positions, in input order, with at most window of them in flight
+    pending = deque()
+    for index, (position_id, board, fields) in enumerate(positions):
+        if board is None:
+            future = _failed(fields["error"])
+        else:
+            try:
+                position_depth, position_time = _limits(fields, depth, time_limit)
+                player, opponent = sides(board, fields.get("player"), fields.get("opponent"))
+                error = check_position(board, player, opponent)
+            except (ValueError, TypeError) as e:
+                error = str(e)
+            if error is None:
+                future = pool.submit(_analyze, settings, board, player, opponent, position_depth, position_time)
+            else:
+                future = _failed(error)
+        pending.append((index, position_id, future))
+        while len(pending) >= window:
+            yield _record(*pending.popleft())
+    while pending:
+        yield _record(*pending.popleft())
+
+
+def _record(index, position_id, future):
+    record = {"index": index} if position_id is None else {"index": index, "id": position_id}
+    try:
+        record.update(future.result())
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+# ======== Command Line ========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Best move, score and principal variation for a stream of positions")
+    parser.add_argument("input", nargs="?", default="-", help="positions file, - for stdin")
+    parser.add_argument("--output", "-o", default="-", help="results file, - for stdout")
+    parser.add_argument("--format", choices=("auto", "jsonl", "rows"), default="auto")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="search depth for positions without a limit")
+    limit.add_argument("--time", type=float, help="seconds per position, searched iteratively")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--window", type=int, help=f"positions in flight (default {WINDOW_PER_WORKER} per worker)")
+    parser.add_argument("--evaluation", default=DEFAULT_EVALUATION)
+    args = parser.parse_args(argv)
+    if args.depth < 1:
+        parser.error("--depth must be at least 1")
+    settings = {"evaluation": args.evaluation, "table_mb": TABLE_MB}
+    window = args.window or WINDOW_PER_WORKER * args.workers
+    depth = None if args.time is not None else args.depth
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+    started, analysed, failed = time.monotonic(), 0, 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for record in analyze_stream(read_positions(source, args.format), pool, settings, depth, args.time,
+                                         window):
+                target.write(json.dumps(record) + "\n")
+                target.flush()
+                analysed += 1
+                failed += "error" in record
+                if target is not sys.stdout:
+                    print(f"\r{analysed} positions", end="", file=sys.stderr, flush=True)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    if target is not sys.stdout:
+        print(file=sys.stderr)
+    print(f"{analysed} positions ({failed} failed) in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
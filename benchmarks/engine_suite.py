@@ -0,0 +1,195 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Engine Benchmark Suite ========
+# Runs minimax_decision, alpha_beta_search and evaluate_board of an Engine with
+# each evaluation ("classic", the command-line game's, and "pattern", the
+# GUI's) over the positions in positions.txt and measures:
+#   * nodes per second of each search (nodes counted by the search Deadline),
+#   * time to depth: alpha-beta at depth 1, 2 ... with a fresh table each time,
+#   * best-move agreement between minimax and alpha-beta at the same depth,
+#   * full-board evaluate_board calls per second.
+# These searches run without the root threat search: its nodes are not counted
+# by the Deadline, so its time would only dilute the node rates and hide a
+# change in the search itself. The engine as it plays, threat search included,
+# is then checked against the expected moves of the tactical positions, and
+# that time is reported on its own.
+# Results are written as JSON. With --baseline, throughput more than
+# --threshold below the stored results (benchmarks/baseline.json by default;
+# re-save it on the machine you compare on) is reported and the exit status is
+# 1; --save-baseline stores this run instead.
+#
+#   python benchmarks/engine_suite.py [--engines classic,pattern] [--depth 3] [--output FILE]
+#                                     [--baseline FILE | --save-baseline FILE] [--threshold 0.15]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gomoku_engine import AI_MINIMAX, EMPTY, HUMAN, Deadline, Engine, MoveOrderer, TranspositionTable, threat_search
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "positions.txt")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MINIMAX_DEPTH = 2
+ALPHA_BETA_DEPTH = 3
+EVALUATION_REPEATS = 20
+DEFAULT_THRESHOLD = 0.15
+TABLE_MB = 64
+# Throughput figures compared against the baseline, as keys of an engine's results
+THROUGHPUT = ("minimax_nodes_per_second", "alpha_beta_nodes_per_second", "evaluations_per_second")
+
+
+def load_corpus(path=CORPUS):
+    # [{"name", "category", "to_move", "expected", "rows"}] from the corpus file
+    positions = []
+    with open(path) as f:
+        lines = [line.rstrip("\n") for line in f if not line.startswith("#")]
+    for i, line in enumerate(lines):
+        if not line.startswith("["):
+            continue
+        name, _, rest = line[1:].partition("]")
+        category, to_move, *expected = rest.split()
+        size = len(lines[i + 1])
+        positions.append({
+            "name": name,
+            "category": category,
+            "to_move": to_move,
+            "expected": [tuple(int(x) for x in move.split(",")) for move in expected],
+            "rows": lines[i + 1:i + 1 + size],
+        })
+    return positions
+
+
+def timed_search(search, board, player, opponent, depth):
+    # (move, nodes, seconds) of one search from scratch
+    threat_search._root_cache.clear()
+    deadline = Deadline()
+    started = time.perf_counter()
+    move = search([list(row) for row in board], player, opponent, depth, deadline)
+    return move, deadline.nodes, time.perf_counter() - started
+
+
+def opponent_of(board, player):
+    # The other symbol on the board, or the usual opponent for player on a board without one
+    for row in board:
+        for cell in row:
+            if cell not in (EMPTY, player):
+                return cell
+    return AI_MINIMAX if player == HUMAN else HUMAN
+
+
+def bench_engine(engine, positions, depth):
+    # engine searches as it plays; the speed figures come from a copy without the root threat search
+    searcher = Engine(**dict(engine.settings(), threat_search=False))
+    minimax = lambda b, p, o, d, dl: searcher.minimax_decision(b, p, o, depth=d, deadline=dl)
+    alpha_beta = lambda b, p, o, d, dl: searcher.alpha_beta_search(
+        b, p, o, depth=d, tt=TranspositionTable(TABLE_MB * 1024 * 1024), orderer=MoveOrderer(), deadline=dl)
+    playing = lambda b, p, o, d, dl: engine.alpha_beta_search(
+        b, p, o, depth=d, tt=TranspositionTable(TABLE_MB * 1024 * 1024), orderer=MoveOrderer(), deadline=dl)
+    totals = {"minimax": [0, 0.0], "alpha_beta": [0, 0.0]}
+    expected_seconds = 0.0
+    time_to_depth = [0.0] * depth
+    expected_hits = expected_total = agreements = 0
+    per_position = []
+    for position in positions:
+        board, player = position["rows"], position["to_move"]
+        opponent = opponent_of(board, player)
+        minimax_move, nodes, seconds = timed_search(minimax, board, player, opponent, MINIMAX_DEPTH)
+        totals["minimax"][0] += nodes
+        totals["minimax"][1] += seconds
+        result = {"name": position["name"], "minimax": {"move": minimax_move, "nodes": nodes, "seconds": seconds}}
+        for d in range(1, depth + 1):
+            move, nodes, seconds = timed_search(alpha_beta, board, player, opponent, d)
+            time_to_depth[d - 1] += seconds
+            if d == MINIMAX_DEPTH:
+                agreements += move == minimax_move
+            if d == depth:
+                totals["alpha_beta"][0] += nodes
+                totals["alpha_beta"][1] += seconds
+                result["alpha_beta"] = {"move": move, "nodes": nodes, "seconds": seconds}
+        if position["expected"]:
+            move, _, seconds = timed_search(playing, board, player, opponent, depth)
+            result["with_threat_search"] = {"move": move, "seconds": seconds}
+            expected_seconds += seconds
+            expected_total += 1
+            expected_hits += tuple(move) in position["expected"]
+        per_position.append(result)
+
+    boards = [[list(row) for row in position["rows"]] for position in positions]
+    started = time.perf_counter()
+    for _ in range(EVALUATION_REPEATS):
+        for board in boards:
+            engine.evaluate_board(board, AI_MINIMAX, HUMAN)
+    evaluation_seconds = time.perf_counter() - started
+
+    return {
+        "minimax_nodes_per_second": totals["minimax"][0] / totals["minimax"][1],
+        "alpha_beta_nodes_per_second": totals["alpha_beta"][0] / totals["alpha_beta"][1],
+        "evaluations_per_second": EVALUATION_REPEATS * len(boards) / evaluation_seconds,
+        "time_to_depth": {str(d + 1): seconds for d, seconds in enumerate(time_to_depth)},
+        "expected_move_agreement": expected_hits / expected_total if expected_total else None,
+        "expected_move_seconds": expected_seconds,
+        "minimax_alpha_beta_agreement": agreements / len(positions),
+        "positions": per_position,
+    }
+
+
+def regressions(results, baseline, threshold):
+    # Messages for every throughput figure more than threshold below the baseline
+    found = []
+    for engine_name, figures in baseline["engines"].items():
+        current = results["engines"].get(engine_name)
+        if current is None:
+            continue
+        for key in THROUGHPUT:
+            if current[key] < figures[key] * (1 - threshold):
+                found.append(f"{engine_name} {key}: {current[key]:.0f} vs baseline {figures[key]:.0f} "
+                             f"({current[key] / figures[key] - 1:+.0%})")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine speed and move-quality benchmarks")
+    parser.add_argument("--engines", default="classic,pattern", help="evaluations to benchmark")
+    parser.add_argument("--depth", type=int, default=ALPHA_BETA_DEPTH, help="deepest alpha-beta search")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--output", help="write the results here as well as to stdout")
+    parser.add_argument("--baseline", help=f"compare throughput with this file, e.g. {DEFAULT_BASELINE}")
+    parser.add_argument("--save-baseline", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction of baseline throughput that may be lost")
+    args = parser.parse_args(argv)
+    positions = load_corpus(args.corpus)
+
+    results = {"depth": args.depth, "positions": len(positions), "engines": {}}
+    for engine_name in args.engines.split(","):
+        engine = Engine(engine_name, opening_book=None)
+        results["engines"][engine_name] = bench_engine(engine, positions, args.depth)
+        figures = results["engines"][engine_name]
+        print(f"{engine_name}: minimax {figures['minimax_nodes_per_second']:.0f} nodes/s, "
+              f"alpha-beta {figures['alpha_beta_nodes_per_second']:.0f} nodes/s, "
+              f"{figures['evaluations_per_second']:.0f} evaluations/s", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline["depth"], baseline["positions"]) != (results["depth"], results["positions"]):
+            parser.error(f"the baseline was run at depth {baseline['depth']} on {baseline['positions']} positions")
+        found = regressions(results, baseline, args.threshold)
+        for message in found:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
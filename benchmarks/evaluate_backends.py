@@ -0,0 +1,71 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Evaluation Backend Benchmark ========
+# Times a full-board evaluate_board of the "pattern" evaluation with the
+# pure-Python evaluator (list board and BitBoard rebuilt from scratch) and with
+# the NumPy backend, on random positions with 10, 50 and 150 stones and no five
+# on the board.
+#
+#   python benchmarks/evaluate_backends.py [repeats]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gomoku_engine import AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, BitBoard, Engine, check_win_at, create_board
+from gomoku_engine import numpy_eval
+
+STONE_COUNTS = (10, 50, 150)
+POSITIONS = 20
+
+
+def random_position(stones, rng):
+    # Random stones around the centre, alternating colours, never completing a five
+    board = create_board()
+    placed = 0
+    while placed < stones:
+        r, c = rng.randrange(BOARD_SIZE), rng.randrange(BOARD_SIZE)
+        if board[r][c] != EMPTY:
+            continue
+        board[r][c] = HUMAN if placed % 2 == 0 else AI_MINIMAX
+        if check_win_at(board, r, c):
+            board[r][c] = EMPTY
+            continue
+        placed += 1
+    return board
+
+
+def time_backend(evaluate, boards, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for board in boards:
+            evaluate(board)
+    return (time.perf_counter() - started) / (repeats * len(boards))
+
+
+def main(repeats=5):
+    rng = random.Random(2024)
+    ai, opponent = AI_MINIMAX, HUMAN
+    engine = Engine("pattern")
+    print(f"{'stones':>6} {'python list':>12} {'bitboard':>12} {'numpy':>12}  (ms per evaluate_board)")
+    for stones in STONE_COUNTS:
+        boards = [random_position(stones, rng) for _ in range(POSITIONS)]
+        # Cached line scores would hide the evaluator's own cost
+        list_time = time_backend(
+            lambda b: (engine.evaluation.line_scores.cache_clear(), engine.evaluate_board(b, ai, opponent)),
+            boards, repeats)
+        bitboard_time = time_backend(
+            lambda b: (engine.evaluation.line_scores.cache_clear(),
+                       engine.evaluate_board(BitBoard.from_list(b, WIN_COUNT, EMPTY), ai, opponent)),
+            boards, repeats)
+        if numpy_eval.AVAILABLE:
+            numpy_engine = Engine("pattern", backend="numpy")
+            numpy_time = time_backend(lambda b: numpy_engine.evaluate_board(b, ai, opponent), boards, repeats)
+            numpy_time = f"{numpy_time * 1000:12.3f}"
+        else:
+            numpy_time = f"{'n/a':>12}"
+        print(f"{stones:>6} {list_time * 1000:12.3f} {bitboard_time * 1000:12.3f} {numpy_time}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,64 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Import Time Budget ========
+# Measures "import gomoku_engine" in fresh interpreters (the cost every worker
+# process and command-line tool pays before its first search) and checks that
+# no UI toolkit and none of the lazily loaded heavy modules come with it.
+# Prints the median of the runs; the exit status is 1 when it is over the
+# budget or a forbidden module was imported.
+#
+#   python benchmarks/import_time.py [--runs 7] [--budget 50]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 50  # Median milliseconds for "import gomoku_engine", interpreter start-up excluded
+DEFAULT_RUNS = 7
+# Loaded on first use only: the UIs never, NumPy with the first NumPy evaluation, the process pool with
+# the first parallel search
+FORBIDDEN = ("tkinter", "PIL", "numpy", "multiprocessing", "concurrent.futures")
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import gomoku_engine
+seconds = time.perf_counter() - started
+print(json.dumps({{"ms": seconds * 1000, "loaded": [name for name in {FORBIDDEN!r} if name in sys.modules]}}))
+"""
+
+
+def measure(runs):
+    # ([milliseconds per run], forbidden modules seen in any run)
+    times, loaded = [], set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout)
+        times.append(result["ms"])
+        loaded.update(result["loaded"])
+    return times, sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time of the gomoku_engine package")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="median milliseconds allowed")
+    args = parser.parse_args(argv)
+    measure(1)  # Compile the .pyc files outside the timed runs
+    times, loaded = measure(args.runs)
+    median = statistics.median(times)
+    print(f"import gomoku_engine: median {median:.1f} ms, min {min(times):.1f} ms, max {max(times):.1f} ms "
+          f"over {args.runs} runs (budget {args.budget:g} ms)")
+    status = 0
+    if loaded:
+        print(f"FAIL imported {', '.join(loaded)}", file=sys.stderr)
+        status = 1
+    if median > args.budget:
+        print(f"FAIL {median - args.budget:.1f} ms over budget", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Lazy SMP Scaling Benchmark ========
+# Searches the same positions with 1, 2, 4 ... workers sharing one
+# transposition table and prints time, total nodes, nodes per second and the
+# shared table's hit rate for each worker count, plus each worker's nodes.
+# The root threat search is off, so every position goes to the workers; a
+# position the root still answers alone (a single candidate) is left out.
+# Without a time limit the deeper workers are stopped when worker 0 finishes
+# the depth, so only the table they filled helps; with seconds, each search
+# may run that long and "deeper" counts the moves a depth+1 worker gave.
+#
+#   python benchmarks/lazy_smp_scaling.py [depth] [max_workers] [seconds]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gomoku_engine import AI_MINIMAX, EMPTY, HUMAN, Deadline, Engine, check_win_at, create_board
+from gomoku_engine.parallel_search import LazySMPSearch
+
+POSITIONS = 4
+
+
+def random_position(stones, rng):
+    # Stones near the centre, alternating colours, never completing a five
+    board = create_board()
+    placed = 0
+    while placed < stones:
+        r, c = rng.randrange(4, 11), rng.randrange(4, 11)
+        if board[r][c] != EMPTY:
+            continue
+        board[r][c] = HUMAN if placed % 2 == 0 else AI_MINIMAX
+        if check_win_at(board, r, c):
+            board[r][c] = EMPTY
+            continue
+        placed += 1
+    return board
+
+
+def main(depth=3, max_workers=os.cpu_count() or 1, seconds=None):
+    rng = random.Random(7)
+    boards = [random_position(rng.randint(6, 16), rng) for _ in range(POSITIONS)]
+    engine = Engine("pattern", threat_search=False)
+    worker_counts = []
+    workers = 1
+    while workers <= max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    print(f"depth {depth}, {POSITIONS} positions" + (f", {seconds:g} s per search" if seconds else ""))
+    print(f"{'workers':>7} {'seconds':>8} {'nodes':>9} {'nodes/s':>9} {'hit rate':>8} {'deeper':>6}  nodes per worker")
+    for workers in worker_counts:
+        search = LazySMPSearch(workers, engine.table_mb * 1024 * 1024)
+        search._pool()  # Start the workers before timing
+        elapsed_total = nodes = hit_rate = searched = deeper = 0
+        per_worker = [0] * workers
+        for board in boards:
+            search.last_report = None
+            started = time.perf_counter()
+            deadline = Deadline(seconds) if seconds else None
+            engine.alpha_beta_search(board, AI_MINIMAX, HUMAN, depth, deadline=deadline, parallel=search)
+            elapsed = time.perf_counter() - started
+            report = search.last_report
+            if report is None:  # Answered at the root without the workers
+                continue
+            elapsed_total += elapsed
+            searched += 1
+            deeper += report["depth"] is not None and report["depth"] > depth
+            nodes += report["nodes"]
+            hit_rate += report["hit_rate"]
+            for entry in report["workers"]:
+                per_worker[entry["worker"]] += entry["nodes"]
+        search.shutdown()
+        hit_rate /= max(1, searched)
+        print(f"{workers:>7} {elapsed_total:8.2f} {nodes:>9} {nodes / max(elapsed_total, 1e-9):9.0f} {hit_rate:8.0%} "
+              f"{deeper:>6}  " + " ".join(str(count) for count in per_worker))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]), *(float(arg) for arg in sys.argv[3:4]))
@@ -0,0 +1,28 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Gomoku Engine ========
+# The search engine shared by the command-line game (Gomoku.py), the Tk GUI
+# (GUI.py), the tournament runner and the benchmarks. Nothing here imports a
+# UI toolkit, and the heavy parts load on first use: the process pool with the
+# first parallel search, NumPy with the first batched or NumPy evaluation, the
+# pattern table with the first "pattern" evaluation. benchmarks/import_time.py
+# keeps "import gomoku_engine" within its budget.
+#
+#   from gomoku_engine import Engine, create_board, HUMAN, AI_MINIMAX
+#   engine = Engine(evaluation="pattern", max_depth=3)
+#   move = engine.choose_move(create_board(), AI_MINIMAX, HUMAN)
+from .bitboard import BitBoard
+from .board import (AI_ALPHABETA, AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, check_win, check_win_at,
+                    count_stones, create_board, get_all_moves, is_board_full, is_valid_move, winning_line,
+                    winning_line_at)
+from .engine import Engine
+from .evaluation import EVALUATIONS, get_evaluation
+from .move_ordering import MoveOrderer
+from .pondering import Ponderer
+from .search_control import Deadline, GameClock, SearchTimeout
+from .search_stats import SearchStats
+from .transposition import TranspositionTable
+
+__all__ = ["AI_ALPHABETA", "AI_MINIMAX", "BOARD_SIZE", "EMPTY", "EVALUATIONS", "HUMAN", "WIN_COUNT", "BitBoard",
+           "Deadline", "Engine", "GameClock", "MoveOrderer", "Ponderer", "SearchStats", "SearchTimeout",
+           "TranspositionTable", "check_win", "check_win_at", "count_stones", "create_board", "get_all_moves",
+           "get_evaluation", "is_board_full", "is_valid_move", "winning_line", "winning_line_at"]
@@ -0,0 +1,267 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Bitboard Board Representation ========
+# Each player's stones are kept as Python integers so that win and
+# neighbourhood tests become a handful of shift-and-mask operations instead of
+# nested loops over a list of lists.
+#
+# Two layouts are maintained side by side:
+#   * a whole-board mask per player, bit (r * stride + c). The stride is one
+#     wider than the board, and that spare column is always empty, so shifting
+#     horizontally or diagonally can never wrap a run onto the next row.
+#   * per-line masks per player for every row, column, "\" diagonal and "/"
+#     diagonal, bit i being the i-th cell of the line in the same order the
+#     list-based evaluate_board walks it. Evaluators read these directly.
+#
+# A Zobrist hash of the position is kept up to date by make/unmake, and so is
+# the candidate frontier: the empty cells within `radius` (Chebyshev distance)
+# of some stone. Every cell keeps a count of the stones near it, so a move only
+# touches the (2 * radius + 1)^2 square around it and move generation costs
+# O(candidates) instead of a scan of the board.
+import random
+
+EMPTY = "."
+DEFAULT_RADIUS = 2
+
+_zobrist_keys = {}
+_geometries = {}
+
+
+def zobrist_keys(player, size):
+    # Seeded per (player, size) so hashes are identical across runs and processes
+    if (player, size) not in _zobrist_keys:
+        rng = random.Random(f"zobrist-{player}-{size}")
+        _zobrist_keys[(player, size)] = [rng.getrandbits(64) for _ in range(size * size)]
+    return _zobrist_keys[(player, size)]
+
+
+def geometry(size, radius):
+    # (valid cells mask, "\" diagonal lengths, "/" diagonal lengths, cells within radius of each cell), built
+    # once per (size, radius) and shared read-only by every board: it costs more than filling a board with moves
+    if (size, radius) not in _geometries:
+        stride = size + 1
+        valid = 0
+        for r in range(size):
+            valid |= ((1 << size) - 1) << (r * stride)
+        diag_lengths = [size - abs(d - size + 1) for d in range(2 * size - 1)]
+        anti_diag_lengths = [min(d, 2 * size - 2 - d) + 1 for d in range(2 * size - 1)]
+        # Cells within radius of each cell, the cell itself excluded
+        neighbours = [
+            [rr * size + cc
+             for rr in range(max(0, r - radius), min(size, r + radius + 1))
+             for cc in range(max(0, c - radius), min(size, c + radius + 1))
+             if (rr, cc) != (r, c)]
+            for r in range(size) for c in range(size)]
+        _geometries[(size, radius)] = (valid, diag_lengths, anti_diag_lengths, neighbours)
+    return _geometries[(size, radius)]
+
+
+class BitBoard:
+    def __init__(self, size=15, win_count=5, empty=EMPTY, radius=DEFAULT_RADIUS):
+        self.size = size
+        self.win_count = win_count
+        self.empty = empty
+        self.radius = radius
+        self.stride = size + 1
+        self.cells = [empty] * (size * size)
+        self.count = 0
+        self.occupied = 0
+        self.hash = 0
+        self.zobrist = {}     # player -> key per cell
+        self.stones = {}      # player -> whole-board mask
+        self.rows = {}        # player -> [mask per row]
+        self.cols = {}        # player -> [mask per column]
+        self.diags = {}       # player -> [mask per "\" diagonal, index c - r + size - 1]
+        self.anti_diags = {}  # player -> [mask per "/" diagonal, index r + c]
+        self.near = [0] * (size * size)  # cell -> number of stones within radius
+        self.frontier = set()  # empty cells (r * size + c) with near > 0
+
+        # Shift distances for horizontal, vertical, "\" and "/" runs on the whole-board mask
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.valid, self.diag_lengths, self.anti_diag_lengths, self.neighbours = geometry(size, radius)
+
+    # ======== Conversion ========
+    @classmethod
+    def from_list(cls, board, win_count=5, empty=EMPTY, radius=DEFAULT_RADIUS):
+        bitboard = cls(len(board), win_count, empty, radius)
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                if cell != empty:
+                    bitboard.make(r, c, cell)
+        return bitboard
+
+    def to_list(self):
+        size = self.size
+        return [self.cells[r * size:(r + 1) * size] for r in range(size)]
+
+    def copy(self):
+        clone = BitBoard(self.size, self.win_count, self.empty, self.radius)
+        for idx, cell in enumerate(self.cells):
+            if cell != self.empty:
+                clone.make(idx // self.size, idx % self.size, cell)
+        return clone
+
+    # ======== Make / Unmake ========
+    def _add_player(self, player):
+        size = self.size
+        self.zobrist[player] = zobrist_keys(player, size)
+        self.stones[player] = 0
+        self.rows[player] = [0] * size
+        self.cols[player] = [0] * size
+        self.diags[player] = [0] * (2 * size - 1)
+        self.anti_diags[player] = [0] * (2 * size - 1)
+
+    def _toggle(self, r, c, player):
+        size = self.size
+        self.hash ^= self.zobrist[player][r * size + c]
+        self.stones[player] ^= 1 << (r * self.stride + c)
+        self.rows[player][r] ^= 1 << c
+        self.cols[player][c] ^= 1 << r
+        self.diags[player][c - r + size - 1] ^= 1 << min(r, c)
+        self.anti_diags[player][r + c] ^= 1 << (r - max(0, r + c - size + 1))
+
+    def make(self, r, c, player):
+        if player not in self.stones:
+            self._add_player(player)
+        idx = r * self.size + c
+        self.cells[idx] = player
+        self.occupied |= 1 << (r * self.stride + c)
+        self.count += 1
+        self._toggle(r, c, player)
+        near, cells, empty, frontier = self.near, self.cells, self.empty, self.frontier
+        for n in self.neighbours[idx]:
+            near[n] += 1
+            if near[n] == 1 and cells[n] == empty:
+                frontier.add(n)
+        frontier.discard(idx)
+
+    def unmake(self, r, c):
+        idx = r * self.size + c
+        player = self.cells[idx]
+        self.cells[idx] = self.empty
+        self.occupied &= ~(1 << (r * self.stride + c))
+        self.count -= 1
+        self._toggle(r, c, player)
+        near, frontier = self.near, self.frontier
+        for n in self.neighbours[idx]:
+            near[n] -= 1
+            if not near[n]:
+                frontier.discard(n)
+        if near[idx]:
+            frontier.add(idx)
+
+    # ======== Queries ========
+    def get(self, r, c):
+        return self.cells[r * self.size + c]
+
+    def is_empty(self, r, c):
+        return self.cells[r * self.size + c] == self.empty
+
+    def is_full(self):
+        return self.count >= self.size * self.size
+
+    def player_masks(self, player):
+        # (rows, cols, diags, anti_diags) line masks; all zero for a player with no stones
+        if player not in self.stones:
+            self._add_player(player)
+        return self.rows[player], self.cols[player], self.diags[player], self.anti_diags[player]
+
+    def lines(self, player, opponent):
+        # Yields (player_mask, opponent_mask, length) for every line on the board
+        size = self.size
+        p_rows, p_cols, p_diags, p_anti = self.player_masks(player)
+        o_rows, o_cols, o_diags, o_anti = self.player_masks(opponent)
+        for i in range(size):
+            yield p_rows[i], o_rows[i], size
+        for i in range(size):
+            yield p_cols[i], o_cols[i], size
+        for d in range(2 * size - 1):
+            yield p_diags[d], o_diags[d], self.diag_lengths[d]
+        for d in range(2 * size - 1):
+            yield p_anti[d], o_anti[d], self.anti_diag_lengths[d]
+
+    def lines_through(self, r, c, player, opponent):
+        # The four lines (row, column, "\" and "/") that contain (r, c)
+        size = self.size
+        p_rows, p_cols, p_diags, p_anti = self.player_masks(player)
+        o_rows, o_cols, o_diags, o_anti = self.player_masks(opponent)
+        d, a = c - r + size - 1, r + c
+        return ((p_rows[r], o_rows[r], size),
+                (p_cols[c], o_cols[c], size),
+                (p_diags[d], o_diags[d], self.diag_lengths[d]),
+                (p_anti[a], o_anti[a], self.anti_diag_lengths[a]))
+
+    # ======== Win Detection ========
+    def _runs(self, mask, shift):
+        # Bit i survives iff win_count stones start at i along the shift direction
+        run = mask
+        for i in range(1, self.win_count):
+            run &= mask >> (i * shift)
+        return run
+
+    def is_win(self, player):
+        mask = self.stones.get(player, 0)
+        if not mask:
+            return False
+        return any(self._runs(mask, shift) for shift in self.shifts)
+
+    def find_win(self, player):
+        # Cells of one winning run of player, or None
+        mask = self.stones.get(player, 0)
+        for dr, dc, shift in ((0, 1, 1), (1, 0, self.stride), (1, 1, self.stride + 1), (1, -1, self.stride - 1)):
+            run = self._runs(mask, shift) if mask else 0
+            if run:
+                r, c = divmod((run & -run).bit_length() - 1, self.stride)
+                return [(r + dr * i, c + dc * i) for i in range(self.win_count)]
+        return None
+
+    def is_win_at(self, r, c):
+        # Only the four lines through (r, c) are tested, each with a single line mask
+        player = self.cells[r * self.size + c]
+        if player == self.empty:
+            return False
+        size, win_count = self.size, self.win_count
+        for mask, pos in ((self.rows[player][r], c),
+                          (self.cols[player][c], r),
+                          (self.diags[player][c - r + size - 1], min(r, c)),
+                          (self.anti_diags[player][r + c], r - max(0, r + c - size + 1))):
+            run = mask
+            for i in range(1, win_count):
+                run &= mask >> i
+            # Runs starting in [pos - win_count + 1, pos] cover (r, c)
+            low = max(0, pos - win_count + 1)
+            if (run >> low) & ((1 << (pos - low + 1)) - 1):
+                return True
+        return False
+
+    def winning_line_at(self, r, c):
+        if not self.is_win_at(r, c):
+            return None
+        player = self.cells[r * self.size + c]
+        for dr, dc in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            line = [(r, c)]
+            for sign in (1, -1):
+                rr, cc = r + sign * dr, c + sign * dc
+                while 0 <= rr < self.size and 0 <= cc < self.size and self.cells[rr * self.size + cc] == player:
+                    line.append((rr, cc))
+                    rr, cc = rr + sign * dr, cc + sign * dc
+            if len(line) >= self.win_count:
+                return sorted(line)
+        return None
+
+    # ======== Move Generation ========
+    def _cells_of(self, mask):
+        cells = []
+        stride = self.stride
+        while mask:
+            low = mask & -mask
+            cells.append(divmod(low.bit_length() - 1, stride))
+            mask ^= low
+        return cells
+
+    def empty_cells(self):
+        return self._cells_of(self.valid & ~self.occupied)
+
+    def candidates(self):
+        # The frontier in row-major order, so ties between equal moves are broken as before
+        size = self.size
+        return [divmod(idx, size) for idx in sorted(self.frontier)]
@@ -0,0 +1,134 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Board Rules ========
+# The game itself: board size, stone symbols, wins and the candidate moves.
+# Every function takes either a list-of-lists board or a BitBoard.
+from .bitboard import BitBoard
+
+BOARD_SIZE = 15
+WIN_COUNT = 5
+EMPTY = "."
+HUMAN = "X"
+AI_MINIMAX = "O"
+AI_ALPHABETA = "A"
+
+WIN_DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]  # Vertical, Horizontal, Diagonal \, Diagonal /
+
+
+def create_board():
+    return [[EMPTY for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+
+
+def to_bitboard(board, radius):
+    # The BitBoard searches run on; a BitBoard is returned as it is
+    if isinstance(board, BitBoard):
+        return board
+    return BitBoard.from_list(board, WIN_COUNT, EMPTY, radius)
+
+
+def is_valid_move(board, r, c):
+    return 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE and board[r][c] == EMPTY
+
+
+# ======== Win & Terminal Checking ========
+def winning_line(board, player):
+    # Cells of one of player's winning runs, or None
+    if player == EMPTY:
+        return None
+    if isinstance(board, BitBoard):
+        return board.find_win(player)
+    for r in range(BOARD_SIZE):
+        for c in range(BOARD_SIZE):
+            if board[r][c] == player:
+                for dr, dc in WIN_DIRECTIONS:
+                    line = []
+                    for i in range(WIN_COUNT):
+                        rr, cc = r + dr * i, c + dc * i
+                        if 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE and board[rr][cc] == player:
+                            line.append((rr, cc))
+                        else:
+                            break
+                    if len(line) == WIN_COUNT:
+                        return line
+    return None
+
+
+def check_win(board, player):
+    if isinstance(board, BitBoard):
+        return player != EMPTY and board.is_win(player)
+    return winning_line(board, player) is not None
+
+
+def winning_line_at(board, r, c):
+    # The whole run through (r, c) if the stone there completes WIN_COUNT in a row, else None
+    if isinstance(board, BitBoard):
+        return board.winning_line_at(r, c)
+    player = board[r][c]
+    if player == EMPTY:
+        return None
+    for dr, dc in WIN_DIRECTIONS:
+        line = [(r, c)]
+        for sign in (1, -1):
+            rr, cc = r + sign * dr, c + sign * dc
+            while 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE and board[rr][cc] == player:
+                line.append((rr, cc))
+                rr, cc = rr + sign * dr, cc + sign * dc
+        if len(line) >= WIN_COUNT:
+            return sorted(line)
+    return None
+
+
+def check_win_at(board, r, c):
+    # Only the four lines through the stone just played can have become a five,
+    # so this walks at most WIN_COUNT - 1 cells each way instead of the whole board
+    if isinstance(board, BitBoard):
+        return board.is_win_at(r, c)
+    player = board[r][c]
+    if player == EMPTY:
+        return False
+    for dr, dc in WIN_DIRECTIONS:
+        count = 1
+        for sign in (1, -1):
+            rr, cc = r + sign * dr, c + sign * dc
+            while count < WIN_COUNT and 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE and board[rr][cc] == player:
+                count += 1
+                rr, cc = rr + sign * dr, cc + sign * dc
+        if count >= WIN_COUNT:
+            return True
+    return False
+
+
+def count_stones(board):
+    if isinstance(board, BitBoard):
+        return board.count
+    return sum(cell != EMPTY for row in board for cell in row)
+
+
+def is_board_full(board, stones=None):
+    if isinstance(board, BitBoard):
+        return board.is_full()
+    if stones is not None:
+        return stones >= BOARD_SIZE * BOARD_SIZE
+    return all(cell != EMPTY for row in board for cell in row)
+
+
+# ======== Successor Generation ========
+def get_all_moves(board, radius):
+    # Empty cells within radius of a stone; the BitBoard keeps that frontier up to date on every
+    # make/unmake. An empty board offers the centre 3x3.
+    board = to_bitboard(board, radius)
+    if board.count == 0:
+        center = BOARD_SIZE // 2
+        return [(r, c) for r in range(max(0, center - 1), min(BOARD_SIZE, center + 2))
+                for c in range(max(0, center - 1), min(BOARD_SIZE, center + 2))]
+    return board.candidates() or board.empty_cells()
+
+
+def board_lines(board):
+    # Every row, column and diagonal of a list-of-lists board long enough to hold WIN_COUNT
+    lines = [[board[r][c] for c in range(BOARD_SIZE)] for r in range(BOARD_SIZE)]
+    lines += [[board[r][c] for r in range(BOARD_SIZE)] for c in range(BOARD_SIZE)]
+    for k in range(-(BOARD_SIZE - WIN_COUNT), BOARD_SIZE - WIN_COUNT + 1):
+        lines.append([board[r][r + k] for r in range(BOARD_SIZE) if 0 <= r + k < BOARD_SIZE])
+    for k in range(WIN_COUNT - 1, 2 * BOARD_SIZE - WIN_COUNT):
+        lines.append([board[r][k - r] for r in range(BOARD_SIZE) if 0 <= k - r < BOARD_SIZE])
+    return lines
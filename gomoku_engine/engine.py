@@ -0,0 +1,458 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Search Engine ========
+# Minimax and alpha-beta over a BitBoard, with iterative deepening, the
+# threat-space solver at the root, the opening book and optional parallel
+# workers. Every setting is an attribute of the Engine, fixed when it is
+# created, so two engines with different settings can share a process (the
+# GUI's, a tournament's players, a worker pool's) without touching any module
+# global.
+#
+# The search calls its node functions and helpers (min_value_ab,
+# evaluate_board, get_all_moves ...) through self, so search_stats can
+# instrument one engine by replacing them on the instance.
+import math
+import random
+import time
+import warnings
+
+from . import board as rules
+from .bitboard import BitBoard
+from .board import BOARD_SIZE, WIN_COUNT, to_bitboard
+from .evaluation import get_evaluation
+from .move_ordering import MoveOrderer
+from .opening_book import DEFAULT_PATH as DEFAULT_OPENING_BOOK, open_book
+from .search_control import Deadline, GameClock, SearchTimeout
+from .threat_search import threat_space_root
+from .transposition import EXACT, MIN_NODE_KEY, TranspositionTable
+
+
+class Engine:
+    def __init__(self, evaluation="classic",
+                 max_depth=2,  # Fixed search depth when there is no time limit
+                 radius=2,  # Candidate moves are empty cells within this distance of a stone
+                 table_mb=64,  # Memory cap for the alpha-beta transposition table
+                 time_per_move=None,  # Seconds per move; when set, iterative deepening replaces max_depth
+                 game_time=None,  # Seconds per side for the whole game; when set, each move gets a share of it
+                 iterative_max_depth=20,  # Upper bound for iterative deepening
+                 iteration_growth=3,  # Expected time ratio between consecutive iterations
+                 workers=1,  # Search processes; 1 searches in this process
+                 parallel_mode="root",  # With several workers: "root" splits root moves, "lazy_smp" shares one table
+                 threat_search=True,  # Look for forced wins (VCF/VCT), and defend against them, before the main search
+                 opening_book=DEFAULT_OPENING_BOOK,  # Book file consulted by get_book_move; None disables it
+                 backend="python",  # "python" or "numpy" (pattern evaluation only) for evaluate_board on whole boards
+                 batch_leaves=True):  # Score all leaves of a depth-1 alpha-beta node in one NumPy call
+        self.evaluation = get_evaluation(evaluation)
+        if backend not in ("python", "numpy"):
+            raise ValueError(f"Unknown evaluation backend: {backend}")
+        if parallel_mode not in ("root", "lazy_smp"):
+            raise ValueError(f"Unknown parallel mode: {parallel_mode}")
+        if backend == "numpy":
+            if self.evaluation.name != "pattern":
+                raise ValueError(f"The numpy backend needs the pattern evaluation, not {self.evaluation.name}")
+            # Falls back to "python" when NumPy is not installed
+            from . import numpy_eval
+            backend = backend if numpy_eval.AVAILABLE else "python"
+        self.max_depth = max_depth
+        self.radius = radius
+        self.table_mb = table_mb
+        self.time_per_move = time_per_move
+        self.game_time = game_time
+        self.iterative_max_depth = iterative_max_depth
+        self.iteration_growth = iteration_growth
+        self.workers = workers
+        self.parallel_mode = parallel_mode
+        self.threat_search = threat_search
+        self.opening_book = opening_book
+        self.backend = backend
+        self.batch_leaves = batch_leaves
+        self._parallel_search = None
+
+    def settings(self):
+        # Keyword arguments that recreate this engine, e.g. in a worker process
+        return {"evaluation": self.evaluation.name, "max_depth": self.max_depth, "radius": self.radius,
+                "table_mb": self.table_mb, "time_per_move": self.time_per_move, "game_time": self.game_time,
+                "iterative_max_depth": self.iterative_max_depth, "iteration_growth": self.iteration_growth,
+                "workers": self.workers, "parallel_mode": self.parallel_mode, "threat_search": self.threat_search,
+                "opening_book": self.opening_book, "backend": self.backend, "batch_leaves": self.batch_leaves}
+
+    def __repr__(self):
+        return f"Engine({', '.join(f'{name}={value!r}' for name, value in self.settings().items())})"
+
+    @property
+    def score_win(self):
+        return self.evaluation.SCORE_WIN
+
+    def new_table(self):
+        return TranspositionTable(self.table_mb * 1024 * 1024)
+
+    # ======== Board Helpers ========
+    def get_all_moves(self, board):
+        return rules.get_all_moves(board, self.radius)
+
+    def check_win(self, board, player):
+        return rules.check_win(board, player)
+
+    def check_win_at(self, board, r, c):
+        return rules.check_win_at(board, r, c)
+
+    def terminal_test(self, board, depth, player_ai, opponent_in_game, last_move=None):
+        if last_move is None:  # No move history (e.g. a custom board), fall back to full scans
+            return depth == 0 or \
+                   self.check_win(board, player_ai) or \
+                   self.check_win(board, opponent_in_game) or \
+                   rules.is_board_full(board)
+        return depth == 0 or self.check_win_at(board, *last_move) or rules.is_board_full(board)
+
+    # ======== Evaluation ========
+    def create_evaluator(self, board, player_ai, opponent_in_game):
+        return self.evaluation.create_evaluator(board, player_ai, opponent_in_game)
+
+    def evaluate_board(self, board, player_ai, opponent_in_game, last_move=None, evaluator=None):
+        if last_move is not None:
+            # Positions inside the search were not won before last_move, so only its lines matter
+            if self.check_win_at(board, *last_move):
+                winner = board.get(*last_move) if isinstance(board, BitBoard) else board[last_move[0]][last_move[1]]
+                return self.score_win if winner == player_ai else -self.score_win
+        elif self.check_win(board, player_ai):
+            return self.score_win
+        elif self.check_win(board, opponent_in_game):
+            return -self.score_win
+        if rules.is_board_full(board):
+            return 0  # Draw
+        return self.evaluation.score(board, player_ai, opponent_in_game, evaluator, self.backend)
+
+    def batched_leaf_values(self, board, moves, mover, evaluator):
+        values = self.evaluation.batched_leaf_values(board, moves, mover, evaluator)
+        if board.count + 1 >= board.size * board.size:
+            # Each move fills the board, so as in evaluate_board it is a draw unless it wins
+            values = [value if abs(value) == self.score_win else 0 for value in values]
+        return values
+
+    # ======== Root ========
+    def root_moves(self, board, player_ai, opponent_in_game, deadline=None):
+        # (forced move, candidate moves, first move): the threat search's proven win, or the moves worth
+        # searching, led by the threat search's unproven one (a VCT) if it found one. The threat search
+        # gives up at deadline.
+        possible_moves = self.get_all_moves(board)
+        first_move = None
+        if possible_moves and self.threat_search:
+            forced_move, first_move, defences = threat_space_root(board, player_ai, opponent_in_game, deadline)
+            if forced_move is not None:
+                return forced_move, possible_moves, None
+            if defences:
+                possible_moves = defences
+            if first_move is not None:
+                possible_moves = [first_move] + [move for move in possible_moves if move != first_move]
+        if len(possible_moves) == 1:
+            return possible_moves[0], possible_moves, None
+        return None, possible_moves, first_move
+
+    # ======== Minimax Implementation ========
+    # The search runs on a BitBoard; list-of-lists boards are converted once at the root.
+    # Stones are placed through the IncrementalEvaluator so leaf scores are a running total.
+    def minimax_decision(self, board, player_ai, opponent_in_game, depth=None, deadline=None, parallel=None,
+                         stats=None):
+        if depth is None: depth = self.max_depth
+        if stats is not None and parallel is None:
+            # Same search, with this engine's node functions and helpers instrumented (see search_stats.py)
+            with stats.instrument(self, depth):
+                move = self.minimax_decision(board, player_ai, opponent_in_game, depth, deadline)
+            stats.finish(move)
+            return move
+        best_score = -math.inf
+        best_action = None
+        board = to_bitboard(board, self.radius)
+        forced_move, possible_moves, _ = self.root_moves(board, player_ai, opponent_in_game, deadline)  # First leads
+        if not possible_moves: return None  # No moves left
+        if forced_move is not None:
+            return forced_move
+
+        if parallel is not None and parallel.mode == "root":
+            from .parallel_search import best_of  # Loaded with the parallel searcher
+            scores = parallel.score_moves(self.settings(), board, possible_moves, player_ai, opponent_in_game, depth,
+                                          False, deadline)
+            best_action, best_score = best_of(possible_moves, scores)
+        else:
+            evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+            for (r, c) in possible_moves:
+                evaluator.make(r, c, player_ai)
+                score = self.min_value(board, depth - 1, player_ai, opponent_in_game, (r, c), evaluator, deadline)
+                evaluator.unmake(r, c)  # Backtrack
+                if score > best_score:
+                    best_score = score
+                    best_action = (r, c)
+        return best_action if best_action is not None else random.choice(possible_moves)  # All scores are -inf
+
+    def max_value(self, board, depth, player_ai, opponent_in_game, last_move=None, evaluator=None, deadline=None):
+        if evaluator is None: evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+        if deadline is not None: deadline.check()
+        if self.terminal_test(board, depth, player_ai, opponent_in_game, last_move):
+            return self.evaluate_board(board, player_ai, opponent_in_game, last_move, evaluator)
+        v = -math.inf
+        for (r, c) in self.get_all_moves(board):
+            evaluator.make(r, c, player_ai)  # AI's turn
+            v = max(v, self.min_value(board, depth - 1, player_ai, opponent_in_game, (r, c), evaluator, deadline))
+            evaluator.unmake(r, c)  # Backtrack
+        return v
+
+    def min_value(self, board, depth, player_ai, opponent_in_game, last_move=None, evaluator=None, deadline=None):
+        if evaluator is None: evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+        if deadline is not None: deadline.check()
+        if self.terminal_test(board, depth, player_ai, opponent_in_game, last_move):
+            return self.evaluate_board(board, player_ai, opponent_in_game, last_move, evaluator)
+        v = math.inf
+        for (r, c) in self.get_all_moves(board):
+            evaluator.make(r, c, opponent_in_game)  # Opponent's turn
+            v = min(v, self.max_value(board, depth - 1, player_ai, opponent_in_game, (r, c), evaluator, deadline))
+            evaluator.unmake(r, c)  # Backtrack
+        return v
+
+    # ======== Alpha-Beta Implementation ========
+    # Results are cached in a TranspositionTable keyed by the board's Zobrist hash. Pass the same
+    # table to successive calls to keep it warm between moves.
+    def alpha_beta_search(self, board, player_ai, opponent_in_game, depth=None, tt=None, orderer=None,
+                          deadline=None, parallel=None, stats=None):
+        if depth is None: depth = self.max_depth
+        if stats is not None and parallel is None:
+            with stats.instrument(self, depth):
+                move = self.alpha_beta_search(board, player_ai, opponent_in_game, depth, tt, orderer, deadline)
+            stats.finish(move)
+            return move
+        alpha = -math.inf
+        beta = math.inf
+        best_score = -math.inf
+        best_action = None
+        board = to_bitboard(board, self.radius)
+        forced_move, possible_moves, first_move = self.root_moves(board, player_ai, opponent_in_game, deadline)
+        if not possible_moves: return None
+        if forced_move is not None:
+            return forced_move
+        if parallel is not None and parallel.mode == "lazy_smp":
+            return parallel.search(self.settings(), board, player_ai, opponent_in_game, depth, deadline)
+
+        if tt is None:
+            tt = self.new_table()
+        tt.new_search()
+        if orderer is None:
+            orderer = MoveOrderer()
+        orderer.new_search(depth)
+        root_entry = tt.probe(board.hash)
+        if first_move is None and root_entry is not None:
+            first_move = root_entry[4]
+        # Ties keep the first move searched, so a VCT move is played unless the search finds a better one
+        possible_moves = orderer.order(board, possible_moves, player_ai, opponent_in_game, depth, first_move)
+        if parallel is not None:
+            from .parallel_search import best_of
+            scores = parallel.score_moves(self.settings(), board, possible_moves, player_ai, opponent_in_game, depth,
+                                          True, deadline)
+            best_action, best_score = best_of(possible_moves, scores)
+        else:
+            evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+            for (r, c) in possible_moves:
+                evaluator.make(r, c, player_ai)
+                score = self.min_value_ab(board, depth - 1, alpha, beta, player_ai, opponent_in_game, (r, c),
+                                          evaluator, tt, orderer, deadline)
+                evaluator.unmake(r, c)  # Backtrack
+                if score > best_score:
+                    best_score = score
+                    best_action = (r, c)
+                alpha = max(alpha, best_score)  # Update alpha for the root
+        tt.store(board.hash, depth, EXACT, best_score, best_action)
+        return best_action if best_action is not None else random.choice(possible_moves)
+
+    def max_value_ab(self, board, depth, alpha, beta, player_ai, opponent_in_game, last_move=None, evaluator=None,
+                     tt=None, orderer=None, deadline=None):
+        if evaluator is None: evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+        if deadline is not None: deadline.check()
+        if self.terminal_test(board, depth, player_ai, opponent_in_game, last_move):
+            return self.evaluate_board(board, player_ai, opponent_in_game, last_move, evaluator)
+        key = board.hash
+        tt_move = None
+        if tt is not None:
+            cached, alpha, beta, tt_move = tt.probe_bounds(key, depth, alpha, beta)
+            if cached is not None:
+                return cached
+        alpha_start, beta_start = alpha, beta
+        moves = self.get_all_moves(board)
+        if orderer is not None:
+            moves = orderer.order(board, moves, player_ai, opponent_in_game, depth, tt_move)
+        v = -math.inf
+        best_move = None
+        # At depth 1 every child is a leaf, so all of them can be scored in one batch up front
+        leaf_values = None
+        if depth == 1 and self.batch_leaves and self.evaluation.can_batch():
+            leaf_values = self.batched_leaf_values(board, moves, player_ai, evaluator)
+        for i, (r, c) in enumerate(moves):
+            if leaf_values is not None:
+                score = leaf_values[i]
+                if deadline is not None: deadline.nodes += 1
+            else:
+                evaluator.make(r, c, player_ai)  # AI's turn
+                score = self.min_value_ab(board, depth - 1, alpha, beta, player_ai, opponent_in_game, (r, c),
+                                          evaluator, tt, orderer, deadline)
+                evaluator.unmake(r, c)  # Backtrack
+            if score > v:
+                v, best_move = score, (r, c)
+            if v >= beta:
+                if orderer is not None:
+                    orderer.record_cutoff((r, c), player_ai, depth, i)
+                break  # Beta cutoff
+            alpha = max(alpha, v)
+        if tt is not None:
+            tt.store_bounds(key, depth, alpha_start, beta_start, v, best_move)
+        return v
+
+    def min_value_ab(self, board, depth, alpha, beta, player_ai, opponent_in_game, last_move=None, evaluator=None,
+                     tt=None, orderer=None, deadline=None):
+        if evaluator is None: evaluator = self.create_evaluator(board, player_ai, opponent_in_game)
+        if deadline is not None: deadline.check()
+        if self.terminal_test(board, depth, player_ai, opponent_in_game, last_move):
+            return self.evaluate_board(board, player_ai, opponent_in_game, last_move, evaluator)
+        key = board.hash ^ MIN_NODE_KEY
+        tt_move = None
+        if tt is not None:
+            cached, alpha, beta, tt_move = tt.probe_bounds(key, depth, alpha, beta)
+            if cached is not None:
+                return cached
+        alpha_start, beta_start = alpha, beta
+        moves = self.get_all_moves(board)
+        if orderer is not None:
+            moves = orderer.order(board, moves, opponent_in_game, player_ai, depth, tt_move)
+        v = math.inf
+        best_move = None
+        leaf_values = None
+        if depth == 1 and self.batch_leaves and self.evaluation.can_batch():
+            leaf_values = self.batched_leaf_values(board, moves, opponent_in_game, evaluator)
+        for i, (r, c) in enumerate(moves):
+            if leaf_values is not None:
+                score = leaf_values[i]
+                if deadline is not None: deadline.nodes += 1
+            else:
+                evaluator.make(r, c, opponent_in_game)  # Opponent's turn
+                score = self.max_value_ab(board, depth - 1, alpha, beta, player_ai, opponent_in_game, (r, c),
+                                          evaluator, tt, orderer, deadline)
+                evaluator.unmake(r, c)  # Backtrack
+            if score < v:
+                v, best_move = score, (r, c)
+            if v <= alpha:
+                if orderer is not None:
+                    orderer.record_cutoff((r, c), opponent_in_game, depth, i)
+                break  # Alpha cutoff
+            beta = min(beta, v)
+        if tt is not None:
+            tt.store_bounds(key, depth, alpha_start, beta_start, v, best_move)
+        return v
+
+    # ======== Iterative Deepening ========
+    def iterative_deepening_search(self, board, player_ai, opponent_in_game, time_limit, search=None,
+                                   max_depth=None, deadline=None):
+        # Searches depth 1, 2, 3... until time_limit seconds are used up and returns the best move of the
+        # deepest completed iteration. search(board, player_ai, opponent_in_game, depth, deadline) defaults
+        # to alpha-beta with a fresh table; each iteration's best move is stored in that table and tried
+        # first by the next iteration. A deadline given by the caller replaces time_limit, so the caller
+        # can stop the search or move its end while it runs.
+        if max_depth is None: max_depth = self.iterative_max_depth
+        board = to_bitboard(board, self.radius)
+        if search is None:
+            tt, orderer = self.new_table(), MoveOrderer()
+            search = lambda b, p, o, d, dl: self.alpha_beta_search(b, p, o, d, tt, orderer, dl)
+        if deadline is None:
+            deadline = Deadline(time_limit)
+        if self.threat_search:
+            # Solved once here, within the deadline, and reused by every iteration: depth 1 runs without one
+            self.root_moves(board, player_ai, opponent_in_game, deadline)
+        best_action = None
+        for depth in range(1, min(max_depth, BOARD_SIZE * BOARD_SIZE - board.count) + 1):
+            iteration_started = deadline.elapsed()
+            try:
+                # Depth 1 always completes so there is a move to return. An aborted iteration
+                # unwinds without undoing its stones, hence the copy.
+                best_action = search(board.copy(), player_ai, opponent_in_game, depth, deadline if depth > 1 else None)
+            except SearchTimeout:
+                break
+            # Don't start an iteration that cannot finish in the time left
+            if deadline.remaining() < (deadline.elapsed() - iteration_started) * self.iteration_growth:
+                break
+        return best_action
+
+    def predicted_reply(self, board, player_ai, opponent_in_game, tt=None, deadline=None):
+        # The move opponent_in_game is expected to play next on board: the reply stored for this position
+        # by the last alpha-beta search in tt, else the opponent's best move by a depth-1 search, which
+        # raises SearchTimeout if deadline is stopped first
+        board = to_bitboard(board, self.radius)
+        entry = tt.probe(board.hash ^ MIN_NODE_KEY) if tt is not None else None
+        if entry is not None and entry[4] is not None and board.is_empty(*entry[4]):
+            return entry[4]
+        return self.minimax_decision(board.copy(), opponent_in_game, player_ai, depth=1, deadline=deadline)
+
+    def principal_variation(self, board, player_ai, opponent_in_game, tt, max_length=None):
+        # The line the last alpha-beta search in tt expects from board, player_ai to move: the best moves stored
+        # for max and min nodes in turn, until a position without one, a win or max_length moves
+        board = to_bitboard(board, self.radius).copy()
+        pv, mover, waiting = [], player_ai, opponent_in_game
+        while max_length is None or len(pv) < max_length:
+            entry = tt.probe(board.hash if mover == player_ai else board.hash ^ MIN_NODE_KEY)
+            if entry is None or entry[4] is None or not board.is_empty(*entry[4]):
+                break
+            board.make(*entry[4], mover)
+            pv.append(entry[4])
+            if board.is_win_at(*entry[4]) or board.is_full():
+                break
+            mover, waiting = waiting, mover
+        return pv
+
+    # ======== Playing a Move ========
+    def new_clock(self):
+        # GameClock for one side of a game, or None without a game_time
+        return GameClock(self.game_time) if self.game_time else None
+
+    def get_parallel_search(self):
+        # Parallel searcher kept as long as this engine, so its worker processes start once; None with one worker
+        if self.workers <= 1:
+            return None
+        if self._parallel_search is None:
+            from .parallel_search import LazySMPSearch, RootParallelSearch
+            searcher = LazySMPSearch if self.parallel_mode == "lazy_smp" else RootParallelSearch
+            self._parallel_search = searcher(self.workers, self.table_mb * 1024 * 1024)
+        return self._parallel_search
+
+    def get_book_entry(self, board, player_ai, opponent_in_game):
+        # (move, score) from the opening book, or None when there is no book or the position is not in it. The
+        # score is None when the book was built with another evaluation, whose scores are on a different scale.
+        book = open_book(self.opening_book, BOARD_SIZE, WIN_COUNT) if self.opening_book else None
+        entry = book.lookup(board, player_ai, opponent_in_game) if book is not None else None
+        if entry is not None and book.evaluation != self.evaluation.name:
+            entry = entry[0], None
+        return entry
+
+    def get_book_move(self, board, player_ai, opponent_in_game):
+        entry = self.get_book_entry(board, player_ai, opponent_in_game)
+        return entry[0] if entry is not None else None
+
+    def choose_move(self, board, player_ai, opponent_in_game, use_alpha_beta=True, tt=None, orderer=None, clock=None,
+                    stats=None):
+        # Fixed max_depth search, or iterative deepening when a time budget (time_per_move or a game clock) is set.
+        # stats, if given, describes the last search run (the deepest iteration). Only searches in this process
+        # are instrumented, so with workers > 1 stats stays empty, with a warning.
+        parallel = self.get_parallel_search()
+        if stats is not None and parallel is not None:
+            warnings.warn(f"search statistics are single-process only; with workers={self.workers} they stay empty",
+                          stacklevel=2)
+        if use_alpha_beta:
+            search = lambda b, p, o, d, dl: self.alpha_beta_search(b, p, o, d, tt, orderer, dl, parallel, stats)
+        else:
+            search = lambda b, p, o, d, dl: self.minimax_decision(b, p, o, d, dl, parallel, stats)
+        time_limit = clock.move_budget() if clock is not None else self.time_per_move
+        if time_limit is None:
+            return search(board, player_ai, opponent_in_game, self.max_depth, None)
+        started = time.monotonic()
+        move = self.iterative_deepening_search(board, player_ai, opponent_in_game, time_limit, search)
+        if clock is not None:
+            clock.charge(time.monotonic() - started)
+        return move
+
+    def close(self):
+        # Stops the parallel workers, if any were started
+        if self._parallel_search is not None:
+            self._parallel_search.shutdown()
+            self._parallel_search = None
@@ -0,0 +1,166 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Engine Process ========
+# An Engine in a long-lived child process, for callers that must stay
+# responsive while it thinks (the Tk GUI): a pure-Python search in a thread
+# holds the GIL and starves the caller's event loop, a search in another
+# process does not. The child keeps its Engine, one transposition table and
+# move orderer per side, the threat-search cache and any parallel workers warm
+# from one move to the next.
+#
+# Requests and responses are dicts sent over a multiprocessing Pipe, one
+# request at a time:
+#   {"op": "search", "board", "player", "opponent", "algorithm", "depth",
+#    "iterative", "expires_at", "stats"}  ->  {"move", "score", "stats", "seconds"}
+#   {"op": "reply", "board", "player", "opponent", "expires_at"}  ->  {"move"}
+#   None  ->  the child exits
+# An "iterative" search runs the whole iterative-deepening loop in the child,
+# root threat search included, so the caller only waits on the pipe.
+# A response may instead carry "timeout" (the deadline passed or the search was
+# stopped) or "error". The caller's Deadline is linked to a shared stop flag
+# while a request runs, so stopping it ends the child's search as well. The
+# caller also raises the flag once its deadline expires: expires_at is only
+# sent with the request, and a Ponderer moves it after a ponder hit. Requests
+# from several threads are sent one at a time, each waiting for the response
+# to the one before, so an abandoned search still unwinding cannot take the
+# response meant for the next.
+import atexit
+import multiprocessing
+import threading
+import time
+
+from .bitboard import BitBoard
+from .board import to_bitboard
+from .engine import Engine
+from .move_ordering import MoveOrderer
+from .parallel_search import STOP_POLL_SECONDS
+from .search_control import SearchTimeout, SharedDeadline
+from .search_stats import SearchStats
+
+
+def _serve(conn, settings, stop):
+    # Child process loop; ends on None or when the parent goes away
+    engine = Engine(**settings)
+    tables, orderers = {}, {}  # Side -> TranspositionTable / MoveOrderer
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            try:
+                response = _handle(engine, tables, orderers, stop, request)
+            except SearchTimeout:
+                response = {"timeout": True}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            conn.send(response)
+    finally:
+        engine.close()
+
+
+def _handle(engine, tables, orderers, stop, request):
+    player, opponent = request["player"], request["opponent"]
+    if player not in tables:
+        tables[player] = engine.new_table()
+    tt = tables[player]
+    deadline = SharedDeadline(stop, request["expires_at"])
+    if request["op"] == "reply":
+        return {"move": engine.predicted_reply(request["board"], player, opponent, tt, deadline)}
+    stats = SearchStats() if request["stats"] else None
+    parallel = engine.get_parallel_search()
+    started = time.monotonic()
+    if request["algorithm"] == "minimax":
+        search = lambda b, p, o, d, dl: engine.minimax_decision(b, p, o, d, dl, parallel, stats)
+    else:
+        orderer = orderers.setdefault(player, MoveOrderer())
+        search = lambda b, p, o, d, dl: engine.alpha_beta_search(b, p, o, d, tt, orderer, dl, parallel, stats)
+    if request["iterative"]:
+        move = engine.iterative_deepening_search(request["board"], player, opponent, None, search,
+                                                 max_depth=request["depth"], deadline=deadline)
+    else:
+        move = search(request["board"], player, opponent, request["depth"], deadline)
+    score = None
+    if request["algorithm"] != "minimax":
+        root = tt.probe(to_bitboard(request["board"], engine.radius).hash)  # Stored by the root, unless forced
+        score = root[3] if root is not None and root[4] == move else None
+    if stats is not None and stats.score is not None:
+        score = stats.score
+    return {"move": move, "score": score, "stats": stats, "seconds": time.monotonic() - started}
+
+
+class EngineProcess:
+    def __init__(self, settings):
+        # settings: Engine keyword arguments, e.g. engine.settings()
+        self.settings = dict(settings)
+        self.stop = multiprocessing.Value("b", 0)
+        self.conn, child_conn = multiprocessing.Pipe()
+        # Not a daemon: the child may start its own pool of search workers
+        self.process = multiprocessing.Process(target=_serve, args=(child_conn, self.settings, self.stop),
+                                               name="gomoku-engine")
+        self.process.start()
+        child_conn.close()
+        self.last_response = None
+        self.lock = threading.Lock()  # Held from sending a request to receiving its response
+        # multiprocessing waits for non-daemon children at exit, so a caller that never calls close() would hang
+        atexit.register(self.close)
+
+    def request(self, request, deadline=None):
+        # Sends one request and waits for its response; deadline, if given, can stop it from another thread
+        # or end it by expiring, even if its expires_at changed after the request was sent
+        with self.lock:
+            self.stop.value = 0
+            if deadline is not None:
+                deadline.link(self.stop)
+            try:
+                self.conn.send(request)
+                while deadline is not None and not self.conn.poll(STOP_POLL_SECONDS):
+                    if deadline.expired():
+                        self.stop.value = 1
+                response = self.conn.recv()
+            finally:
+                if deadline is not None:
+                    deadline.unlink(self.stop)
+        if "timeout" in response:
+            raise SearchTimeout()
+        if "error" in response:
+            raise RuntimeError(f"Engine process: {response['error']}")
+        return response
+
+    def search(self, board, player_ai, opponent_in_game, depth, algorithm="alphabeta", deadline=None, stats=None,
+               iterative=False):
+        # Best move, like Engine.alpha_beta_search / minimax_decision, or with iterative like
+        # Engine.iterative_deepening_search up to depth (None: the engine's iterative_max_depth) until the
+        # deadline; stats, if given, is filled in from the child's SearchStats, and the whole response is kept
+        # in last_response
+        cells = board.to_list() if isinstance(board, BitBoard) else board
+        response = self.request({"op": "search", "board": cells, "player": player_ai, "opponent": opponent_in_game,
+                                 "algorithm": algorithm, "depth": depth, "iterative": iterative,
+                                 "expires_at": deadline.expires_at if deadline is not None else None,
+                                 "stats": stats is not None}, deadline)
+        if stats is not None and response["stats"] is not None:
+            vars(stats).update(vars(response["stats"]))
+        self.last_response = response
+        return response["move"]
+
+    def predicted_reply(self, board, player_ai, opponent_in_game, deadline=None):
+        # Engine.predicted_reply against the child's table for player_ai; stopping deadline ends it
+        cells = board.to_list() if isinstance(board, BitBoard) else board
+        return self.request({"op": "reply", "board": cells, "player": player_ai, "opponent": opponent_in_game,
+                             "expires_at": deadline.expires_at if deadline is not None else None}, deadline)["move"]
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.conn.closed:
+            return
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.conn.close()
@@ -0,0 +1,311 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Heuristic Evaluations ========
+# The two position scorers the engine can search with:
+#   "classic"  counts open and semi-open runs with string patterns
+#              (SCORE_WIN 100000, the opponent's patterns weigh the same)
+#   "pattern"  scores every WIN_COUNT window through a lookup table and
+#              weighs the opponent's patterns by OPPONENT_SCORE_WEIGHT
+#              (SCORE_WIN 1000000); it can also score whole boards and the
+#              leaves of a depth-1 node with NumPy.
+# Both score a line as a pair (player_score, opponent_score) of integers so
+# IncrementalEvaluator can keep exact running totals. Wins and draws are the
+# engine's business; these only score positions that are still open.
+#
+# get_evaluation(name) returns one shared instance per process, so the line
+# caches are shared by every Engine using it.
+import itertools
+from functools import lru_cache
+
+from .bitboard import BitBoard
+from .board import AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, board_lines
+from .evaluator import IncrementalEvaluator
+
+LINE_CACHE_SIZE = 1 << 16  # Distinct (player, opponent) line contents remembered per evaluation
+
+
+class Evaluation:
+    name = None
+    SCORE_WIN = 0
+    opponent_weight = 1
+
+    def __init__(self):
+        self.line_scores = lru_cache(maxsize=LINE_CACHE_SIZE)(self.score_line)
+
+    def score_line(self, player_mask, opponent_mask, length):
+        # (player_score, opponent_score) of one line given as bit masks
+        raise NotImplementedError
+
+    def evaluate_line(self, line, player_ai, opponent_in_game):
+        player_score, opponent_score = self.line_scores(*line_masks(line, player_ai), len(line))
+        return player_score - opponent_score * self.opponent_weight
+
+    def create_evaluator(self, board, player_ai, opponent_in_game):
+        return IncrementalEvaluator(board, player_ai, opponent_in_game, self.line_scores, self.opponent_weight)
+
+    def score(self, board, player_ai, opponent_in_game, evaluator=None, backend="python"):
+        # Heuristic score of a position nobody has won yet, from player_ai's point of view
+        if evaluator is not None:
+            return evaluator.score()
+        if isinstance(board, BitBoard):
+            # Straight from the line masks, totalled as IncrementalEvaluator does so the two agree exactly
+            player_total = opponent_total = 0
+            for player_mask, opponent_mask, length in board.lines(player_ai, opponent_in_game):
+                if length >= board.win_count:
+                    player_score, opponent_score = self.line_scores(player_mask, opponent_mask, length)
+                    player_total += player_score
+                    opponent_total += opponent_score
+            return player_total - opponent_total * self.opponent_weight
+        return sum(self.evaluate_line(line, player_ai, opponent_in_game)
+                   for line in board_lines(board) if len(line) >= WIN_COUNT)
+
+    def can_batch(self):
+        # Whether batched_leaf_values is available
+        return False
+
+
+def line_masks(line, player):
+    # Bit i set where line[i] holds the player's stone, or any other stone for the opponent mask
+    player_mask = opponent_mask = 0
+    for i, cell in enumerate(line):
+        if cell == player:
+            player_mask |= 1 << i
+        elif cell != EMPTY:
+            opponent_mask |= 1 << i
+    return player_mask, opponent_mask
+
+
+# ======== Classic: String Patterns ========
+class ClassicEvaluation(Evaluation):
+    name = "classic"
+    SCORE_WIN = 100000
+    SCORE_OPEN_FOUR = 10000
+    SCORE_SEMI_FOUR = 1000
+    SCORE_OPEN_THREE = 500
+    SCORE_SEMI_THREE = 100
+    SCORE_OPEN_TWO = 50
+    SCORE_SEMI_TWO = 10
+    SCORE_OPEN_ONE = 1  # Slight preference for own pieces
+
+    def count_patterns_in_line(self, line_segment, player, opponent):
+        line_str = "".join(line_segment)
+        # Open Fours: .XXXX.   Semi-Open Fours: OXXXX. or .XXXXO (opponent blocking one side)
+        line_score = line_str.count(EMPTY + player * 4 + EMPTY) * self.SCORE_OPEN_FOUR
+        line_score += (line_str.count(opponent + player * 4 + EMPTY) +
+                       line_str.count(EMPTY + player * 4 + opponent)) * self.SCORE_SEMI_FOUR
+        # Open Threes: .XXX.   Semi-Open Threes: OXXX. or .XXXO
+        line_score += line_str.count(EMPTY + player * 3 + EMPTY) * self.SCORE_OPEN_THREE
+        line_score += (line_str.count(opponent + player * 3 + EMPTY) +
+                       line_str.count(EMPTY + player * 3 + opponent)) * self.SCORE_SEMI_THREE
+        # Open Twos: .XX.   Semi-Open Twos: OXX. or .XXO
+        line_score += line_str.count(EMPTY + player * 2 + EMPTY) * self.SCORE_OPEN_TWO
+        line_score += (line_str.count(opponent + player * 2 + EMPTY) +
+                       line_str.count(EMPTY + player * 2 + opponent)) * self.SCORE_SEMI_TWO
+        # Single pieces in open space (less important, but can break ties)
+        line_score += line_str.count(EMPTY + player + EMPTY) * self.SCORE_OPEN_ONE
+        return line_score
+
+    def score_line(self, player_mask, opponent_mask, length):
+        line = [HUMAN if player_mask >> i & 1 else AI_MINIMAX if opponent_mask >> i & 1 else EMPTY
+                for i in range(length)]
+        return (self.count_patterns_in_line(line, HUMAN, AI_MINIMAX),
+                self.count_patterns_in_line(line, AI_MINIMAX, HUMAN))
+
+
+# ======== Pattern: Window Lookup Table ========
+# The score of a window depends only on its WIN_COUNT cells and the cell just outside each end (or
+# the board edge). With each cell coded in two bits (empty, own, opponent, edge) a window and its
+# boundaries form a small integer, and the pattern table maps every such code to the window's score
+# for both sides. The table is built by window_pattern_score on first use, not at import. Scoring a
+# line is then one shift, mask and lookup per window.
+CELL_EMPTY, CELL_OWN, CELL_OPPONENT, CELL_EDGE = range(4)
+WINDOW_BITS = 2 * (WIN_COUNT + 2)
+WINDOW_MASK = (1 << WINDOW_BITS) - 1
+SPREAD_BYTE = [sum(1 << (2 * i) for i in range(8) if m >> i & 1) for m in range(256)]  # bit i -> bit 2i
+
+
+def spread_bits(mask):
+    # Moves bit i of mask to bit 2i
+    spread = 0
+    shift = 0
+    while mask:
+        spread |= SPREAD_BYTE[mask & 255] << shift
+        mask >>= 8
+        shift += 16
+    return spread
+
+
+def encode_line(player_mask, opponent_mask, length):
+    # Two bits per cell, cell i at digit i + 1, with an edge marker at digits 0 and length + 1
+    cells = spread_bits(player_mask) | spread_bits(opponent_mask) << 1
+    return CELL_EDGE | cells << 2 | CELL_EDGE << (2 * (length + 1))
+
+
+def has_five(mask):
+    run = mask
+    for i in range(1, WIN_COUNT):
+        run &= mask >> i
+    return run != 0
+
+
+class PatternEvaluation(Evaluation):
+    name = "pattern"
+    SCORE_WIN = 1000000
+    SCORE_OPEN_FOUR = 100000
+    SCORE_SEMI_FOUR = 10000
+    SCORE_OPEN_THREE = 1000
+    SCORE_SEMI_THREE = 100
+    SCORE_OPEN_TWO = 50
+    SCORE_SEMI_TWO = 10
+    SCORE_OPEN_ONE = 1
+    opponent_weight = 1.2  # OPPONENT_SCORE_WEIGHT
+
+    def __init__(self):
+        super().__init__()
+        self._table = None
+        self._window_scorer = None
+        self._batching = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = self.build_pattern_table()
+        return self._table
+
+    def window_pattern_score(self, segment, left_boundary, right_boundary, current_player, current_opponent):
+        # Score of one window for current_player; a boundary is None at the board edge, which counts
+        # as both open and blocked
+        empty_char = EMPTY
+        segment_str = "".join(segment)
+        player_count = segment_str.count(current_player)
+        opponent_count = segment_str.count(current_opponent)
+        empty_count = segment_str.count(empty_char)
+
+        if opponent_count > 0 or player_count + empty_count != WIN_COUNT:
+            return 0
+
+        is_open_left = left_boundary is None or left_boundary == EMPTY
+        is_open_right = right_boundary is None or right_boundary == EMPTY
+        is_blocked_left = left_boundary is None or left_boundary == current_opponent
+        is_blocked_right = right_boundary is None or right_boundary == current_opponent
+
+        if player_count == 5:
+            return self.SCORE_WIN
+        elif player_count == 4:
+            if is_open_left and is_open_right:
+                return self.SCORE_OPEN_FOUR
+            elif (is_open_left and is_blocked_right) or (is_blocked_left and is_open_right):
+                return self.SCORE_SEMI_FOUR
+        elif player_count == 3 and empty_count == 2:
+            if current_player * 3 in segment_str:
+                if is_open_left and is_open_right:
+                    return self.SCORE_OPEN_THREE
+                elif (is_open_left and is_blocked_right) or (is_blocked_left and is_open_right):
+                    return self.SCORE_SEMI_THREE
+            elif (current_player*2 + empty_char + current_player in segment_str or
+                  current_player + empty_char + current_player*2 in segment_str):
+                if is_open_left or is_open_right:
+                    return self.SCORE_SEMI_THREE // 2
+        elif player_count == 2 and empty_count == 3:
+            if current_player * 2 in segment_str:
+                if right_boundary is not None:
+                    longer_str = segment_str + right_boundary
+                    if empty_char + current_player*2 + empty_char in longer_str:
+                        return self.SCORE_OPEN_TWO
+                    elif (current_opponent + current_player*2 + empty_char in longer_str or
+                          empty_char + current_player*2 + current_opponent in longer_str or
+                          (current_player*2 + empty_char in segment_str and left_boundary in (None, current_opponent)) or
+                          (empty_char + current_player*2 in segment_str and right_boundary == current_opponent)):
+                        return self.SCORE_SEMI_TWO
+                elif left_boundary is None and current_player*2 + empty_char in segment_str and is_open_right:
+                    return self.SCORE_SEMI_TWO
+                elif empty_char + current_player*2 in segment_str and is_open_left:
+                    return self.SCORE_SEMI_TWO
+                elif current_player * 2 in segment_str and is_open_left and is_open_right and empty_count >= 2:
+                    return self.SCORE_SEMI_TWO
+        elif player_count == 1 and empty_count == 4:
+            if is_open_left and is_open_right:
+                return self.SCORE_OPEN_ONE
+        return 0
+
+    def build_pattern_table(self):
+        # table[code] = (score for the CELL_OWN side, score for the CELL_OPPONENT side).
+        # Codes with an edge inside the window cannot occur and are left at zero.
+        symbols = {CELL_EMPTY: EMPTY, CELL_OWN: HUMAN, CELL_OPPONENT: AI_MINIMAX, CELL_EDGE: None}
+        table = [(0, 0)] * (1 << WINDOW_BITS)
+        for left in range(4):
+            for right in range(4):
+                for cells in itertools.product((CELL_EMPTY, CELL_OWN, CELL_OPPONENT), repeat=WIN_COUNT):
+                    code = left | right << (2 * (WIN_COUNT + 1))
+                    for i, cell in enumerate(cells):
+                        code |= cell << (2 * (i + 1))
+                    segment = [symbols[cell] for cell in cells]
+                    table[code] = (
+                        self.window_pattern_score(segment, symbols[left], symbols[right], HUMAN, AI_MINIMAX),
+                        self.window_pattern_score(segment, symbols[left], symbols[right], AI_MINIMAX, HUMAN))
+        return table
+
+    def line_pattern_scores(self, code, length):
+        # (own, opponent) sums of the pattern table over every window of an encoded line
+        player_score = opponent_score = 0
+        table = self.table
+        for start in range(length - WIN_COUNT + 1):
+            window_score = table[code >> (2 * start) & WINDOW_MASK]
+            player_score += window_score[0]
+            opponent_score += window_score[1]
+        return player_score, opponent_score
+
+    def score_line(self, player_mask, opponent_mask, length):
+        return self.line_pattern_scores(encode_line(player_mask, opponent_mask, length), length)
+
+    def evaluate_line(self, line, player_ai, opponent_in_game):
+        player_mask, opponent_mask = line_masks(line, player_ai)
+        if has_five(player_mask):
+            return self.SCORE_WIN
+        if has_five(opponent_mask):
+            return -self.SCORE_WIN
+        return super().evaluate_line(line, player_ai, opponent_in_game)
+
+    # ======== NumPy Backend ========
+    def get_window_scorer(self):
+        # NumPy scorer over the pattern table, built on first use
+        from . import numpy_eval
+        if self._window_scorer is None:
+            self._window_scorer = numpy_eval.WindowScorer(self.table, BOARD_SIZE, WIN_COUNT, self.opponent_weight)
+        return self._window_scorer
+
+    def score(self, board, player_ai, opponent_in_game, evaluator=None, backend="python"):
+        if evaluator is None and backend == "numpy":
+            from . import numpy_eval
+            return float(self.get_window_scorer().score(numpy_eval.board_array(board, player_ai, opponent_in_game,
+                                                                                EMPTY)))
+        return super().score(board, player_ai, opponent_in_game, evaluator)
+
+    def can_batch(self):
+        # NumPy is imported the first time a search asks, not when the engine is imported
+        if self._batching is None:
+            from . import numpy_eval
+            self._batching = numpy_eval.AVAILABLE
+        return self._batching
+
+    def batched_leaf_values(self, board, moves, mover, evaluator):
+        # What the engine's evaluate_board would return after each of mover's moves, computed for all of
+        # them at once from the evaluator's running totals and the change of the windows around each move
+        from . import numpy_eval
+        own_stone = mover == evaluator.player
+        cells = numpy_eval.board_array(board, evaluator.player, evaluator.opponent, EMPTY)
+        deltas, wins = self.get_window_scorer().move_deltas(
+            cells, moves, numpy_eval.CELL_OWN if own_stone else numpy_eval.CELL_OPPONENT)
+        values = ((evaluator.player_total + deltas[:, 0]) -
+                  (evaluator.opponent_total + deltas[:, 1]) * self.opponent_weight)
+        win_value = self.SCORE_WIN if own_stone else -self.SCORE_WIN
+        return [win_value if win else value for win, value in zip(wins.tolist(), values.tolist())]
+
+
+EVALUATIONS = {"classic": ClassicEvaluation, "pattern": PatternEvaluation}
+
+
+@lru_cache(maxsize=None)
+def get_evaluation(name):
+    if name not in EVALUATIONS:
+        raise ValueError(f"Unknown evaluation: {name} (expected one of {', '.join(EVALUATIONS)})")
+    return EVALUATIONS[name]()
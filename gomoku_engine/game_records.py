@@ -0,0 +1,438 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Game Records ========
+# Every finished (or abandoned) game appended to one compact file, and an index
+# over every position of every game, so "which games reached this position"
+# and "what was played from here, and how did it go" are a binary search.
+#
+# The record file is a header followed by one record per game:
+#   length, board size, result, first and second player's symbols, number of
+#   starting stones of each (a custom board) -- 10 bytes -- then the starting
+#   stones and the moves, one cell code per stone, first player moving first.
+# Cell codes number the cells outward from the centre, so every cell of a
+# 15x15 board and the 255 central cells of a 19x19 board take one byte; the
+# rest take two (255, then the remainder). Records are only ever appended, in
+# one write each; a crash can leave a partial last record, which readers skip
+# and the next writer cuts off before appending.
+#
+# The index file (records path + ".idx") holds the offset of every game and
+# one fixed-size entry per position, sorted by key like the opening book:
+# key, game, ply, the move played from there and the result for the side to
+# move. Keys hash stones by role (side to move or waiting), so positions match
+# whatever the symbols were. Games appended after the index was built are
+# indexed in memory each time the file is opened (with a warning once there
+# are more than STALE_GAMES of them). Updating the index reads only those
+# games and merges their entries into the sorted ones already on disk:
+#
+#   python -m gomoku_engine.game_records games.gmkr [--rebuild]   (updates or builds games.gmkr.idx)
+#
+#   records = GameRecords("games.gmkr")
+#   records.games_reaching(board, HUMAN, AI_MINIMAX)     [(game, ply), ...] with HUMAN to move
+#   records.move_stats(board, HUMAN, AI_MINIMAX)         moves played from there, with wins/draws/losses
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import warnings
+from array import array
+from functools import lru_cache
+
+from .bitboard import BitBoard, zobrist_keys
+from .board import EMPTY, WIN_COUNT
+from .opening_book import position_stones
+
+MAGIC = b"GMKR"
+INDEX_MAGIC = b"GMKI"
+VERSION = 1
+HEADER = struct.Struct("<4sB3x")  # magic, version
+GAME = struct.Struct("<HBBccHH")  # code bytes, board size, result, first, second, starting stones of each
+INDEX_HEADER = struct.Struct("<4sB3xQIQ")  # magic, version, record bytes indexed, games, entries
+OFFSET = struct.Struct("<Q")
+ENTRY = struct.Struct("<QIHHB")  # key, game, ply, next move's cell (NO_MOVE at the end), outcome for the mover
+KEY = struct.Struct("<Q")
+
+UNFINISHED, FIRST_WON, SECOND_WON, DRAW = 0, 1, 2, 3  # Game results
+UNKNOWN, WIN, LOSS = 0, 1, 2  # Outcomes for the side to move (DRAW as above)
+NO_MOVE = 0xFFFF
+ESCAPE = 255  # Cell codes from 255 take a second byte
+SIZES = (15, 19)
+INDEX_CHUNK = 250_000  # Entries sorted in memory at a time while building an index
+STALE_GAMES = 1000  # Games after the index that GameRecords replays on open before warning
+
+
+@lru_cache(maxsize=None)
+def cell_codes(size):
+    # (code of each cell index, cell index of each code): cells by distance from the centre
+    centre = size // 2
+    cells = sorted(range(size * size),
+                   key=lambda i: (max(abs(i // size - centre), abs(i % size - centre)), i))
+    codes = [0] * (size * size)
+    for code, cell in enumerate(cells):
+        codes[cell] = code
+    return codes, cells
+
+
+def encode_cells(cells, size):
+    codes = cell_codes(size)[0]
+    data = bytearray()
+    for cell in cells:
+        code = codes[cell]
+        data.extend((code,) if code < ESCAPE else (ESCAPE, code - ESCAPE))
+    return data
+
+
+def decode_cells(data, size):
+    cells, i = cell_codes(size)[1], 0
+    decoded = []
+    while i < len(data):
+        code = data[i]
+        if code == ESCAPE:
+            i += 1
+            code += data[i]
+        decoded.append(cells[code])
+        i += 1
+    return decoded
+
+
+def outcome(result, first_to_move):
+    # The game's result for the side to move
+    if result == UNFINISHED:
+        return UNKNOWN
+    if result == DRAW:
+        return DRAW
+    return WIN if (result == FIRST_WON) == first_to_move else LOSS
+
+
+def position_key(size, mine, theirs):
+    # Key of the position with the side to move owning the cell indexes mine
+    mover_keys, waiting_keys = zobrist_keys("record-mover", size), zobrist_keys("record-waiting", size)
+    key = 0
+    for cell in mine:
+        key ^= mover_keys[cell]
+    for cell in theirs:
+        key ^= waiting_keys[cell]
+    return key
+
+
+# ======== Writing ========
+class GameRecordWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+            self.file.flush()
+        else:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                magic, version = HEADER.unpack_from(data, 0)
+                if magic != MAGIC or version != VERSION:
+                    self.file.close()
+                    raise ValueError(f"{path} is not a game-record file")
+                # Readers stop at a partial record, so games appended after one would never be read
+                offset = HEADER.size
+                while True:
+                    read = read_game(data, offset)
+                    if read is None:
+                        break
+                    offset = read[1]
+            finally:
+                data.close()
+            if offset < self.file.tell():
+                self.file.truncate(offset)
+        self.open_games = set()  # GameRecorders not finished yet, recorded as unfinished by close()
+
+    def new_game(self, board, first, second):
+        # GameRecorder for a game starting from board with first to move, or None when the board cannot be
+        # recorded (another size, or stones of a third player)
+        if len(board) not in SIZES or any(cell not in (EMPTY, first, second) for row in board for cell in row):
+            return None
+        game = GameRecorder(self, board, first, second)
+        self.open_games.add(game)
+        return game
+
+    def append(self, size, result, first, second, setup, moves):
+        # setup: (first player's, second player's) starting cell indexes; moves: cell indexes in order
+        cells = encode_cells(list(setup[0]) + list(setup[1]) + list(moves), size)
+        self.file.write(GAME.pack(len(cells), size, result, first.encode(), second.encode(), len(setup[0]),
+                                  len(setup[1])) + cells)
+        self.file.flush()
+
+    def close(self):
+        for game in list(self.open_games):
+            game.close()
+        self.file.close()
+
+
+class GameRecorder:
+    # One game as it is played: move() after every stone, close() if it ends without a win or a full board
+    def __init__(self, writer, board, first, second):
+        self.writer = writer
+        self.size = len(board)
+        self.first = first
+        self.second = second
+        stones = position_stones(board, first, second)
+        self.setup = tuple([r * self.size + c for r, c in side] for side in stones)
+        self.board = BitBoard.from_list(board, WIN_COUNT, EMPTY, 0)  # Any size; no candidate moves needed
+        self.moves = []
+        self.mover = first
+        self.result = None
+
+    def move(self, r, c):
+        if self.result is not None:
+            return
+        self.board.make(r, c, self.mover)
+        self.moves.append(r * self.size + c)
+        if self.board.is_win_at(r, c):
+            self.finish(FIRST_WON if self.mover == self.first else SECOND_WON)
+        elif self.board.is_full():
+            self.finish(DRAW)
+        self.mover = self.second if self.mover == self.first else self.first
+
+    def finish(self, result):
+        self.result = result
+        self.writer.open_games.discard(self)
+        self.writer.append(self.size, result, self.first, self.second, self.setup, self.moves)
+
+    def close(self):
+        if self.result is None:
+            self.finish(UNFINISHED)
+
+
+# ======== Reading ========
+def read_game(data, offset):
+    # (game dict, offset of the next record), or None at the end or at a partial record
+    if offset + GAME.size > len(data):
+        return None
+    length, size, result, first, second, first_setup, second_setup = GAME.unpack_from(data, offset)
+    end = offset + GAME.size + length
+    if end > len(data) or size not in SIZES:
+        return None
+    cells = decode_cells(data[offset + GAME.size:end], size)
+    setup = first_setup + second_setup
+    return {"size": size, "result": result, "first": first.decode(), "second": second.decode(),
+            "setup": (cells[:first_setup], cells[first_setup:setup]), "moves": cells[setup:]}, end
+
+
+def game_entries(game, number):
+    # ENTRY tuples for every position of game, from its starting board to its last move
+    size, moves, result = game["size"], game["moves"], game["result"]
+    mover_keys, waiting_keys = zobrist_keys("record-mover", size), zobrist_keys("record-waiting", size)
+    first_stones, second_stones = game["setup"]
+    as_first = position_key(size, first_stones, second_stones)  # Key with the first player to move
+    as_second = position_key(size, second_stones, first_stones)
+    for ply in range(len(moves) + 1):
+        first_to_move = ply % 2 == 0
+        cell = moves[ply] if ply < len(moves) else NO_MOVE
+        yield as_first if first_to_move else as_second, number, ply, cell, outcome(result, first_to_move)
+        if cell != NO_MOVE:
+            own, other = (mover_keys, waiting_keys) if first_to_move else (waiting_keys, mover_keys)
+            as_first ^= own[cell]
+            as_second ^= other[cell]
+
+
+def open_index(path, record_bytes):
+    # (mapped index, record bytes it covers, games, entries) for the index at path, or None if there is none
+    # or it is not one for a record file of record_bytes
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, covered, games, entries = INDEX_HEADER.unpack_from(index, 0)
+    if magic != INDEX_MAGIC or version != VERSION or covered > record_bytes:
+        index.close()
+        return None
+    return index, covered, games, entries
+
+
+def build_index(path, chunk=INDEX_CHUNK, rebuild=False):
+    # Writes path + ".idx" for every complete game in path; returns (games, entries). An existing index is
+    # extended unless rebuild is set: only the games after it are read, and their entries are merged with
+    # its sorted ones. Entries are sorted in chunks and merged from temporary files, so memory stays bounded
+    # however many games there are.
+    offsets, runs, entries, count = array("Q"), [], [], 0
+    directory = os.path.dirname(os.path.abspath(path))
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a game-record file")
+        offset, indexed = HEADER.size, 0
+        existing = None if rebuild else open_index(path + ".idx", len(data))
+        if existing is not None:
+            index, offset, games, indexed = existing
+            offsets.frombytes(index[INDEX_HEADER.size:INDEX_HEADER.size + games * OFFSET.size])
+            index.close()
+        while True:
+            read = read_game(data, offset)
+            if read is None:
+                break
+            game, next_offset = read
+            entries.extend(game_entries(game, len(offsets)))
+            offsets.append(offset)
+            offset = next_offset
+            if len(entries) >= chunk:
+                runs.append(_write_run(sorted(entries), directory))
+                count += len(entries)
+                entries = []
+        covered = offset
+    finally:
+        data.close()
+    if existing is not None and not runs and not entries:
+        return len(offsets), indexed  # Nothing appended since the index was built
+    count += indexed + len(entries)
+    entries.sort()
+    run_files = [open(run, "rb") for run in runs]
+    if indexed:  # The existing index's entries, already sorted, are one more run
+        run_files.append(open(path + ".idx", "rb"))
+        run_files[-1].seek(INDEX_HEADER.size + games * OFFSET.size)
+    temporary = path + ".idx.tmp"
+    try:
+        with open(temporary, "wb") as out:
+            out.write(INDEX_HEADER.pack(INDEX_MAGIC, VERSION, covered, len(offsets), count))
+            out.write(offsets.tobytes())
+            if run_files:
+                for entry in heapq.merge(*[_read_run(run) for run in run_files], iter(entries)):
+                    out.write(ENTRY.pack(*entry))
+            else:
+                out.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+    finally:
+        for run in run_files:
+            run.close()
+        for run in runs:
+            os.remove(run)
+    os.replace(temporary, path + ".idx")
+    return len(offsets), count
+
+
+def _write_run(entries, directory):
+    with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".run", delete=False) as f:
+        f.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+    return f.name
+
+
+def _read_run(f):
+    while True:
+        block = f.read(ENTRY.size * 65536)
+        if not block:
+            return
+        yield from ENTRY.iter_unpack(block)
+
+
+class GameRecords:
+    # Read-only view of a record file and its index, both memory-mapped
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a game-record file")
+        self.index = None
+        self.indexed_games = 0
+        self.entries = 0
+        offset = HEADER.size
+        existing = open_index(path + ".idx", len(self.data))
+        if existing is not None:
+            self.index, offset, self.indexed_games, self.entries = existing
+            self.entries_at = INDEX_HEADER.size + self.indexed_games * OFFSET.size
+        self.offsets = []  # Offsets of the games after the index
+        self.recent = {}  # Key -> ENTRY tuples of those games
+        while True:
+            read = read_game(self.data, offset)
+            if read is None:
+                break
+            for entry in game_entries(read[0], self.indexed_games + len(self.offsets)):
+                self.recent.setdefault(entry[0], []).append(entry)
+            self.offsets.append(offset)
+            offset = read[1]
+        if len(self.offsets) > STALE_GAMES:
+            warnings.warn(f"{len(self.offsets)} games in {path} are not in its index and were indexed in memory; "
+                          f"update it with: python -m gomoku_engine.game_records {path}", stacklevel=2)
+
+    def __len__(self):
+        return self.indexed_games + len(self.offsets)
+
+    def game(self, number):
+        # {"size", "result", "first", "second", "setup", "moves"} of game number, cells as (row, column)
+        if number < self.indexed_games:
+            offset = OFFSET.unpack_from(self.index, INDEX_HEADER.size + number * OFFSET.size)[0]
+        else:
+            offset = self.offsets[number - self.indexed_games]
+        game = read_game(self.data, offset)[0]
+        size = game["size"]
+        to_move = lambda cells: [divmod(cell, size) for cell in cells]
+        game["setup"] = tuple(to_move(cells) for cells in game["setup"])
+        game["moves"] = to_move(game["moves"])
+        return game
+
+    def _entries(self, key):
+        # ENTRY tuples with key, from the index and the games after it
+        found = []
+        if self.index is not None:
+            index, base, size = self.index, self.entries_at, ENTRY.size
+            lo, hi = 0, self.entries
+            while lo < hi:  # First entry with key or above
+                mid = (lo + hi) // 2
+                if KEY.unpack_from(index, base + mid * size)[0] < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            end, hi = lo, self.entries
+            while end < hi:  # First entry above key
+                mid = (end + hi) // 2
+                if KEY.unpack_from(index, base + mid * size)[0] <= key:
+                    end = mid + 1
+                else:
+                    hi = mid
+            found = list(ENTRY.iter_unpack(index[base + lo * size:base + end * size]))
+        return found + self.recent.get(key, [])
+
+    def _key(self, board, player, opponent):
+        size = len(board)
+        mine, theirs = position_stones(board, player, opponent)
+        return position_key(size, [r * size + c for r, c in mine], [r * size + c for r, c in theirs])
+
+    def games_reaching(self, board, player, opponent):
+        # (game, ply) for every time a game reached board with player to move; ply counts the moves played
+        # from the game's starting board
+        return [(entry[1], entry[2]) for entry in self._entries(self._key(board, player, opponent))]
+
+    def move_stats(self, board, player, opponent):
+        # Moves played from board by player, most played first: {"move", "games", "wins", "draws", "losses",
+        # "unfinished"}, results for player
+        size, stats = len(board), {}
+        for _, _, _, cell, result in self._entries(self._key(board, player, opponent)):
+            if cell == NO_MOVE:
+                continue
+            if cell not in stats:
+                stats[cell] = {"move": divmod(cell, size), "games": 0, "wins": 0, "draws": 0, "losses": 0,
+                               "unfinished": 0}
+            counts = stats[cell]
+            counts["games"] += 1
+            counts[{WIN: "wins", DRAW: "draws", LOSS: "losses", UNKNOWN: "unfinished"}[result]] += 1
+        return sorted(stats.values(), key=lambda counts: (-counts["games"], counts["move"]))
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+        self.data.close()
+
+
+def main(argv):
+    rebuild = "--rebuild" in argv
+    argv = [arg for arg in argv if arg != "--rebuild"]
+    if len(argv) != 1:
+        print("usage: python -m gomoku_engine.game_records RECORDS_FILE [--rebuild]")
+        return 2
+    games, entries = build_index(argv[0], rebuild=rebuild)
+    print(f"Indexed {games} games, {entries} positions in {argv[0]}.idx")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
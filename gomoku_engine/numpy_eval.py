@@ -0,0 +1,129 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== NumPy Evaluation Backend ========
+# Scores a whole board with array operations instead of Python loops over its
+# lines. The board is an int8 array (0 empty, 1 own stone, 2 opponent stone)
+# padded with a border of 3s standing for the board edge. For each of the four
+# directions, the code of every window (WIN_COUNT cells plus the cell just
+# outside each end, two bits per cell) is built from seven shifted views of
+# that array, and the codes index the engine's pattern table, so the result is
+# the same sum of SCORE_* values as the line-by-line evaluator.
+#
+# NumPy is optional: AVAILABLE is False when it is not installed, and callers
+# fall back to the pure-Python evaluator.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+
+CELL_EMPTY, CELL_OWN, CELL_OPPONENT, CELL_EDGE = range(4)
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def board_array(board, player, opponent, empty):
+    # int8 array of a list-of-lists board or a BitBoard from player's point of view
+    # (stone symbols are single characters, so the board is read as one byte string)
+    if hasattr(board, "cells"):
+        size, text = board.size, "".join(board.cells)
+    else:
+        size, text = len(board), "".join("".join(row) for row in board)
+    cells = np.frombuffer(text.encode(), dtype=np.uint8).reshape(size, size)
+    array = np.where(cells == ord(player), CELL_OWN, CELL_OPPONENT).astype(np.int8)
+    array[cells == ord(empty)] = CELL_EMPTY
+    return array
+
+
+class WindowScorer:
+    def __init__(self, pattern_table, size, win_count, opponent_weight=1):
+        # pattern_table[code] = (own score, opponent score) for a window code laid out as
+        # boundary, WIN_COUNT cells, boundary, two bits each from the least significant end
+        if np is None:
+            raise ImportError("the NumPy evaluation backend needs numpy")
+        self.table = np.array(pattern_table, dtype=np.int64)
+        self.size = size
+        self.win_count = win_count
+        self.opponent_weight = opponent_weight
+        # For each direction, the padded-array slices holding cell k (k = -1 .. win_count) of
+        # every window that fits on the board, so views[k] lines up cell k of all windows
+        self.views = []
+        reach = win_count - 1
+        for dr, dc in DIRECTIONS:
+            rows = (0, size - reach * dr)
+            cols = (reach, size) if dc < 0 else (0, size - reach * dc)
+            slices = []
+            for k in range(-1, win_count + 1):
+                slices.append((slice(1 + rows[0] + dr * k, 1 + rows[1] + dr * k),
+                               slice(1 + cols[0] + dc * k, 1 + cols[1] + dc * k)))
+            self.views.append(slices)
+        self.touching = None
+
+    def _build_touching(self):
+        # For every cell, the windows (up to 7 per direction) that have it among their cells or
+        # boundaries, as flat indices into the padded board. Missing windows are padded with an
+        # all-edge window, whose table entry is zero and which the move never changes.
+        size, win_count = self.size, self.win_count
+        padded_size = size + 2
+        span = win_count + 2
+        per_cell = 4 * span
+        indices = np.zeros((size * size, per_cell, span), dtype=np.intp)
+        placed = np.zeros((size * size, per_cell), dtype=np.int32)  # 4^position of the cell, 0 if padding
+        inside = np.zeros((size * size, per_cell), dtype=bool)  # cell is one of the window's own cells
+        for r in range(size):
+            for c in range(size):
+                w = 0
+                for dr, dc in DIRECTIONS:
+                    for position in range(span):
+                        # Window whose cell k = position - 1 is (r, c); k runs from -1 to win_count
+                        start_r, start_c = r - dr * (position - 1), c - dc * (position - 1)
+                        end_r, end_c = start_r + dr * (win_count - 1), start_c + dc * (win_count - 1)
+                        if not (0 <= start_r < size and 0 <= start_c < size and 0 <= end_r < size and 0 <= end_c < size):
+                            continue
+                        for k in range(span):
+                            rr, cc = start_r + dr * (k - 1), start_c + dc * (k - 1)
+                            indices[r * size + c, w, k] = (rr + 1) * padded_size + cc + 1
+                        placed[r * size + c, w] = 1 << (2 * position)
+                        inside[r * size + c, w] = 0 < position <= win_count
+                        w += 1
+        self.touching = (indices, placed, inside)
+        self.code_shifts = 2 * np.arange(span, dtype=np.int32)
+        self.five_codes = {stone: sum(stone << (2 * k) for k in range(1, win_count + 1))
+                           for stone in (CELL_OWN, CELL_OPPONENT)}
+        self.interior_mask = ((1 << (2 * win_count)) - 1) << 2
+
+    def move_deltas(self, cells, moves, stone):
+        # For each (r, c) in moves, the change of the (own, opponent) totals when stone is placed
+        # on the size x size array cells, and whether it completes win_count in a row. Only the
+        # windows touching the move are rescored, for all moves at once.
+        if self.touching is None:
+            self._build_touching()
+        indices, placed, inside = self.touching
+        flat = self.pad(cells).astype(np.int32).ravel()
+        cell_index = np.array([r * self.size + c for r, c in moves], dtype=np.intp)
+        before = (flat[indices[cell_index]] << self.code_shifts).sum(axis=-1)
+        after = before + placed[cell_index] * stone
+        deltas = (self.table[after] - self.table[before]).sum(axis=1)
+        wins = (((after & self.interior_mask) == self.five_codes[stone]) & inside[cell_index]).any(axis=1)
+        return deltas, wins
+
+    def pad(self, cells):
+        # Surrounds the board (or each board of a stack) with edge cells
+        width = [(0, 0)] * (cells.ndim - 2) + [(1, 1), (1, 1)]
+        return np.pad(cells, width, constant_values=CELL_EDGE)
+
+    def window_totals(self, cells):
+        # (own, opponent) pattern totals of a (..., size, size) int8 array
+        padded = self.pad(cells).astype(np.int32)
+        own = opponent = 0
+        for slices in self.views:
+            code = 0
+            for k, (rows, cols) in enumerate(slices):
+                code = code + (padded[..., rows, cols] << (2 * k))
+            scores = self.table[code]
+            own = own + scores[..., 0].sum(axis=(-2, -1))
+            opponent = opponent + scores[..., 1].sum(axis=(-2, -1))
+        return own, opponent
+
+    def score(self, cells):
+        own, opponent = self.window_totals(cells)
+        return own - opponent * self.opponent_weight
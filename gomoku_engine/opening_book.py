@@ -0,0 +1,211 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Opening Book ========
+# Moves for the first few plies, searched deeply once and offline instead of at
+# the start of every game.
+#
+# The book file is a header followed by fixed-size records (key, row, column,
+# score) sorted by key. The header names the evaluation the scores are from. A lookup maps the file into memory and binary-searches
+# the keys in place, so opening a book parses nothing and a lookup reads
+# O(log n) records.
+#
+# Keys describe a position independently of the stone symbols and of the
+# board's orientation: stones are hashed by role (side to move or waiting)
+# with their own Zobrist keys, under each of the 8 rotations and reflections
+# of the board, and the smallest hash is the key. Moves are stored in that
+# canonical orientation and mapped back on lookup.
+#
+# The builder walks the opening tree from the empty board: every position gets
+# the engine's alpha-beta move and score at the build depth, and the book move
+# plus the next best moves by the engine's own move ordering are expanded, so
+# the book follows the engine's self-play line and the replies it rates most.
+#
+#   python -m gomoku_engine.opening_book [plies] [depth] [width] [evaluation]
+import mmap
+import os
+import struct
+import sys
+import time
+from functools import lru_cache
+
+from .bitboard import BitBoard, zobrist_keys
+from .move_ordering import MoveOrderer
+from .transposition import TranspositionTable
+
+MAGIC = b"GMKB"
+VERSION = 2
+HEADER = struct.Struct("<4sBBBBI8s")  # magic, version, board size, win count, plies, record count, evaluation
+RECORD = struct.Struct("<QBBf")  # key, row, column, score for the side to move
+KEY = struct.Struct("<Q")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+BUILD_PLIES = 6  # Positions with fewer stones than this get a book move
+BUILD_DEPTH = 4
+BUILD_WIDTH = 3  # Moves expanded per position
+BUILD_TABLE_MB = 64
+
+
+def symmetries(size):
+    # The 8 maps (r, c) -> (r, c) of the square board onto itself
+    last = size - 1
+    return (lambda r, c: (r, c), lambda r, c: (c, last - r), lambda r, c: (last - r, last - c),
+            lambda r, c: (last - c, r), lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+            lambda r, c: (c, r), lambda r, c: (last - c, last - r))
+
+
+INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)  # INVERSE[i] undoes symmetries(size)[i]
+
+
+def position_stones(board, player, opponent):
+    # (stones of player, stones of opponent) as (r, c) lists, from a BitBoard or a list of lists
+    rows = board.to_list() if isinstance(board, BitBoard) else board
+    mine, theirs = [], []
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            if cell == player:
+                mine.append((r, c))
+            elif cell == opponent:
+                theirs.append((r, c))
+    return mine, theirs
+
+
+def book_key(size, mine, theirs):
+    # (key, index of the symmetry giving it) for the side to move owning mine
+    mover_keys, waiting_keys = zobrist_keys("book-mover", size), zobrist_keys("book-waiting", size)
+    best = None
+    for index, transform in enumerate(symmetries(size)):
+        key = 0
+        for r, c in mine:
+            rr, cc = transform(r, c)
+            key ^= mover_keys[rr * size + cc]
+        for r, c in theirs:
+            rr, cc = transform(r, c)
+            key ^= waiting_keys[rr * size + cc]
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.win_count, self.plies, self.count, evaluation = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not an opening book")
+        self.evaluation = evaluation.rstrip(b"\0").decode()  # Name of the evaluation the scores are from
+        self.transforms = symmetries(self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, key):
+        # (row, column, score) of the record with key, or None
+        data, lo, hi = self.data, 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = KEY.unpack_from(data, HEADER.size + mid * RECORD.size)[0]
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return RECORD.unpack_from(data, HEADER.size + mid * RECORD.size)[1:]
+        return None
+
+    def lookup(self, board, player, opponent):
+        # (move, score) for player to move on board, or None when the position is not in the book
+        mine, theirs = position_stones(board, player, opponent)
+        if len(mine) + len(theirs) >= self.plies:
+            return None
+        key, index = book_key(self.size, mine, theirs)
+        record = self.find(key)
+        if record is not None:
+            move = self.transforms[INVERSE[index]](record[0], record[1])
+            cell = board.get(*move) if isinstance(board, BitBoard) else board[move[0]][move[1]]
+            if cell not in (player, opponent):
+                self.hits += 1
+                return move, record[2]
+        self.misses += 1
+        return None
+
+    def close(self):
+        self.data.close()
+
+
+@lru_cache(maxsize=None)
+def open_book(path, size, win_count):
+    # The book at path, opened once per process; None if there is no such file or it is for another board
+    if not path or not os.path.exists(path):
+        return None
+    book = OpeningBook(path)
+    if (book.size, book.win_count) != (size, win_count):
+        book.close()
+        return None
+    return book
+
+
+def write_book(path, entries, size, win_count, plies, evaluation):
+    # entries: {key: (row, column, score)}, scored by the evaluation named evaluation
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, win_count, plies, len(entries), evaluation.encode()))
+        for key in sorted(entries):
+            row, column, score = entries[key]
+            f.write(RECORD.pack(key, row, column, score))
+
+
+# ======== Builder ========
+def build_book(path=DEFAULT_PATH, plies=BUILD_PLIES, depth=BUILD_DEPTH, width=BUILD_WIDTH, evaluation="classic",
+               progress=None):
+    # Searches every position of the opening tree and writes the book; returns the number of positions
+    from .board import AI_ALPHABETA, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT
+    from .engine import Engine
+    engine = Engine(evaluation, opening_book=None)
+    size = BOARD_SIZE
+    transforms = symmetries(size)
+    board = BitBoard(size, WIN_COUNT, EMPTY, engine.radius)
+    entries = {}
+
+    def expand(mover, waiting):
+        if board.count >= plies:
+            return
+        key, index = book_key(size, *position_stones(board, mover, waiting))
+        if key in entries:
+            return
+        tt, orderer = TranspositionTable(BUILD_TABLE_MB * 1024 * 1024), MoveOrderer()
+        move = engine.alpha_beta_search(board.copy(), mover, waiting, tt=tt, orderer=orderer, depth=depth)
+        if move is None:
+            return
+        root = tt.probe(board.hash)
+        # No root entry means the threat search answered without searching: a forced win
+        score = root[3] if root is not None else engine.score_win
+        entries[key] = transforms[index](*move) + (score,)
+        if progress is not None:
+            progress(len(entries), board.count, move, score)
+        # The best width replies, counting symmetric ones once
+        expanded = set()
+        for r, c in orderer.order(board, engine.get_all_moves(board), mover, waiting, depth, move):
+            if len(expanded) >= width:
+                break
+            board.make(r, c, mover)
+            child = book_key(size, *position_stones(board, waiting, mover))[0]
+            if child not in expanded and not board.is_win_at(r, c):
+                expanded.add(child)
+                expand(waiting, mover)
+            board.unmake(r, c)
+
+    expand(HUMAN, AI_ALPHABETA)
+    write_book(path, entries, size, WIN_COUNT, plies, engine.evaluation.name)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    plies = int(args[0]) if len(args) > 0 else BUILD_PLIES
+    depth = int(args[1]) if len(args) > 1 else BUILD_DEPTH
+    width = int(args[2]) if len(args) > 2 else BUILD_WIDTH
+    evaluation = args[3] if len(args) > 3 else "classic"
+    started = time.monotonic()
+    report = lambda count, stones, move, score: print(f"{count:5d}  {stones} stones  {move}  {score:g}")
+    count = build_book(DEFAULT_PATH, plies, depth, width, evaluation, report)
+    print(f"{count} positions written to {DEFAULT_PATH} in {time.monotonic() - started:.1f}s")
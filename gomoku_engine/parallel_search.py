@@ -0,0 +1,254 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Root-Parallel Search ========
+# The root moves of a search are independent subtrees, so they are handed out
+# to a pool of worker processes (threads would be serialised by the GIL).
+# Workers share the best root score found so far through a shared double: each
+# root move is searched with alpha just below it, so later moves get a narrow
+# window, yet a move that ties the best is still scored exactly. The caller
+# then picks the first move, in its own move order, with the highest score,
+# which is the move the serial search returns at the same depth.
+#
+# The pool and the shared value live as long as the RootParallelSearch object,
+# so worker processes are spawned once, not on every move. Each worker keeps
+# its own transposition table and move orderer for the current search, and an
+# Engine rebuilt from the settings of the engine that submitted the task. The
+# caller's Deadline is linked to a shared stop flag the workers poll, so
+# stopping it ends the workers' subtrees too.
+#
+# LazySMPSearch is the other parallel mode: every worker searches the whole
+# position, all of them through one SharedTranspositionTable, and they help
+# each other only through the results they leave in it. Odd workers search one
+# ply deeper than even ones so the processes do not walk the tree in lockstep.
+# With a time limit, once worker 0 has finished the requested depth the deeper
+# workers get the rest of it, and a deeper search finished in time gives the
+# move; without one they are stopped then, having only filled the table.
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+from .bitboard import BitBoard
+from .move_ordering import MoveOrderer
+from .search_control import Deadline, SearchTimeout, SharedDeadline
+from .shared_transposition import SharedTranspositionTable
+from .transposition import TranspositionTable
+
+STOP_POLL_SECONDS = 0.01  # How often a waiting coordinator looks for a stop it would not be told about
+
+# Worker process state, set up by _init_worker and reused across tasks
+_shared_alpha = None
+_stop = None
+_worker_search = None  # (search id, TranspositionTable, MoveOrderer) of the search being worked on
+_worker_engine = None  # (settings, Engine) of the last task
+
+
+def _init_worker(shared_alpha, stop):
+    global _shared_alpha, _stop
+    _shared_alpha = shared_alpha
+    _stop = stop
+
+
+def _engine(settings):
+    # Engine with the submitting engine's settings, searching serially in this process
+    global _worker_engine
+    if _worker_engine is None or _worker_engine[0] != settings:
+        from .engine import Engine
+        _worker_engine = (settings, Engine(**dict(settings, workers=1)))
+    return _worker_engine[1]
+
+
+def _search_root_move(search_id, settings, cells, move, depth, player_ai, opponent_in_game, alpha_beta,
+                      table_bytes, expires_at):
+    # Score of one root move, or None if time ran out or the search was stopped
+    global _worker_search
+    if _stop.value:
+        return None  # Queued behind the subtrees that were running when the search was stopped
+    engine = _engine(settings)
+    if _worker_search is None or _worker_search[0] != search_id:
+        _worker_search = (search_id, TranspositionTable(table_bytes), MoveOrderer())
+    _, tt, orderer = _worker_search
+    orderer.new_search(depth)
+    board = BitBoard.from_list(cells, radius=engine.radius)
+    evaluator = engine.create_evaluator(board, player_ai, opponent_in_game)
+    evaluator.make(move[0], move[1], player_ai)
+    deadline = SharedDeadline(_stop, expires_at)
+    try:
+        if not alpha_beta:
+            return engine.min_value(board, depth - 1, player_ai, opponent_in_game, move, evaluator, deadline)
+        # Just below the shared best, so a tie with it comes back as an exact score
+        alpha = math.nextafter(_shared_alpha.value, -math.inf)
+        score = engine.min_value_ab(board, depth - 1, alpha, math.inf, player_ai, opponent_in_game, move, evaluator,
+                                    tt, orderer, deadline)
+    except SearchTimeout:
+        return None
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score
+
+
+def _results(futures, deadline):
+    # Results of futures. A deadline stopped from outside this process (a SharedDeadline, when the search
+    # itself runs in an EngineProcess) is only noticed by polling; stopping it raises the workers' flag.
+    pending = futures
+    while deadline is not None and pending:
+        _, pending = wait(pending, timeout=STOP_POLL_SECONDS, return_when=FIRST_EXCEPTION)
+        if pending and deadline.expired() and not deadline.stopped:
+            deadline.stop()
+    return [future.result() for future in futures]
+
+
+class RootParallelSearch:
+    mode = "root"
+
+    def __init__(self, workers=None, table_bytes=64 * 1024 * 1024):
+        # table_bytes is split evenly between the workers' transposition tables
+        self.workers = workers or os.cpu_count() or 1
+        self.table_bytes = table_bytes
+        self.shared_alpha = multiprocessing.Value("d", -math.inf)
+        self.stop = multiprocessing.Value("b", 0)
+        self.executor = None
+        self.search_id = 0
+
+    def _pool(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.shared_alpha, self.stop))
+        return self.executor
+
+    def score_moves(self, settings, board, moves, player_ai, opponent_in_game, depth, alpha_beta=True,
+                    deadline=None):
+        # Root scores of moves, in the same order. A score can be an upper bound when it is below the
+        # best, but the best score and every move tying it are exact. Raises SearchTimeout if the
+        # deadline passes, or is stopped, before every move is scored.
+        self.search_id += 1
+        self.shared_alpha.value = -math.inf
+        self.stop.value = 0
+        cells = board.to_list() if isinstance(board, BitBoard) else board
+        expires_at = deadline.expires_at if deadline is not None else None
+        table_bytes = self.table_bytes // self.workers
+        pool = self._pool()
+        if deadline is not None:
+            deadline.link(self.stop)
+        try:
+            futures = [pool.submit(_search_root_move, self.search_id, settings, cells, move, depth, player_ai,
+                                   opponent_in_game, alpha_beta, table_bytes, expires_at)
+                       for move in moves]
+            scores = _results(futures, deadline)
+        finally:
+            if deadline is not None:
+                deadline.unlink(self.stop)
+        if any(score is None for score in scores):
+            raise SearchTimeout()
+        return scores
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+def best_of(moves, scores):
+    # First move with the highest score, as the serial root loop picks it
+    best_action, best_score = None, -math.inf
+    for move, score in zip(moves, scores):
+        if score > best_score:
+            best_action, best_score = move, score
+    return best_action, best_score
+
+
+# ======== Lazy SMP ========
+_smp_table = None
+_smp_stop = None
+_smp_orderer = None
+
+
+def _init_smp_worker(table_name, stop):
+    global _smp_table, _smp_stop, _smp_orderer
+    _smp_table = SharedTranspositionTable(name=table_name)
+    _smp_stop = stop
+    _smp_orderer = MoveOrderer()
+
+
+def _lazy_smp_worker(worker, settings, cells, depth, player_ai, opponent_in_game, expires_at):
+    # One full alpha-beta search over the shared table; the deadline's node counter doubles as the node count
+    engine = _engine(settings)
+    _smp_table.reset_counters()
+    deadline = SharedDeadline(_smp_stop, expires_at)
+    try:
+        move = engine.alpha_beta_search(cells, player_ai, opponent_in_game, depth=depth, tt=_smp_table,
+                                        orderer=_smp_orderer, deadline=deadline)
+    except SearchTimeout:
+        move = None
+    return {"worker": worker, "depth": depth, "move": move, "completed": move is not None, "nodes": deadline.nodes,
+            "hits": _smp_table.hits, "misses": _smp_table.misses, "collisions": _smp_table.collisions}
+
+
+class LazySMPSearch:
+    mode = "lazy_smp"
+
+    def __init__(self, workers=None, table_bytes=64 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_bytes)
+        self.stop = multiprocessing.Value("b", 0)
+        self.executor = None
+        self.last_report = None
+
+    def _pool(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_smp_worker,
+                                                initargs=(self.table.name, self.stop))
+        return self.executor
+
+    def search(self, settings, board, player_ai, opponent_in_game, depth, deadline=None):
+        # Best move of the deepest search finished by the time worker 0 completes depth or, if the deadline
+        # has a time limit, by the time every worker finishes or it expires. Raises SearchTimeout if worker 0
+        # runs out of time or the deadline is stopped.
+        self.table.next_generation()
+        self.stop.value = 0
+        cells = board.to_list() if isinstance(board, BitBoard) else board
+        expires_at = deadline.expires_at if deadline is not None else None
+        started = Deadline()
+        pool = self._pool()
+        if deadline is not None:
+            deadline.link(self.stop)
+        try:
+            futures = [pool.submit(_lazy_smp_worker, worker, settings, cells, depth + worker % 2, player_ai,
+                                   opponent_in_game, expires_at)
+                       for worker in range(self.workers)]
+            results = _results(futures[:1], deadline)
+            if results[0]["completed"] and deadline is not None and deadline.expires_at is not None:
+                # The time left is worth the deeper workers' moves, and the caller's next iteration would
+                # search that depth anyway
+                results += _results(futures[1:], deadline)
+            self.stop.value = 1
+            results += [future.result() for future in futures[len(results):]]
+        finally:
+            if deadline is not None:
+                deadline.unlink(self.stop)
+        if not results[0]["completed"]:
+            self.last_report = self._report(results, started.elapsed(), None)
+            raise SearchTimeout()
+        deepest = max((result for result in results if result["completed"]), key=lambda result: result["depth"])
+        self.last_report = self._report(results, started.elapsed(), deepest["depth"])
+        return deepest["move"]
+
+    def _report(self, results, seconds, depth):
+        hits = sum(result["hits"] for result in results)
+        probes = hits + sum(result["misses"] for result in results)
+        nodes = sum(result["nodes"] for result in results)
+        return {
+            "workers": [{key: result[key] for key in ("worker", "depth", "completed", "nodes")} for result in results],
+            "depth": depth,  # Of the search that gave the move; None if there was none
+            "nodes": nodes,
+            "nodes_per_second": nodes / seconds if seconds else 0.0,
+            "hit_rate": hits / probes if probes else 0.0,
+            "collisions": sum(result["collisions"] for result in results),
+            "seconds": seconds,
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        self.table.close()
@@ -0,0 +1,227 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Piskvork Protocol ========
+# The engine as a Gomocup/Piskvork "brain": one long-lived process reading
+# commands on stdin and answering on stdout, so Gomoku managers and scripted
+# harnesses can play it. The Engine, its transposition table and history stay
+# warm from one turn (and game) to the next.
+#
+#   START 15          -> OK                  (only BOARD_SIZE boards)
+#   INFO timeout_turn 5000 / timeout_match / time_left / max_memory (bytes)
+#   BEGIN             -> x,y                 (our first move)
+#   TURN x,y          -> x,y                 (opponent's move, then ours)
+#   BOARD / x,y,1|2 ... / DONE  -> x,y       (1 = ours, 2 = theirs; then we move; a bad line is an ERROR)
+#   TAKEBACK x,y / RESTART  -> OK   (TAKEBACK of an empty cell is an ERROR)
+#   ABOUT             -> name="...", ...
+#   END               -> exits
+# x is the column and y the row, from 0. Every move is searched with iterative
+# deepening inside the turn budget: timeout_turn (0 plays depth 1 only) and,
+# with a match limit, a GameClock share of the time left, both less a safety
+# margin. The root threat search stops at the same deadline, and turns too short
+# for it to finish are searched without it. max_memory sizes the transposition
+# table.
+#
+#   python -m gomoku_engine.piskvork   (or python Gomoku.py --piskvork)
+import sys
+import time
+
+from .board import AI_ALPHABETA, BOARD_SIZE, EMPTY, HUMAN, create_board, is_board_full
+from .engine import Engine
+from .move_ordering import MoveOrderer
+from .search_control import Deadline, GameClock
+
+EVALUATION = "pattern"
+ABOUT = 'name="Gomoku", version="1.0", author="Adelsayed411"'
+DEFAULT_TIMEOUT_TURN_MS = 5000  # Until the manager sends INFO timeout_turn
+SAFETY_SECONDS = 0.05  # Kept back from every turn budget for start-up, output and the last node check
+TURN_SHARE = 0.9  # Share of timeout_turn the search may use
+THREAT_SEARCH_MIN_SECONDS = 0.5  # Shortest turn budget with the root threat search, which takes up to ~0.3 s
+BASE_MEMORY_MB = 40  # Interpreter, evaluator caches and threat cache, outside the transposition table
+OWN, OPPONENT = AI_ALPHABETA, HUMAN  # Board symbols of the two sides
+BOARD_FIELDS = {"1": OWN, "2": OPPONENT}  # BOARD stones; 3 (a continuous game's winning line) is not supported
+
+
+class PiskvorkEngine:
+    def __init__(self, engine=None):
+        self.set_engines(engine or Engine(EVALUATION))
+        self.board = None
+        self.timeout_turn = DEFAULT_TIMEOUT_TURN_MS
+        self.timeout_match = 0  # Milliseconds for the whole match, 0 = no limit
+        self.time_left = None  # Milliseconds of match time left, from INFO time_left or our own count
+        self.max_memory = 0  # Bytes, 0 = no limit
+        self.tt = None
+        self.orderer = MoveOrderer()
+        self.board_lines = None  # Lines read since BOARD, until DONE
+
+    # ======== Commands ========
+    def handle(self, line):
+        # Response lines for one input line, or None after END
+        line = line.strip()
+        if self.board_lines is not None:
+            return self.read_board_line(line)
+        if not line:
+            return []
+        command, _, args = line.partition(" ")
+        command = command.upper()
+        try:
+            if command == "START":
+                return self.start(args)
+            if command == "RESTART":
+                return self.start(str(BOARD_SIZE))
+            if command == "INFO":
+                return self.info(args)
+            if self.board is None and command in ("BEGIN", "TURN", "BOARD", "TAKEBACK"):
+                return ["ERROR no START"]
+            if command == "BEGIN":
+                return [self.move()]
+            if command == "TURN":
+                r, c = self.parse_move(args)
+                self.place(r, c, OPPONENT)
+                return [self.move()]
+            if command == "BOARD":
+                self.board = create_board()
+                self.board_lines = []
+                return []
+            if command == "TAKEBACK":
+                r, c = self.parse_move(args)
+                if self.board[r][c] == EMPTY:
+                    raise ValueError(f"{c},{r} is empty")
+                self.board[r][c] = EMPTY
+                return ["OK"]
+            if command == "ABOUT":
+                return [ABOUT]
+            if command == "END":
+                return None
+        except ValueError as e:
+            return [f"ERROR {e}"]
+        return [f"UNKNOWN {command}"]
+
+    def start(self, args):
+        try:
+            size = int(args)
+        except ValueError:
+            return ["ERROR START needs a board size"]
+        if size != BOARD_SIZE:
+            return [f"ERROR only {BOARD_SIZE}x{BOARD_SIZE} boards are supported"]
+        self.board = create_board()
+        return ["OK"]
+
+    def info(self, args):
+        key, _, value = args.partition(" ")
+        if key in ("timeout_turn", "timeout_match", "time_left", "max_memory"):
+            try:
+                setattr(self, key, int(value))
+            except ValueError:
+                return [f"ERROR bad {key}"]
+            if key == "max_memory":
+                self.set_memory()
+            elif key == "timeout_match" and self.time_left is None:
+                self.time_left = self.timeout_match
+        return []  # Other keys (rule, game_type, folder, evaluate) change nothing here
+
+    def read_board_line(self, line):
+        if line.upper() != "DONE":
+            if line:
+                self.board_lines.append(line)
+            return []
+        lines, self.board_lines = self.board_lines, None
+        try:
+            for text in lines:
+                parts = text.split(",")
+                if len(parts) != 3:
+                    raise ValueError(f"bad board line {text!r}")
+                try:
+                    r, c = self.parse_move(",".join(parts[:2]))
+                except ValueError:
+                    raise ValueError(f"bad board line {text!r}")
+                field = parts[2].strip()
+                if field not in BOARD_FIELDS:
+                    raise ValueError(f"bad field {field!r} at {c},{r}, expected 1 or 2")
+                self.place(r, c, BOARD_FIELDS[field])
+            return [self.move()]
+        except ValueError as e:
+            return [f"ERROR {e}"]
+
+    # ======== Moves ========
+    def parse_move(self, text):
+        try:
+            x, y = (int(value) for value in text.split(","))
+        except ValueError:
+            raise ValueError(f"bad move {text!r}")
+        if not (0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE):
+            raise ValueError(f"move {text} is off the board")
+        return y, x
+
+    def place(self, r, c, player):
+        if self.board[r][c] != EMPTY:
+            raise ValueError(f"{c},{r} is taken")
+        self.board[r][c] = player
+
+    def turn_budget(self):
+        # Seconds this move may take
+        budget = self.timeout_turn / 1000 * TURN_SHARE
+        if self.timeout_match and self.time_left is not None:
+            budget = min(budget, GameClock(self.time_left / 1000).move_budget())
+        return max(0.0, budget - SAFETY_SECONDS)
+
+    def set_engines(self, engine):
+        # engine plays turns long enough for its root threat search, a copy without it the shorter ones
+        self.engine = engine
+        self.quick_engine = Engine(**dict(engine.settings(), threat_search=False)) if engine.threat_search else engine
+
+    def set_memory(self):
+        # The transposition table gets what max_memory leaves after the rest of the process
+        if self.max_memory:
+            table_mb = max(1, self.max_memory // (1024 * 1024) - BASE_MEMORY_MB)
+            if table_mb != self.engine.table_mb:
+                self.close()
+                self.set_engines(Engine(**dict(self.engine.settings(), table_mb=table_mb)))
+                self.tt = None
+
+    def move(self):
+        # Searches our move, plays it on the board and returns it as "x,y"
+        if is_board_full(self.board):
+            raise ValueError("the board is full")
+        started = time.monotonic()
+        budget = self.turn_budget()
+        engine = self.engine if budget >= THREAT_SEARCH_MIN_SECONDS else self.quick_engine
+        move = engine.get_book_move(self.board, OWN, OPPONENT)
+        if move is None:
+            if self.tt is None:
+                self.tt = engine.new_table()
+            tt, orderer = self.tt, self.orderer
+            search = lambda b, p, o, d, dl: engine.alpha_beta_search(b, p, o, d, tt, orderer, dl)
+            move = engine.iterative_deepening_search(self.board, OWN, OPPONENT, None, search,
+                                                     deadline=Deadline(budget))
+        r, c = move
+        self.board[r][c] = OWN
+        if self.timeout_match and self.time_left is not None:
+            self.time_left = max(0, self.time_left - int((time.monotonic() - started) * 1000))
+        return f"{c},{r}"
+
+    def close(self):
+        self.engine.close()
+        if self.quick_engine is not self.engine:
+            self.quick_engine.close()
+
+    # ======== Main Loop ========
+    def run(self, input=sys.stdin, output=sys.stdout):
+        for line in input:
+            response = self.handle(line)
+            if response is None:
+                break
+            for answer in response:
+                output.write(answer + "\n")
+            output.flush()
+
+
+def main():
+    brain = PiskvorkEngine()
+    try:
+        brain.run()
+    finally:
+        brain.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Pondering ========
+# Searching on the opponent's time. After the engine moves, a Ponderer guesses
+# the opponent's reply (Engine.predicted_reply) and, in a background thread,
+# runs the search the engine will need if that reply is played. When the
+# opponent does move:
+#   * the predicted move (a ponder hit): the running search becomes the
+#     engine's move search, so its result is used as soon as it is ready; with
+#     a time limit the search ends time_limit after it started pondering, or
+#     at once if that has passed;
+#   * any other move (a miss): the search is stopped through its Deadline and
+#     its result discarded. What it left in the transposition table, the move
+#     orderer and the threat-search cache is reused by the real search.
+#
+# The ponder search must not share its table or orderer with another search
+# running at the same time; only one of them may run per engine. Searches with
+# worker processes cannot be stopped early, so callers only ponder with a
+# single-process engine.
+import threading
+import time
+
+from .search_control import Deadline, SearchTimeout
+
+
+class Ponderer:
+    def __init__(self, engine, board, player_ai, opponent_in_game, search, depth, time_limit=None, tt=None,
+                 predict=None, deepens=False):
+        # search(board, player_ai, opponent_in_game, depth, deadline) is the engine's move search, as for
+        # Engine.iterative_deepening_search; time_limit None searches to depth, otherwise iteratively. With
+        # deepens, search already runs its own iterative deepening (an EngineProcess's iterative search), so
+        # it is called once and time_limit only sets the deadline on a hit.
+        # predict(board, player_ai, opponent_in_game, deadline) replaces engine.predicted_reply with tt, e.g.
+        # for a search that runs in an EngineProcess with its own table; stopping deadline must end it.
+        self.engine = engine
+        self.board = [list(row) for row in board]  # Position after the engine's move, opponent to move
+        self.player_ai = player_ai
+        self.opponent = opponent_in_game
+        self.search = search
+        self.depth = depth
+        self.time_limit = time_limit
+        self.deepens = deepens
+        self.predict = predict or (lambda b, p, o, dl: engine.predicted_reply(b, p, o, tt, dl))
+        self.deadline = Deadline()
+        self.predicted = None
+        self.move = None
+        self.started_at = None
+        self.finished_at = None
+        self.hit_at = None
+        self.done = False
+        self.deliver = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            predicted = self.predict(self.board, self.player_ai, self.opponent, self.deadline)
+            with self.lock:
+                # Together, so a hit always counts its time limit from the start of the move search
+                self.predicted = predicted
+                self.started_at = time.monotonic()  # The prediction is not part of the move search
+            if predicted is None or self.deadline.stopped:
+                raise SearchTimeout()
+            r, c = predicted
+            board = [list(row) for row in self.board]
+            board[r][c] = self.opponent
+            if self.time_limit is None or self.deepens:
+                move = self.search(board, self.player_ai, self.opponent, self.depth, self.deadline)
+            else:
+                move = self.engine.iterative_deepening_search(board, self.player_ai, self.opponent, None,
+                                                              self.search, deadline=self.deadline)
+        except SearchTimeout:
+            move = None
+        except Exception as e:
+            print(f"Ponder thread error: {e}")
+            move = None
+        with self.lock:
+            self.move = move
+            self.finished_at = time.monotonic()
+            self.done = True
+            deliver = self.deliver
+        if deliver is not None:
+            deliver(move)
+
+    def resolve(self, move, deliver):
+        # Called with the opponent's move. On a hit deliver(engine move) is called once the search is done,
+        # from this thread if it already is, and True is returned; on a miss the search is stopped.
+        with self.lock:
+            hit = move == self.predicted and not self.deadline.stopped
+            if hit:
+                self.hit_at = time.monotonic()
+                if self.time_limit is not None:
+                    self.deadline.expires_at = self.started_at + self.time_limit
+                if not self.done:
+                    self.deliver = deliver
+                    return True
+        if hit:
+            deliver(self.move)
+        else:
+            self.stop()
+        return hit
+
+    def stop(self):
+        # Ends the search within CHECK_INTERVAL nodes and waits for the thread
+        self.deadline.stop()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def saved_seconds(self):
+        # Time the engine did not have to spend after the opponent's move, once a hit is delivered
+        if self.hit_at is None or self.finished_at is None:
+            return 0.0
+        return (self.finished_at - self.started_at) - max(0.0, self.finished_at - self.hit_at)
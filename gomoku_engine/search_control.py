@@ -0,0 +1,95 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Search Time Control ========
+# A Deadline is passed down the search and checked at every node; once it has
+# passed, or stop() has been called from another thread, the search unwinds by
+# raising SearchTimeout. The clock and the stop flag are only read every
+# CHECK_INTERVAL nodes to keep the per-node cost to a counter increment. A
+# parallel search links its workers' shared stop flag to the deadline while it
+# runs, so stop() also ends the searches in the worker processes; there each
+# search checks a SharedDeadline on that flag.
+import math
+import time
+
+CHECK_INTERVAL = 256
+DEFAULT_MOVES_TO_GO = 30  # Moves a game clock is spread over when budgeting one move
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds=None):
+        self.started_at = time.monotonic()
+        self.expires_at = None if seconds is None else self.started_at + seconds
+        self.nodes = 0
+        self.next_check = CHECK_INTERVAL
+        self.stopped = False
+        self.stop_flags = []  # Shared multiprocessing values set to 1 by stop()
+
+    @classmethod
+    def at(cls, expires_at):
+        # Deadline at a time.monotonic() instant, e.g. one handed over to a worker process
+        deadline = cls()
+        deadline.expires_at = expires_at
+        return deadline
+
+    def check(self):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            # A threshold rather than a multiple, as nodes may also be added in bulk (batched leaves)
+            self.next_check = self.nodes + CHECK_INTERVAL
+            if self.expired():
+                raise SearchTimeout()
+
+    def stop(self):
+        # Ends the search at its next check, whatever time is left; may be called from any thread
+        self.stopped = True
+        for flag in list(self.stop_flags):
+            flag.value = 1
+
+    def link(self, flag):
+        # Raises flag now if the deadline is already stopped, and on stop() until unlink(flag)
+        self.stop_flags.append(flag)
+        if self.stopped:
+            flag.value = 1
+
+    def unlink(self, flag):
+        self.stop_flags.remove(flag)
+
+    def expired(self):
+        return self.stopped or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def remaining(self):
+        return math.inf if self.expires_at is None else max(0.0, self.expires_at - time.monotonic())
+
+
+class SharedDeadline(Deadline):
+    # Deadline of a search in another process: also expires once the coordinating process raises the
+    # shared stop flag (a multiprocessing.Value) that it linked to its own Deadline
+    def __init__(self, stop_flag, expires_at):
+        super().__init__()
+        self.stop_flag = stop_flag
+        self.expires_at = expires_at
+
+    def expired(self):
+        return bool(self.stop_flag.value) or super().expired()
+
+
+class GameClock:
+    # Total thinking time for one player over a whole game
+    def __init__(self, total_seconds, moves_to_go=DEFAULT_MOVES_TO_GO):
+        self.remaining = total_seconds
+        self.moves_to_go = moves_to_go
+
+    def move_budget(self):
+        # An even share of what is left, never more than half of it
+        return max(0.0, min(self.remaining / self.moves_to_go, self.remaining / 2))
+
+    def charge(self, seconds):
+        self.remaining = max(0.0, self.remaining - seconds)
+        self.moves_to_go = max(5, self.moves_to_go - 1)
+
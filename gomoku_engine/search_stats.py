@@ -0,0 +1,194 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Search Statistics ========
+# What a search did: nodes per ply, leaf evaluations, terminal positions,
+# cutoffs, effective branching factor, time spent in the engine's hot helpers
+# and the principal variation.
+#
+# Nothing in the search functions knows about this. While a search runs with a
+# SearchStats, instrument() shadows the Engine's node methods (max_value,
+# min_value_ab, ...) and helpers (check_win, evaluate_board, get_all_moves,
+# ...) with counting and timing wrappers set on that instance, and removes them
+# afterwards. The recursion calls those methods through self, so every node
+# goes through a wrapper, other engines are untouched, and a search without
+# stats runs exactly the code it always did.
+#
+# Helper times are inclusive: evaluate_board's own win test is also counted in
+# check_win. Only searches in this process are instrumented; with a parallel
+# searcher the stats are left empty.
+import math
+import time
+from contextlib import contextmanager
+
+NODE_FUNCTIONS = {"max_value": (True, False), "min_value": (False, False),
+                  "max_value_ab": (True, True), "min_value_ab": (False, True)}  # name -> (max node, alpha-beta)
+TIMED_HELPERS = {"check_win": "check_win", "check_win_at": "check_win", "evaluate_board": "evaluate_board",
+                 "get_all_moves": "get_all_moves"}  # engine function -> time bucket
+
+
+class SearchStats:
+    def __init__(self):
+        self.reset(0)
+
+    def reset(self, depth):
+        self.depth = depth
+        self.nodes = [0] * (depth + 1)  # Per ply from the root
+        self.leaf_evaluations = 0
+        self.terminal_hits = 0  # Wins and full boards found before the depth limit
+        self.beta_cutoffs = 0
+        self.alpha_cutoffs = 0
+        self.times = {bucket: 0.0 for bucket in TIMED_HELPERS.values()}
+        self.seconds = 0.0
+        self.pv = []
+        self.score = None
+        self.completed = False
+
+    # ======== Derived Figures ========
+    def total_nodes(self):
+        return sum(self.nodes)
+
+    def effective_branching_factor(self):
+        # b such that b^depth nodes would have been searched
+        return self.total_nodes() ** (1 / self.depth) if self.depth > 0 and self.total_nodes() else 0.0
+
+    def as_dict(self):
+        return {
+            "depth": self.depth,
+            "completed": self.completed,
+            "nodes": self.total_nodes(),
+            "nodes_per_ply": list(self.nodes),
+            "leaf_evaluations": self.leaf_evaluations,
+            "terminal_hits": self.terminal_hits,
+            "beta_cutoffs": self.beta_cutoffs,
+            "alpha_cutoffs": self.alpha_cutoffs,
+            "effective_branching_factor": self.effective_branching_factor(),
+            "seconds": self.seconds,
+            "times": dict(self.times),
+            "pv": [list(move) for move in self.pv],
+            "score": self.score,
+        }
+
+    def __str__(self):
+        status = "" if self.completed else " (aborted)"
+        times = ", ".join(f"{bucket} {seconds:.3f}s" for bucket, seconds in self.times.items())
+        pv = " ".join(f"({r},{c})" for r, c in self.pv) or "-"
+        score = "-" if self.score is None or math.isinf(self.score) else f"{self.score:g}"
+        return (f"depth {self.depth}{status}: {self.total_nodes()} nodes "
+                f"({' / '.join(str(count) for count in self.nodes)} per ply), "
+                f"{self.leaf_evaluations} leaf evaluations, {self.terminal_hits} terminal, "
+                f"{self.beta_cutoffs} beta / {self.alpha_cutoffs} alpha cutoffs, "
+                f"EBF {self.effective_branching_factor():.1f}\n"
+                f"time {self.seconds:.3f}s: {times}\n"
+                f"PV {pv}, score {score}")
+
+    # ======== Instrumentation ========
+    @contextmanager
+    def instrument(self, engine, depth):
+        # Counts and times everything the engine's search does inside the with block
+        self.reset(depth)
+        self.nodes[0] = 1
+        # One frame per node being searched: ply, max node, best value so far and its line, batched leaves
+        root = {"ply": 0, "max": True, "best": -math.inf, "pv": [], "children": 0, "batch": None}
+        frames = [root]
+        originals = {}
+
+        def count_nodes(ply, count):
+            if ply >= len(self.nodes):
+                self.nodes.extend([0] * (ply + 1 - len(self.nodes)))
+            self.nodes[ply] += count
+
+        def node_wrapper(function, is_max, alpha_beta):
+            def node(board, node_depth, *args):
+                ply = depth - node_depth
+                count_nodes(ply, 1)
+                frame = {"ply": ply, "max": is_max, "best": -math.inf if is_max else math.inf, "pv": [],
+                         "children": 0, "batch": None}
+                frames.append(frame)
+                try:
+                    value = function(board, node_depth, *args)
+                finally:
+                    frames.pop()
+                if alpha_beta and frame["children"]:
+                    alpha, beta = args[0], args[1]
+                    if is_max and value >= beta:
+                        self.beta_cutoffs += 1
+                    elif not is_max and value <= alpha:
+                        self.alpha_cutoffs += 1
+                if frame["batch"] is not None and not frame["pv"]:
+                    # The best child was a batched leaf: the first one with the node's value
+                    moves, values = frame["batch"]
+                    frame["pv"] = [moves[values.index(value)]] if value in values else []
+                last_move = args[4] if alpha_beta else args[2]
+                parent = frames[-1]
+                parent["children"] += 1
+                if value > parent["best"] if parent["max"] else value < parent["best"]:
+                    parent["best"] = value
+                    parent["pv"] = [last_move] + frame["pv"]
+                return value
+            return node
+
+        def timed(function, bucket):
+            def helper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.times[bucket] += time.perf_counter() - started
+            return helper
+
+        def leaf(function):
+            def evaluate(*args, **kwargs):
+                self.leaf_evaluations += 1
+                return function(*args, **kwargs)
+            return evaluate
+
+        def terminal(function):
+            def test(board, node_depth, *args, **kwargs):
+                result = function(board, node_depth, *args, **kwargs)
+                if result and node_depth > 0:
+                    self.terminal_hits += 1
+                return result
+            return test
+
+        def batched(function):
+            def values(board, moves, *args):
+                result = function(board, moves, *args)
+                # Every move's leaf is scored, even those after a cutoff
+                self.leaf_evaluations += len(moves)
+                count_nodes(frames[-1]["ply"] + 1, len(moves))
+                frames[-1]["children"] += len(moves)
+                frames[-1]["batch"] = (list(moves), result)
+                return result
+            return values
+
+        wrappers = {}
+        for name, (is_max, alpha_beta) in NODE_FUNCTIONS.items():
+            if hasattr(engine, name):
+                wrappers[name] = node_wrapper(getattr(engine, name), is_max, alpha_beta)
+        for name, bucket in TIMED_HELPERS.items():
+            if hasattr(engine, name):
+                wrappers[name] = timed(getattr(engine, name), bucket)
+        wrappers["evaluate_board"] = leaf(wrappers["evaluate_board"])
+        wrappers["terminal_test"] = terminal(engine.terminal_test)
+        if hasattr(engine, "batched_leaf_values"):
+            wrappers["batched_leaf_values"] = timed(batched(engine.batched_leaf_values), "evaluate_board")
+        for name, wrapper in wrappers.items():
+            originals[name] = vars(engine).get(name)  # None when the class method is in use
+            setattr(engine, name, wrapper)
+        started = time.perf_counter()
+        try:
+            yield self
+            self.completed = True
+        finally:
+            self.seconds = time.perf_counter() - started
+            for name, function in originals.items():
+                if function is None:
+                    delattr(engine, name)
+                else:
+                    setattr(engine, name, function)
+            self.pv = root["pv"]
+            self.score = root["best"] if root["pv"] else None
+
+    def finish(self, move):
+        # A root answered without searching (threat search, a single move) still reports its move
+        if not self.pv and move is not None:
+            self.pv = [move]
@@ -0,0 +1,125 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Shared-Memory Transposition Table ========
+# A TranspositionTable whose slots live in a multiprocessing.shared_memory
+# block, so every search process reads and writes the same table.
+#
+# Each slot is three packed 64-bit words: check, score (the bits of a double)
+# and meta (depth, flag, generation and best move). Writers take no lock;
+# instead check is stored as key ^ score ^ meta, and a reader accepts a slot
+# only if XORing the three words it read gives back its key. A slot torn by a
+# concurrent write, like a slot holding another position, fails that test and
+# is a miss.
+#
+# The search generation is kept in the block's header so all processes age
+# entries in step: the coordinating process calls next_generation() and every
+# table's new_search() picks the value up.
+import struct
+from multiprocessing import shared_memory
+
+from .transposition import TranspositionTable
+
+SLOT = struct.Struct("<QQQ")
+HEADER = struct.Struct("<Q")
+DOUBLE = struct.Struct("<d")
+BITS = struct.Struct("<Q")
+
+# meta layout
+DEPTH_MASK = 0xFFFF
+FLAG_SHIFT = 16
+GENERATION_SHIFT = 24
+MOVE_SHIFT = 32  # row in bits 32-39, column in bits 40-47
+HAS_MOVE = 1 << 48
+VALID = 1 << 49
+
+KEY_MASK = (1 << 64) - 1
+
+
+class SharedTranspositionTable(TranspositionTable):
+    def __init__(self, max_bytes=None, name=None):
+        # Creates a new block of at most max_bytes, or attaches to the block called name
+        if name is None:
+            slots = 1
+            while HEADER.size + slots * 2 * SLOT.size <= max_bytes:
+                slots *= 2
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + slots * SLOT.size)
+            self.shm.buf[:HEADER.size + slots * SLOT.size] = bytes(HEADER.size + slots * SLOT.size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self.slots = (len(self.buf) - HEADER.size) // SLOT.size
+        # Block sizes can be rounded up to a page, so keep to the largest power of two that fits
+        while self.slots & (self.slots - 1):
+            self.slots &= self.slots - 1
+        self.max_bytes = HEADER.size + self.slots * SLOT.size
+        self.mask = self.slots - 1
+        self.generation = HEADER.unpack_from(self.buf, 0)[0] & 0xFF
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def next_generation(self):
+        # Called by the coordinating process before each search
+        generation = (HEADER.unpack_from(self.buf, 0)[0] + 1) & 0xFF
+        HEADER.pack_into(self.buf, 0, generation)
+        self.generation = generation
+
+    def new_search(self):
+        self.generation = HEADER.unpack_from(self.buf, 0)[0] & 0xFF
+
+    def probe(self, key):
+        check, score_bits, meta = SLOT.unpack_from(self.buf, HEADER.size + (key & self.mask) * SLOT.size)
+        if not meta & VALID:
+            self.misses += 1
+            return None
+        if check ^ score_bits ^ meta != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        best_move = (meta >> MOVE_SHIFT & 0xFF, meta >> (MOVE_SHIFT + 8) & 0xFF) if meta & HAS_MOVE else None
+        return (key, meta & DEPTH_MASK, meta >> FLAG_SHIFT & 0xFF, DOUBLE.unpack(BITS.pack(score_bits))[0],
+                best_move, meta >> GENERATION_SHIFT & 0xFF)
+
+    def store(self, key, depth, flag, score, best_move):
+        offset = HEADER.size + (key & self.mask) * SLOT.size
+        old_meta = SLOT.unpack_from(self.buf, offset)[2]
+        if (old_meta & VALID and depth < (old_meta & DEPTH_MASK)
+                and old_meta >> GENERATION_SHIFT & 0xFF == self.generation):
+            return
+        meta = VALID | depth & DEPTH_MASK | flag << FLAG_SHIFT | self.generation << GENERATION_SHIFT
+        if best_move is not None:
+            meta |= HAS_MOVE | best_move[0] << MOVE_SHIFT | best_move[1] << (MOVE_SHIFT + 8)
+        score_bits = BITS.unpack(DOUBLE.pack(score))[0]
+        SLOT.pack_into(self.buf, offset, (key ^ score_bits ^ meta) & KEY_MASK, score_bits, meta)
+        self.stores += 1
+
+    def clear(self):
+        self.buf[:self.max_bytes] = bytes(self.max_bytes)
+        self.generation = 0
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def stats(self):
+        return {
+            "slots": self.slots,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def close(self):
+        # Detaches this process; the creating process also frees the block
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
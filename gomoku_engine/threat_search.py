@@ -0,0 +1,265 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Threat-Space Search ========
+# Looks for forced wins made of threats the defender has to answer, which a
+# fixed-depth alpha-beta only sees when it happens to search deep enough:
+#   * VCF (victory by continuous fours): every attacker move makes a four, so
+#     the defender's reply is forced and the tree is a single line;
+#   * VCT (victory by continuous threats): attacker moves may also make open
+#     threes, and every defence that touches the threat is tried.
+# Only threat moves are expanded, so 15-20 ply wins take a few hundred nodes.
+#
+# Threats are read from the BitBoard's per-line masks: a window of win_count
+# cells with no defender stone and win_count - 1 attacker stones has a winning
+# cell, one with win_count - 2 has two cells that each make a four, and so on.
+#
+# A VCF found is a proof. A VCT is proven against the defences considered:
+# the cells of the threat's follow-up four sequence, the cells of every window
+# the threat lives in, and the defender's own fours. So at the root only a VCF
+# is played outright; a VCT move is handed to the main search to try first.
+VCF_DEPTH = 12  # Attacker moves in a VCF, i.e. up to 23 plies
+VCT_DEPTH = 3  # Threes in a VCT, each followed by a VCF
+NODE_LIMIT = 2000  # Per solver, so a search never stalls the engine
+
+ROWS, COLS, DIAGS, ANTI_DIAGS = range(4)
+
+
+class ThreatSearch:
+    def __init__(self, board, vcf_depth=VCF_DEPTH, vct_depth=VCT_DEPTH, node_limit=NODE_LIMIT, deadline=None):
+        self.board = board
+        self.vcf_depth = vcf_depth
+        self.vct_depth = vct_depth
+        self.node_limit = node_limit
+        self.deadline = deadline  # Optional search Deadline; once it expires the solver stops as at the node limit
+        self.nodes = 0
+        self.timed_out = False
+        self.failed = {}  # (hash, attacker, kind) -> depth that was searched without success
+        size = board.size
+        self.lengths = ([size] * size, [size] * size, board.diag_lengths, board.anti_diag_lengths)
+
+    def exhausted(self):
+        # Whether the node limit or the deadline has been reached
+        if not self.timed_out and self.deadline is not None and self.deadline.expired():
+            self.timed_out = True
+        return self.timed_out or self.nodes > self.node_limit
+
+    # ======== Threat Detection ========
+    def _cell(self, family, index, bit):
+        size = self.board.size
+        if family == ROWS:
+            return index, bit
+        if family == COLS:
+            return bit, index
+        if family == DIAGS:
+            offset = index - (size - 1)
+            return (bit, bit + offset) if offset >= 0 else (bit - offset, bit)
+        row = bit + max(0, index - size + 1)
+        return row, index - row
+
+    def _window_cells(self, player, opponent, stones):
+        # Empty cells of every window holding exactly `stones` of player's stones and none of opponent's
+        board, win_count = self.board, self.board.win_count
+        full = (1 << win_count) - 1
+        player_lines, opponent_lines = board.player_masks(player), board.player_masks(opponent)
+        cells = set()
+        for family in (ROWS, COLS, DIAGS, ANTI_DIAGS):
+            for index, player_mask in enumerate(player_lines[family]):
+                if bin(player_mask).count("1") < stones:
+                    continue
+                opponent_mask = opponent_lines[family][index]
+                for start in range(self.lengths[family][index] - win_count + 1):
+                    window = full << start
+                    if opponent_mask & window or bin(player_mask & window).count("1") != stones:
+                        continue
+                    free = window & ~player_mask
+                    while free:
+                        low = free & -free
+                        cells.add(self._cell(family, index, low.bit_length() - 1))
+                        free ^= low
+        return cells
+
+    def winning_cells(self, player, opponent):
+        # Cells where player would complete win_count in a row
+        return self._window_cells(player, opponent, self.board.win_count - 1)
+
+    def four_moves(self, player, opponent):
+        # Cells where player would make a four (a winning cell next move)
+        return self._window_cells(player, opponent, self.board.win_count - 2)
+
+    def three_moves(self, player, opponent):
+        # Cells after which player can make an open four (two winning cells) in one more move
+        return [move for move in sorted(self._window_cells(player, opponent, self.board.win_count - 3))
+                if self._makes_three(move[0], move[1], player, opponent)]
+
+    def _line_wins(self, player_mask, opponent_mask, length):
+        # Bits of the cells that complete win_count in a row within one line
+        win_count = self.board.win_count
+        full = (1 << win_count) - 1
+        wins = 0
+        for start in range(length - win_count + 1):
+            window = full << start
+            if not opponent_mask & window and bin(player_mask & window).count("1") == win_count - 1:
+                wins |= window & ~player_mask
+        return wins
+
+    def _makes_three(self, r, c, player, opponent):
+        # Checked line by line on the masks, without touching the board: after (r, c), is there a
+        # cell in one of its lines that would leave two winning cells in that line?
+        size, win_count = self.board.size, self.board.win_count
+        full = (1 << win_count) - 1
+        positions = (c, r, min(r, c), r - max(0, r + c - size + 1))
+        for (player_mask, opponent_mask, length), position in zip(
+                self.board.lines_through(r, c, player, opponent), positions):
+            player_mask |= 1 << position
+            for start in range(max(0, position - win_count + 1), min(position, length - win_count) + 1):
+                window = full << start
+                if opponent_mask & window or bin(player_mask & window).count("1") != win_count - 2:
+                    continue
+                free = window & ~player_mask
+                while free:
+                    low = free & -free
+                    if bin(self._line_wins(player_mask | low, opponent_mask, length)).count("1") >= 2:
+                        return True
+                    free ^= low
+        return False
+
+    # ======== VCF ========
+    def vcf(self, attacker, defender, depth=None):
+        # Winning line by continuous fours, or None: attacker moves alternating with the forced replies,
+        # ending with a move that makes five or leaves two winning cells
+        board = self.board
+        depth = self.vcf_depth if depth is None else depth
+        self.nodes += 1
+        wins = self.winning_cells(attacker, defender)
+        if wins:
+            return [min(wins)]
+        if depth == 0 or self.exhausted():
+            return None
+        key = (board.hash, attacker, "vcf")
+        if self.failed.get(key, -1) >= depth:
+            return None
+        threats = self.winning_cells(defender, attacker)
+        candidates = self.four_moves(attacker, defender)
+        if threats:
+            # A four does not stop the defender's five, so the only moves left are fours that also block it
+            candidates = candidates & threats if len(threats) == 1 else set()
+        for move in sorted(candidates):
+            board.make(move[0], move[1], attacker)
+            gains = self.winning_cells(attacker, defender)
+            line = None
+            if len(gains) >= 2:
+                line = [move]
+            elif gains:
+                reply = gains.pop()
+                board.make(reply[0], reply[1], defender)
+                rest = self.vcf(attacker, defender, depth - 1)
+                board.unmake(reply[0], reply[1])
+                if rest is not None:
+                    line = [move, reply] + rest
+            board.unmake(move[0], move[1])
+            if line is not None:
+                return line
+        self.failed[key] = depth
+        return None
+
+    # ======== VCT ========
+    def vct(self, attacker, defender, depth=None):
+        # First move of a forced win by fours and open threes, or None
+        board = self.board
+        depth = self.vct_depth if depth is None else depth
+        line = self.vcf(attacker, defender)
+        if line is not None:
+            return line[0]
+        if depth == 0 or self.exhausted() or self.winning_cells(defender, attacker):
+            return None
+        key = (board.hash, attacker, "vct")
+        if self.failed.get(key, -1) >= depth:
+            return None
+        for move in self.three_moves(attacker, defender):
+            self.nodes += 1
+            board.make(move[0], move[1], attacker)
+            wins = not self._defender_survives(attacker, defender, depth)
+            board.unmake(move[0], move[1])
+            if wins:
+                return move
+        self.failed[key] = depth
+        return None
+
+    def _defender_survives(self, attacker, defender, depth):
+        # After an attacker three, with the defender to move. The three is no threat without a
+        # follow-up VCF, and it loses outright if the defender, moving freely, has a VCF of its own.
+        board = self.board
+        follow_up = self.vcf(attacker, defender)
+        if follow_up is None or self.vcf(defender, attacker) is not None:
+            return True
+        defences = set(follow_up[::2]) | set(follow_up[1::2])
+        defences |= self._window_cells(attacker, defender, board.win_count - 2)
+        defences |= self.four_moves(defender, attacker)
+        for reply in sorted(defences):
+            if not board.is_empty(*reply):
+                continue
+            board.make(reply[0], reply[1], defender)
+            refuted = self.vct(attacker, defender, depth - 1) is None
+            board.unmake(reply[0], reply[1])
+            if refuted:
+                return True
+        return False
+
+
+ROOT_CACHE_SIZE = 64
+_root_cache = {}  # (hash, player, opponent) -> (result, cut short), so iterative deepening solves a position once
+
+
+def threat_space_root(board, player, opponent, deadline=None):
+    # Run before the main search. Returns (move, first_move, defences): move wins by force (a VCF) for
+    # player; first_move starts a VCT for player, for the main search to try first; otherwise, when
+    # opponent has a forced win, defences are the moves that stop it (or just touch it, if none does)
+    # and the main search should only consider those. The search stops at deadline, if given, like at
+    # the node limit. A result cut short that way is reused only by calls with no time left to improve
+    # it: without a deadline (depth 1 of iterative deepening) or with an expired one.
+    key = (board.hash, player, opponent)
+    cached = _root_cache.get(key)
+    if cached is not None and (not cached[1] or deadline is None or deadline.expired()):
+        return cached[0]
+    solver = ThreatSearch(board, deadline=deadline)
+    result = _solve_root(solver, board, player, opponent)
+    _root_cache.pop(key, None)
+    if len(_root_cache) >= ROOT_CACHE_SIZE:
+        del _root_cache[next(iter(_root_cache))]
+    _root_cache[key] = (result, solver.timed_out)
+    return result
+
+
+def _solve_root(solver, board, player, opponent):
+    line = solver.vcf(player, opponent)
+    if line is not None:
+        return line[0], None, None
+    threats = solver.winning_cells(opponent, player)
+    if not threats:
+        move = solver.vct(player, opponent)
+        if move is not None:
+            return None, move, None
+    attack = solver.vcf(opponent, player)
+    kind = "vcf"
+    if attack is None:
+        move = solver.vct(opponent, player)
+        if move is None:
+            return None, None, None
+        attack, kind = [move], "vct"
+    candidates = set(attack) | threats
+    candidates |= solver._window_cells(opponent, player, board.win_count - 2)
+    candidates |= solver.four_moves(player, opponent)
+    candidates = sorted(move for move in candidates if board.is_empty(*move))
+    defences = []
+    for move in candidates:
+        board.make(move[0], move[1], player)
+        if kind == "vcf":
+            stopped = solver.vcf(opponent, player) is None
+        else:
+            stopped = solver.vct(opponent, player) is None
+        board.unmake(move[0], move[1])
+        if stopped:
+            defences.append(move)
+    if solver.exhausted():
+        # Out of budget, a defence may only look like one; leave the choice to the main search
+        return None, None, None
+    return None, None, defences or candidates
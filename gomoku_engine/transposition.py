@@ -0,0 +1,100 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Transposition Table ========
+# Fixed-size table of search results keyed by the BitBoard's Zobrist hash, so
+# positions reached through different move orders are searched once.
+#
+# Each slot holds (key, depth, flag, score, best_move, generation). A slot is
+# chosen by the low bits of the key; the full key is stored to tell a real hit
+# from a collision. Replacement is depth-preferred: a deeper result is kept
+# unless it belongs to an earlier search (older generation), so a table that
+# lives across moves does not fill up with stale deep entries.
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Hashes of min nodes (opponent to move) are XORed with this so the same stones
+# with the other side to move get a different key
+MIN_NODE_KEY = 0x9E3779B97F4A7C15
+
+# Rough CPython footprint of one stored entry tuple plus its list slot
+ENTRY_BYTES = 160
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TranspositionTable:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        slots = 1
+        while slots * 2 * ENTRY_BYTES <= max_bytes:
+            slots *= 2
+        self.max_bytes = max_bytes
+        self.mask = slots - 1
+        self.entries = [None] * slots
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        # Entries from earlier searches stay readable but become replaceable
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, score, best_move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or depth >= entry[1] or entry[5] != self.generation:
+            self.entries[index] = (key, depth, flag, score, best_move, self.generation)
+            self.stores += 1
+
+    def probe_bounds(self, key, depth, alpha, beta):
+        # Returns (score or None, alpha, beta, best_move). The window is narrowed by a stored bound
+        # of sufficient depth, and score is set when that already decides the node. best_move is
+        # returned from any matching entry, whatever its depth, for move ordering.
+        entry = self.probe(key)
+        if entry is None:
+            return None, alpha, beta, None
+        best_move = entry[4]
+        if entry[1] < depth:
+            return None, alpha, beta, best_move
+        flag, score = entry[2], entry[3]
+        if flag == EXACT:
+            return score, alpha, beta, best_move
+        if flag == LOWER_BOUND:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        return (score if alpha >= beta else None), alpha, beta, best_move
+
+    def store_bounds(self, key, depth, alpha, beta, score, best_move):
+        # alpha/beta are the window the node was searched with
+        flag = UPPER_BOUND if score <= alpha else LOWER_BOUND if score >= beta else EXACT
+        self.store(key, depth, flag, score, best_move)
+
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+        self.generation = 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def stats(self):
+        return {
+            "slots": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate(),
+        }
@@ -0,0 +1,418 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Game Server ========
+# Hosts many human-vs-AI games at once over a small JSON HTTP API, on asyncio
+# in one process. The searches run in a bounded pool of worker processes, so
+# throughput grows with cores, not with the number of games.
+#
+#   POST   /games               {"ai": "alphabeta"|"minimax", "depth": 3, "time": null, "ai_first": false}
+#   GET    /games/<id>          board, moves, side to move, winner
+#   POST   /games/<id>/move     {"row": 7, "col": 7} -> the human move, then the AI's reply
+#   POST   /games/<id>/ai       the AI's move, when an earlier request left it to move
+#   DELETE /games/<id>
+#   GET    /stats               queue depth, running searches, per-move latency percentiles
+#
+# AI moves are queued per game and the pool takes them round-robin across
+# games, so one busy game cannot starve the others. Every move request has a
+# deadline (--deadline seconds after it arrives): a move still queued then is
+# answered 503 and can be asked for again with /ai, and a running search
+# returns the best move of the iterations it finished in time. A search that
+# fails is answered 500, also leaving the AI to move. Each worker keeps one
+# Engine, transposition table and history warm for every game it serves.
+# Request bodies over MAX_BODY bytes are answered 413, and a client slower
+# than READ_TIMEOUT to send its headers or body is answered 408.
+#
+#   python server.py [--port 8765] [--workers N] [--evaluation pattern] [--deadline 10] [--max-queued 1000]
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gomoku_engine import (AI_ALPHABETA, AI_MINIMAX, HUMAN, Deadline, Engine, MoveOrderer, create_board,
+                           is_board_full, is_valid_move, winning_line_at)
+
+DEFAULT_PORT = 8765
+DEFAULT_EVALUATION = "pattern"
+DEFAULT_DEPTH = 3
+DEFAULT_DEADLINE = 10.0  # Seconds from a move request to the AI's reply
+MAX_DEPTH = 6  # Deepest search a game may ask for
+DEFAULT_MAX_QUEUED = 1000  # AI moves waiting for a worker before requests are refused
+LATENCY_WINDOW = 1000  # Recent AI moves the latency percentiles are taken over
+TABLE_MB = 32  # Per worker
+MAX_BODY = 4096  # Bytes; every request body is a small JSON object
+READ_TIMEOUT = 10.0  # Seconds a client has to send the request line and headers, and again the body
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+# ======== Search Workers ========
+_worker = None  # (settings, Engine, TranspositionTable, MoveOrderer) of this worker process
+
+
+def _search(settings, cells, player, opponent, algorithm, depth, time_limit, expires_at):
+    # Runs in a worker: iterative deepening up to depth (or for time_limit), never past expires_at
+    global _worker
+    if _worker is None or _worker[0] != settings:
+        engine = Engine(**settings)
+        _worker = (settings, engine, engine.new_table(), MoveOrderer())
+    _, engine, tt, orderer = _worker
+    move = engine.get_book_move(cells, player, opponent)
+    if move is not None:
+        return move
+    if algorithm == "minimax":
+        search = lambda b, p, o, d, dl: engine.minimax_decision(b, p, o, d, dl)
+    else:
+        search = lambda b, p, o, d, dl: engine.alpha_beta_search(b, p, o, d, tt, orderer, dl)
+    if time_limit is not None:
+        expires_at = min(expires_at, time.monotonic() + time_limit)
+        depth = None
+    return engine.iterative_deepening_search(cells, player, opponent, None, search, max_depth=depth,
+                                             deadline=Deadline.at(expires_at))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    # A request answered with status and error before it is routed
+    def __init__(self, status, error):
+        super().__init__(error)
+        self.status = status
+
+
+class FairScheduler:
+    # Runs jobs in the pool, at most one per worker at a time, taking the next job from the next game in turn
+    def __init__(self, executor, workers, max_queued=DEFAULT_MAX_QUEUED):
+        self.executor = executor
+        self.workers = workers
+        self.max_queued = max_queued
+        self.queues = {}  # Game id -> deque of (job args, deadline, future, queued at, expiry timer)
+        self.turns = deque()  # Game ids with queued jobs, in the order they are served
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.expired = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # Seconds from submit to result
+        self.ready = None
+        self.dispatchers = []
+
+    def start(self):
+        self.ready = asyncio.Semaphore(0)
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def submit(self, game_id, args, expires_at):
+        if self.queued >= self.max_queued:
+            raise QueueFull()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Fails the job at its deadline if no worker has taken it by then, rather than when one frees up
+        timer = loop.call_later(max(0.0, expires_at - time.monotonic()), self._expire, game_id, future)
+        if game_id not in self.queues:
+            self.queues[game_id] = deque()
+            self.turns.append(game_id)
+        self.queues[game_id].append((args, expires_at, future, time.monotonic(), timer))
+        self.queued += 1
+        self.ready.release()
+        return await future
+
+    def _expire(self, game_id, future):
+        if future.done():
+            return
+        jobs = self.queues.get(game_id, ())
+        for job in jobs:
+            if job[2] is future:
+                jobs.remove(job)
+                if not jobs:
+                    del self.queues[game_id]
+                    self.turns.remove(game_id)
+                self.queued -= 1
+                self.expired += 1
+                future.set_exception(DeadlineExceeded())
+                return
+
+    def _next(self):
+        game_id = self.turns.popleft()
+        jobs = self.queues[game_id]
+        job = jobs.popleft()
+        if jobs:
+            self.turns.append(game_id)
+        else:
+            del self.queues[game_id]
+        self.queued -= 1
+        return job
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.ready.acquire()
+            if not self.turns:  # Its job expired in the queue
+                continue
+            args, expires_at, future, queued_at, timer = self._next()
+            timer.cancel()
+            if future.cancelled():
+                continue
+            if time.monotonic() >= expires_at:
+                self.expired += 1
+                future.set_exception(DeadlineExceeded())
+                continue
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self.executor, _search, *args, expires_at)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                self.completed += 1
+                self.latencies.append(time.monotonic() - queued_at)
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.running -= 1
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        percentiles = {}
+        if latencies:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+            percentiles = {f"p{p}": round(cuts[p - 1] * 1000, 1) for p in (50, 90, 99)}
+            percentiles["max"] = round(latencies[-1] * 1000, 1)
+        return {"queue_depth": self.queued, "running": self.running, "workers": self.workers,
+                "completed": self.completed, "expired": self.expired, "games_queued": len(self.turns),
+                "latency_ms": percentiles}
+
+
+# ======== Games ========
+class GameSession:
+    def __init__(self, game_id, ai, depth, time_limit):
+        self.id = game_id
+        self.ai_symbol = AI_MINIMAX if ai == "minimax" else AI_ALPHABETA
+        self.algorithm = ai
+        self.depth = depth
+        self.time_limit = time_limit
+        self.board = create_board()
+        self.moves = []
+        self.to_move = HUMAN
+        self.winner = None
+        self.over = False
+        self.lock = asyncio.Lock()  # One move request per game at a time
+
+    def play(self, r, c):
+        player = self.to_move
+        self.board[r][c] = player
+        self.moves.append((r, c))
+        if winning_line_at(self.board, r, c) is not None:
+            self.winner, self.over = player, True
+        elif is_board_full(self.board, len(self.moves)):
+            self.over = True
+        self.to_move = HUMAN if player == self.ai_symbol else self.ai_symbol
+
+    def state(self):
+        return {"game": self.id, "ai": self.algorithm, "ai_symbol": self.ai_symbol, "human_symbol": HUMAN,
+                "board": ["".join(row) for row in self.board], "moves": self.moves, "to_move": self.to_move,
+                "over": self.over, "winner": self.winner}
+
+
+class GameServer:
+    def __init__(self, settings, workers, deadline=DEFAULT_DEADLINE, max_queued=DEFAULT_MAX_QUEUED):
+        self.settings = settings
+        self.deadline = deadline
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.scheduler = FairScheduler(self.executor, workers, max_queued)
+        self.games = {}
+        self.ids = itertools.count(1)
+
+    async def ai_move(self, game):
+        args = (self.settings, [row[:] for row in game.board], game.ai_symbol, HUMAN, game.algorithm, game.depth,
+                game.time_limit)
+        move = await self.scheduler.submit(game.id, args, time.monotonic() + self.deadline)
+        if move is None:
+            raise RuntimeError("the search returned no move")
+        game.play(*move)
+        return move
+
+    # ======== Routes ========
+    async def route(self, method, path, body):
+        # (status, JSON-able response)
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["stats"] and method == "GET":
+            return 200, dict(self.scheduler.stats(), games=len(self.games))
+        if parts == ["games"] and method == "POST":
+            return await self.new_game(body)
+        if len(parts) >= 2 and parts[0] == "games":
+            game = self.games.get(parts[1])
+            if game is None:
+                return 404, {"error": "no such game"}
+            if len(parts) == 2 and method == "GET":
+                return 200, game.state()
+            if len(parts) == 2 and method == "DELETE":
+                del self.games[game.id]
+                return 200, {"deleted": game.id}
+            if parts[2:] == ["move"] and method == "POST":
+                return await self.human_move(game, body)
+            if parts[2:] == ["ai"] and method == "POST":
+                return await self.resume(game)
+            return 405, {"error": f"{method} not allowed here"}
+        return 404, {"error": "not found"}
+
+    async def new_game(self, body):
+        ai = body.get("ai", "alphabeta")
+        depth = body.get("depth", DEFAULT_DEPTH)
+        time_limit = body.get("time")
+        if (ai not in ("alphabeta", "minimax") or not isinstance(depth, int) or isinstance(depth, bool)
+                or not 1 <= depth <= MAX_DEPTH):
+            return 400, {"error": f"ai must be alphabeta or minimax and depth 1-{MAX_DEPTH}"}
+        if time_limit is not None and (not isinstance(time_limit, (int, float)) or isinstance(time_limit, bool)
+                                       or time_limit <= 0):
+            return 400, {"error": "time must be a positive number of seconds"}
+        game = GameSession(str(next(self.ids)), ai, depth, time_limit)
+        self.games[game.id] = game
+        if body.get("ai_first"):
+            game.to_move = game.ai_symbol
+            async with game.lock:
+                status, error = await self.run_ai(game)
+            if error:
+                # The client never learned the id, so the game could be neither resumed nor deleted
+                del self.games[game.id]
+                return status, error
+        return 201, game.state()
+
+    async def human_move(self, game, body):
+        r, c = body.get("row"), body.get("col")
+        if not isinstance(r, int) or not isinstance(c, int) or isinstance(r, bool) or isinstance(c, bool):
+            return 400, {"error": "row and col must be integers"}
+        async with game.lock:
+            if game.over:
+                return 409, {"error": "the game is over"}
+            if game.to_move != HUMAN:
+                return 409, {"error": "not your turn"}
+            if not is_valid_move(game.board, r, c):
+                return 400, {"error": "invalid move"}
+            game.play(r, c)
+            if not game.over:
+                status, error = await self.run_ai(game)
+                if error:
+                    return status, error
+            return 200, game.state()
+
+    async def resume(self, game):
+        async with game.lock:
+            if game.over or game.to_move != game.ai_symbol:
+                return 409, {"error": "the AI is not to move"}
+            status, error = await self.run_ai(game)
+            return (status, error) if error else (200, game.state())
+
+    async def run_ai(self, game):
+        # (status, error response) when the AI could not move
+        try:
+            await self.ai_move(game)
+        except QueueFull:
+            return 503, {"error": "server busy, try again"}
+        except DeadlineExceeded:
+            return 503, {"error": "deadline passed before a worker was free; the AI is still to move"}
+        except Exception as e:  # A failed search leaves the AI to move; /ai asks again
+            return 500, {"error": f"the AI search failed: {type(e).__name__}: {e}"}
+        return 200, None
+
+    # ======== HTTP ========
+    async def read_head(self, reader):
+        # The request line's words and the headers by lower-case name
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return request_line, headers
+
+    async def read_request(self, reader):
+        # (method, path, JSON object body), or BadRequest; a client that is slower than READ_TIMEOUT to send
+        # the head, or then the body, is answered 408 so it cannot hold the connection open
+        try:
+            request_line, headers = await asyncio.wait_for(self.read_head(reader), READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise BadRequest(408, "request headers not received in time")
+        except ValueError:  # A line longer than the stream's limit
+            raise BadRequest(400, "header line too long")
+        if len(request_line) < 2:
+            raise BadRequest(400, "bad request line")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise BadRequest(400, "Content-Length must be a non-negative integer")
+        if length > MAX_BODY:
+            raise BadRequest(413, f"body over {MAX_BODY} bytes")
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise BadRequest(408, "request body not received in time")
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise BadRequest(400, "body must be a JSON object")
+        return request_line[0].upper(), request_line[1], data
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, data = await self.read_request(reader)
+            except BadRequest as e:
+                status, response = e.status, {"error": str(e)}
+            else:
+                try:
+                    status, response = await self.route(method, path, data)
+                except Exception as e:
+                    status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+            payload = json.dumps(response).encode()
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.scheduler.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving games on http://{host}:{port} with {self.scheduler.workers} search workers")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP server for concurrent human-vs-AI games")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="search processes")
+    parser.add_argument("--evaluation", default=DEFAULT_EVALUATION)
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE, help="seconds per AI move request")
+    parser.add_argument("--max-queued", type=int, default=DEFAULT_MAX_QUEUED)
+    args = parser.parse_args(argv)
+    settings = Engine(args.evaluation, table_mb=TABLE_MB).settings()
+    game_server = GameServer(settings, args.workers, args.deadline, args.max_queued)
+    try:
+        asyncio.run(game_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game_server.executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
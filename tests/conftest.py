@@ -0,0 +1,6 @@
+#====== بسم الله الرحمن الرحيم ======
+# Lets the tests import gomoku_engine and the top-level scripts when pytest is run from anywhere
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
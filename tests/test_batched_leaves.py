@@ -0,0 +1,64 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Batched Leaf Tests ========
+# Differential test: the values Engine.batched_leaf_values computes for all
+# moves of a depth-1 node in one NumPy call, against evaluate_board after
+# making each move on its own -- on random boards, for both sides moving, and
+# on a board one move from full, where every move that does not win is a draw.
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from gomoku_engine import AI_ALPHABETA, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, BitBoard, Engine
+
+BOARDS = 200
+
+
+def serial_values(engine, board, moves, mover, evaluator):
+    values = []
+    for r, c in moves:
+        evaluator.make(r, c, mover)
+        values.append(engine.evaluate_board(board, evaluator.player, evaluator.opponent, (r, c), evaluator))
+        evaluator.unmake(r, c)
+    return values
+
+
+def empty_cells(board):
+    return [(r, c) for r in range(board.size) for c in range(board.size) if board.is_empty(r, c)]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = Engine("pattern", opening_book=None)
+    assert engine.evaluation.can_batch()
+    return engine
+
+
+def test_batched_leaves_match_evaluate_board(engine):
+    rng = random.Random(7)
+    for _ in range(BOARDS):
+        board = BitBoard(BOARD_SIZE, WIN_COUNT, EMPTY)
+        evaluator = engine.create_evaluator(board, AI_ALPHABETA, HUMAN)
+        for stone in range(rng.randrange(1, 60)):
+            r, c = rng.randrange(BOARD_SIZE), rng.randrange(BOARD_SIZE)
+            if not board.is_empty(r, c):
+                continue
+            evaluator.make(r, c, AI_ALPHABETA if stone % 2 == 0 else HUMAN)
+            if board.is_win_at(r, c):  # Search nodes are never already won
+                evaluator.unmake(r, c)
+        moves = empty_cells(board)
+        for mover in (AI_ALPHABETA, HUMAN):
+            assert (engine.batched_leaf_values(board, moves, mover, evaluator) ==
+                    serial_values(engine, board, moves, mover, evaluator))
+
+
+def test_move_filling_the_board_is_a_draw(engine):
+    # Stripes two cells wide, shifted two columns a row, hold no five in any direction
+    cells = [[HUMAN if (c + 2 * r) % 4 < 2 else AI_ALPHABETA for c in range(BOARD_SIZE)] for r in range(BOARD_SIZE)]
+    cells[7][7] = EMPTY
+    board = BitBoard.from_list(cells, WIN_COUNT, EMPTY)
+    evaluator = engine.create_evaluator(board, AI_ALPHABETA, HUMAN)
+    for mover in (AI_ALPHABETA, HUMAN):
+        values = engine.batched_leaf_values(board, [(7, 7)], mover, evaluator)
+        assert values == serial_values(engine, board, [(7, 7)], mover, evaluator) == [0]
@@ -0,0 +1,43 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Engine Process Tests ========
+# Requests to a real child process: an iterative search runs its whole
+# deepening loop in the child and ends at the caller's deadline, whether it
+# expires or is stopped from another thread.
+import threading
+import time
+
+import pytest
+
+from gomoku_engine import AI_ALPHABETA, HUMAN, Deadline, Engine, SearchStats, create_board
+from gomoku_engine.engine_process import EngineProcess
+
+
+@pytest.fixture(scope="module")
+def process():
+    process = EngineProcess(Engine("pattern", opening_book=None).settings())
+    yield process
+    process.close()
+
+
+def opening():
+    board = create_board()
+    board[7][7] = HUMAN
+    return board
+
+
+def test_iterative_search_runs_in_the_child(process):
+    stats = SearchStats()
+    started = time.monotonic()
+    move = process.search(opening(), AI_ALPHABETA, HUMAN, None, deadline=Deadline(0.5), stats=stats, iterative=True)
+    assert time.monotonic() - started < 2
+    assert move is not None and opening()[move[0]][move[1]] == "."
+    assert stats.depth > 1  # Deepened past depth 1 within the budget
+    assert process.last_response["move"] == move
+
+
+def test_stopped_iterative_search_returns_its_last_iteration(process):
+    deadline = Deadline()  # No time limit: only stop() ends it
+    threading.Timer(0.3, deadline.stop).start()
+    started = time.monotonic()
+    move = process.search(opening(), AI_ALPHABETA, HUMAN, None, deadline=deadline, iterative=True)
+    assert move is not None and time.monotonic() - started < 2
@@ -0,0 +1,108 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Incremental Evaluation Tests ========
+# Differential test: random make/unmake sequences on an IncrementalEvaluator,
+# checked after every step against a full rescan of the board with the line
+# scorers the evaluator was built from -- count_patterns_in_line for
+# "classic", the window scorer lifted from the GUI's get_pattern_score for
+# "pattern" -- read straight from the symbols, not from bit masks or the
+# pattern table. Then a few whole-board scores pinned to what the original
+# evaluate_board functions (Gomoku.py's classic, GUI.py's pattern) returned
+# for the same positions, for the list board and the BitBoard alike.
+import random
+
+import pytest
+
+from gomoku_engine import (AI_ALPHABETA, AI_MINIMAX, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, BitBoard, Engine,
+                           create_board, get_evaluation)
+from gomoku_engine.bitboard import DEFAULT_RADIUS
+from gomoku_engine.board import board_lines, to_bitboard
+from gomoku_engine.evaluator import SCORE_TOLERANCE
+
+STEPS = 300
+
+
+def classic_line(evaluation, line, player, opponent):
+    return (evaluation.count_patterns_in_line(line, player, opponent) -
+            evaluation.count_patterns_in_line(line, opponent, player))
+
+
+def pattern_line(evaluation, line, player, opponent):
+    def side(current, other):
+        score = 0
+        for start in range(len(line) - WIN_COUNT + 1):
+            left = line[start - 1] if start > 0 else None
+            right = line[start + WIN_COUNT] if start + WIN_COUNT < len(line) else None
+            score += evaluation.window_pattern_score(line[start:start + WIN_COUNT], left, right, current, other)
+        return score
+    return side(player, opponent) - side(opponent, player) * evaluation.opponent_weight
+
+
+RESCANS = {"classic": classic_line, "pattern": pattern_line}
+
+
+def rescan(name, board, player, opponent):
+    # evaluate_board's score before incremental evaluation: every line scored afresh and summed
+    evaluation = get_evaluation(name)
+    return sum(RESCANS[name](evaluation, line, player, opponent)
+               for line in board_lines(board.to_list()) if len(line) >= WIN_COUNT)
+
+
+@pytest.mark.parametrize("name", sorted(RESCANS))
+@pytest.mark.parametrize("player,opponent", [(HUMAN, AI_MINIMAX), (AI_ALPHABETA, HUMAN)])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_incremental_matches_rescan(name, player, opponent, seed):
+    rng = random.Random(seed)
+    board = BitBoard(BOARD_SIZE, WIN_COUNT, EMPTY)
+    evaluator = get_evaluation(name).create_evaluator(board, player, opponent)
+    placed = []
+    for _ in range(STEPS):
+        if placed and rng.random() < 0.35:
+            # Mostly the last stone, as the search unmakes, sometimes any of them
+            r, c = placed.pop(-1 if rng.random() < 0.7 else rng.randrange(len(placed)))
+            evaluator.unmake(r, c)
+        else:
+            r, c = rng.randrange(BOARD_SIZE), rng.randrange(BOARD_SIZE)
+            if not board.is_empty(r, c):
+                continue
+            mover = player if len(placed) % 2 == 0 else opponent
+            evaluator.make(r, c, mover)
+            if board.is_win_at(r, c):  # Wins are scored by the engine, not the evaluations
+                evaluator.unmake(r, c)
+                continue
+            placed.append((r, c))
+        expected = rescan(name, board, player, opponent)
+        if name == "classic":
+            assert evaluator.score() == expected
+        else:
+            assert abs(evaluator.score() - expected) <= SCORE_TOLERANCE
+
+
+# (AI_MINIMAX stones, HUMAN stones)
+POSITIONS = {
+    "open three": ([(7, 6), (7, 7), (7, 8)], [(6, 7), (8, 8)]),
+    "closed four": ([(7, 4), (7, 5), (7, 6), (7, 7)], [(7, 3), (6, 6), (8, 8)]),
+    "crossing lines": ([(7, 7), (8, 8), (6, 8), (5, 9), (9, 6)], [(6, 6), (8, 7), (9, 9), (7, 9), (10, 5)]),
+    "edge and corner": ([(0, 0), (0, 1), (1, 1), (14, 14), (13, 14)], [(0, 2), (2, 2), (14, 13), (14, 10), (12, 14)]),
+    "five": ([(3, 3), (4, 4), (5, 5), (6, 6), (7, 7)], [(3, 4), (4, 5), (5, 6), (6, 7)]),
+}
+# Scores for AI_MINIMAX and for HUMAN to evaluate, from the original evaluate_board functions
+ORIGINAL_SCORES = {
+    "classic": {"open three": (501, -501), "closed four": (1002, -1002), "crossing lines": (498, -498),
+                "edge and corner": (-3, 3), "five": (100000, -100000)},
+    "pattern": {"open three": (3002.0, -3609.0), "closed four": (10005.4, -12021.0),
+                "crossing lines": (2979.6, -3591.8), "edge and corner": (-1.0, -5.4), "five": (1000000, -1000000)},
+}
+
+
+@pytest.mark.parametrize("name", sorted(ORIGINAL_SCORES))
+@pytest.mark.parametrize("position", sorted(POSITIONS))
+def test_whole_board_scores_match_the_original(name, position):
+    board = create_board()
+    for symbol, cells in zip((AI_MINIMAX, HUMAN), POSITIONS[position]):
+        for r, c in cells:
+            board[r][c] = symbol
+    engine = Engine(name, opening_book=None)
+    sides = [(AI_MINIMAX, HUMAN), (HUMAN, AI_MINIMAX)]
+    for (player, opponent), expected in zip(sides, ORIGINAL_SCORES[name][position]):
+        for cells in (board, to_bitboard(board, DEFAULT_RADIUS)):
+            assert engine.evaluate_board(cells, player, opponent) == pytest.approx(expected, abs=SCORE_TOLERANCE)
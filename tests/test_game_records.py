@@ -0,0 +1,130 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Game Record Tests ========
+# Round trip through the record file and its index: games written, indexed,
+# more appended after the index was built, then read back and queried, both
+# with the stale index (the new games indexed in memory) and once the index
+# has been extended to cover them. A partial record left by a crash must be
+# cut off by the next writer, or every game appended after it is lost.
+import pytest
+
+from gomoku_engine import AI_MINIMAX, BOARD_SIZE, HUMAN, create_board, game_records
+from gomoku_engine.game_records import FIRST_WON, UNFINISHED, GameRecords, GameRecordWriter, build_index
+
+# Two games sharing their first two moves, then one appended after indexing
+GAMES = [
+    [(7, 7), (7, 8), (6, 6), (0, 0), (5, 5), (0, 1), (4, 4), (0, 2), (3, 3)],  # HUMAN wins on the diagonal
+    [(7, 7), (7, 8), (8, 8), (9, 9)],  # Left unfinished
+]
+LATE_GAME = [(7, 7), (7, 8), (6, 6), (6, 8)]
+
+
+def play(writer, moves):
+    game = writer.new_game(create_board(), HUMAN, AI_MINIMAX)
+    for r, c in moves:
+        game.move(r, c)
+    game.close()
+
+
+def board_after(moves):
+    board = create_board()
+    for ply, (r, c) in enumerate(moves):
+        board[r][c] = HUMAN if ply % 2 == 0 else AI_MINIMAX
+    return board
+
+
+def check(records):
+    assert len(records) == 3
+    for number, moves in enumerate(GAMES + [LATE_GAME]):
+        game = records.game(number)
+        assert game["moves"] == moves
+        assert (game["first"], game["second"], game["size"]) == (HUMAN, AI_MINIMAX, BOARD_SIZE)
+    assert records.game(0)["result"] == FIRST_WON
+    assert records.game(1)["result"] == records.game(2)["result"] == UNFINISHED
+
+    # After (7, 7), (7, 8) every game continues, HUMAN to move
+    shared = board_after([(7, 7), (7, 8)])
+    assert sorted(records.games_reaching(shared, HUMAN, AI_MINIMAX)) == [(0, 2), (1, 2), (2, 2)]
+    stats = records.move_stats(shared, HUMAN, AI_MINIMAX)
+    assert [(s["move"], s["games"], s["wins"], s["unfinished"]) for s in stats] == [((6, 6), 2, 1, 1),
+                                                                                    ((8, 8), 1, 0, 1)]
+    # Only the late game reached this, and ended there
+    late = board_after(LATE_GAME)
+    assert records.games_reaching(late, HUMAN, AI_MINIMAX) == [(2, 4)]
+    assert records.move_stats(late, HUMAN, AI_MINIMAX) == []
+    # Keys do not depend on the symbols
+    swapped = [["Y" if cell == HUMAN else cell for cell in row] for row in shared]
+    assert len(records.games_reaching(swapped, "Y", AI_MINIMAX)) == 3
+
+
+def test_round_trip_with_games_after_the_index(tmp_path):
+    path = str(tmp_path / "games.gmkr")
+    writer = GameRecordWriter(path)
+    for moves in GAMES:
+        play(writer, moves)
+    writer.close()
+    assert build_index(path) == (2, sum(len(moves) + 1 for moves in GAMES))
+
+    writer = GameRecordWriter(path)
+    play(writer, LATE_GAME)
+    writer.close()
+
+    records = GameRecords(path)
+    assert (records.indexed_games, len(records.offsets)) == (2, 1)
+    check(records)
+    records.close()
+
+    # Extending the index reads only the late game and gives the same answers from the index alone
+    assert build_index(path) == (3, sum(len(moves) + 1 for moves in GAMES + [LATE_GAME]))
+    records = GameRecords(path)
+    assert (records.indexed_games, len(records.offsets)) == (3, 0)
+    check(records)
+    records.close()
+    extended = _index_bytes(path)
+    build_index(path, rebuild=True)
+    assert _index_bytes(path) == extended
+
+
+def _index_bytes(path):
+    with open(path + ".idx", "rb") as f:
+        return f.read()
+
+
+def test_stale_index_warns(tmp_path, monkeypatch):
+    path = str(tmp_path / "games.gmkr")
+    writer = GameRecordWriter(path)
+    play(writer, GAMES[0])
+    writer.close()
+    build_index(path)
+    writer = GameRecordWriter(path)
+    for moves in GAMES[1:] + [LATE_GAME]:
+        play(writer, moves)
+    writer.close()
+    monkeypatch.setattr(game_records, "STALE_GAMES", 1)
+    with pytest.warns(UserWarning, match="2 games"):
+        GameRecords(path).close()
+
+
+def test_writer_cuts_off_a_partial_record(tmp_path):
+    path = str(tmp_path / "games.gmkr")
+    writer = GameRecordWriter(path)
+    play(writer, GAMES[0])
+    writer.close()
+    with open(path, "rb") as f:
+        data = f.read()
+    writer = GameRecordWriter(path)
+    play(writer, GAMES[1])
+    writer.close()
+    with open(path, "rb") as f:
+        record = f.read()[len(data):]
+    # As a crash mid-write would leave it: the second game's record without its last bytes
+    with open(path, "wb") as f:
+        f.write(data + record[:-3])
+
+    writer = GameRecordWriter(path)
+    play(writer, LATE_GAME)
+    writer.close()
+    records = GameRecords(path)
+    assert len(records) == 2
+    assert [records.game(number)["moves"] for number in range(2)] == [GAMES[0], LATE_GAME]
+    records.close()
+    assert build_index(path) == (2, len(GAMES[0]) + len(LATE_GAME) + 2)
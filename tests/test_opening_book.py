@@ -0,0 +1,78 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Opening Book Tests ========
+# A book stores each position once, under the smallest key of its 8 rotations
+# and reflections, so a lookup on any of them must find it and return the
+# stored move carried through the same rotation or reflection.
+import pytest
+
+from gomoku_engine import AI_ALPHABETA, BOARD_SIZE, EMPTY, HUMAN, WIN_COUNT, Engine, create_board
+from gomoku_engine.opening_book import OpeningBook, book_key, build_book, position_stones, symmetries, write_book
+
+TRANSFORMS = symmetries(BOARD_SIZE)
+
+
+def transformed(board, transform):
+    result = create_board()
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell != EMPTY:
+                rr, cc = transform(r, c)
+                result[rr][cc] = cell
+    return result
+
+
+def after(board, move, mover, waiting):
+    # Book key of board once mover has played move, with waiting to move
+    board = [row[:] for row in board]
+    board[move[0]][move[1]] = mover
+    return book_key(BOARD_SIZE, *position_stones(board, waiting, mover))[0]
+
+
+def check_symmetries(book, board, mover, waiting):
+    move, score = book.lookup(board, mover, waiting)
+    images = [transformed(board, transform) for transform in TRANSFORMS]
+    symmetric = len({str(image) for image in images}) < len(images)
+    for transform, image in zip(TRANSFORMS, images):
+        found, found_score = book.lookup(image, mover, waiting)
+        assert found_score == score
+        if symmetric:
+            # The board maps onto itself, so the stored move may come back as any of its equivalent images
+            assert after(image, found, mover, waiting) == after(board, move, mover, waiting)
+        else:
+            assert found == transform(*move)
+
+
+def test_written_position_under_every_symmetry(tmp_path):
+    # No rotation or reflection maps these stones onto themselves, so all 8 boards differ
+    board = create_board()
+    for r, c in [(7, 7), (6, 9)]:
+        board[r][c] = HUMAN
+    board[9][6] = AI_ALPHABETA
+    key, index = book_key(BOARD_SIZE, *position_stones(board, AI_ALPHABETA, HUMAN))
+    path = str(tmp_path / "book.bin")
+    write_book(path, {key: TRANSFORMS[index](5, 10) + (42.0,)}, BOARD_SIZE, WIN_COUNT, 6, "classic")
+    book = OpeningBook(path)
+    assert book.lookup(board, AI_ALPHABETA, HUMAN) == ((5, 10), 42.0)
+    check_symmetries(book, board, AI_ALPHABETA, HUMAN)
+    book.close()
+    # The score is on the classic evaluation's scale, so an engine with another evaluation gets the move only
+    assert Engine("classic", opening_book=path).get_book_entry(board, AI_ALPHABETA, HUMAN) == ((5, 10), 42.0)
+    assert Engine("pattern", opening_book=path).get_book_entry(board, AI_ALPHABETA, HUMAN) == ((5, 10), None)
+
+
+@pytest.mark.parametrize("evaluation", ["classic", "pattern"])
+def test_built_book_under_every_symmetry(tmp_path, evaluation):
+    path = str(tmp_path / "book.bin")
+    build_book(path, plies=4, depth=1, width=2, evaluation=evaluation)
+    book = OpeningBook(path)
+    assert book.evaluation == evaluation
+    # Follow the book's own line from the empty board, checking every position on it; the first ones map
+    # onto themselves under some symmetries, the later ones under none
+    board, mover, waiting = create_board(), HUMAN, AI_ALPHABETA
+    for _ in range(4):
+        check_symmetries(book, board, mover, waiting)
+        r, c = book.lookup(board, mover, waiting)[0]
+        board[r][c] = mover
+        mover, waiting = waiting, mover
+    assert book.lookup(board, mover, waiting) is None  # Past the book's plies
+    book.close()
@@ -0,0 +1,101 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Parallel Search Tests ========
+# Root-parallel search must return what the serial root loop returns at the
+# same depth: the move, and for alpha-beta the root score it stores in the
+# table. Lazy SMP with a time limit answers from its deeper worker when that
+# one finishes in time. Then the shared-memory table's lockless check: a slot
+# whose words do not XOR back to the probed key is a miss.
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from gomoku_engine import AI_ALPHABETA, HUMAN, Deadline, Engine, create_board
+from gomoku_engine.board import to_bitboard
+from gomoku_engine.shared_transposition import HEADER, SLOT, SharedTranspositionTable
+from gomoku_engine.transposition import EXACT, LOWER_BOUND
+
+POSITIONS = [
+    ([(7, 7)], [(6, 7)]),
+    ([(7, 7), (8, 8)], [(6, 6), (7, 8)]),
+    ([(7, 7), (7, 8), (9, 6)], [(6, 6), (8, 7), (5, 5)]),
+]
+
+
+def position(stones):
+    board = create_board()
+    for symbol, cells in zip((AI_ALPHABETA, HUMAN), stones):
+        for r, c in cells:
+            board[r][c] = symbol
+    return board
+
+
+def process_pool_available():
+    try:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            return pool.submit(abs, -1).result(timeout=60) == 1
+    except (OSError, NotImplementedError, RuntimeError):
+        return False
+
+
+@pytest.fixture(scope="module")
+def engines():
+    if not process_pool_available():
+        pytest.skip("no process pool on this platform")
+    # Without the threat search every position goes through the root loop
+    serial = Engine("pattern", threat_search=False, opening_book=None)
+    parallel = Engine("pattern", threat_search=False, opening_book=None, workers=2)
+    yield serial, parallel
+    parallel.close()
+
+
+@pytest.mark.parametrize("stones", POSITIONS)
+def test_root_parallel_alpha_beta_matches_serial(engines, stones):
+    board = position(stones)
+    results = []
+    for engine in engines:
+        tt = engine.new_table()
+        move = engine.alpha_beta_search(board, AI_ALPHABETA, HUMAN, 3, tt, parallel=engine.get_parallel_search())
+        key, depth, flag, score, best_move, _ = tt.probe(to_bitboard(board, engine.radius).hash)
+        assert (depth, flag, best_move) == (3, EXACT, move)
+        results.append((move, score))
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("stones", POSITIONS[:2])
+def test_root_parallel_minimax_matches_serial(engines, stones):
+    board = position(stones)
+    moves = [engine.minimax_decision(board, AI_ALPHABETA, HUMAN, 2, parallel=engine.get_parallel_search())
+             for engine in engines]
+    assert moves[0] == moves[1]
+
+
+def test_lazy_smp_uses_a_deeper_search_finished_in_time(engines):
+    engine = Engine("pattern", threat_search=False, opening_book=None, workers=2, parallel_mode="lazy_smp")
+    try:
+        board = position(POSITIONS[1])
+        lazy_smp = engine.get_parallel_search()
+        engine.alpha_beta_search(board, AI_ALPHABETA, HUMAN, 2, parallel=lazy_smp)
+        assert lazy_smp.last_report["depth"] == 2  # No time limit: worker 1 is stopped at worker 0's move
+        move = engine.alpha_beta_search(board, AI_ALPHABETA, HUMAN, 2, deadline=Deadline(60), parallel=lazy_smp)
+        assert lazy_smp.last_report["depth"] == 3
+        assert [w["completed"] for w in lazy_smp.last_report["workers"]] == [True, True]
+        assert move == engines[0].alpha_beta_search(board, AI_ALPHABETA, HUMAN, 3)
+    finally:
+        engine.close()
+
+
+def test_shared_table_rejects_a_bad_checksum():
+    table = SharedTranspositionTable(1 << 16)
+    try:
+        key = 0x123456789ABCDEF
+        table.store(key, 4, LOWER_BOUND, 12.5, (3, 4))
+        assert table.probe(key) == (key, 4, LOWER_BOUND, 12.5, (3, 4), 0)
+        assert table.probe(key + table.slots) is None  # Another position in the same slot
+        # A torn write: the check word no longer matches the score and meta beside it
+        offset = HEADER.size + (key & table.mask) * SLOT.size
+        check, score_bits, meta = SLOT.unpack_from(table.buf, offset)
+        SLOT.pack_into(table.buf, offset, check, score_bits ^ 1, meta)
+        assert table.probe(key) is None
+        assert (table.hits, table.collisions) == (1, 2)
+    finally:
+        table.close()
@@ -0,0 +1,78 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Piskvork Protocol Tests ========
+# Command sessions fed to PiskvorkEngine.run as a manager would send them,
+# checked line by line: START, BOARD ... DONE, TURN and TAKEBACK answered with
+# legal moves or OK (the only move that stops a four, when there is one), and
+# every malformed command answered with ERROR rather than a wrong position.
+import io
+
+import pytest
+
+from gomoku_engine import Engine
+from gomoku_engine.board import EMPTY
+from gomoku_engine.piskvork import OPPONENT, OWN, PiskvorkEngine
+
+
+@pytest.fixture
+def brain():
+    brain = PiskvorkEngine(Engine("pattern", opening_book=None))
+    yield brain
+    brain.close()
+
+
+def session(brain, *lines):
+    output = io.StringIO()
+    brain.run(io.StringIO("".join(line + "\n" for line in lines)), output)
+    return output.getvalue().splitlines()
+
+
+def move_of(answer):
+    x, y = (int(value) for value in answer.split(","))
+    return y, x
+
+
+def test_start_board_and_turn(brain):
+    # Their four on row 7, columns 3-6, closed at column 2 by ours: 7,7 is the only move that stops it
+    answers = session(brain, "START 15", "INFO timeout_turn 1000", "BOARD",
+                      "2,7,1", "3,7,2", "4,7,2", "5,7,2", "6,7,2", "2,8,1", "DONE")
+    assert answers[0] == "OK"
+    assert answers[1:] == ["7,7"]
+    assert brain.board[7][7] == OWN and brain.board[7][3] == OPPONENT
+    stones = sum(cell != EMPTY for row in brain.board for cell in row)
+
+    answer, = session(brain, "TURN 10,10")
+    r, c = move_of(answer)
+    assert brain.board[10][10] == OPPONENT and brain.board[r][c] == OWN
+    assert sum(cell != EMPTY for row in brain.board for cell in row) == stones + 2
+
+
+def test_takeback(brain):
+    assert session(brain, "START 15", "BOARD", "7,7,1", "8,7,2", "DONE")[0] == "OK"
+    stones = sum(cell != EMPTY for row in brain.board for cell in row)  # With the brain's own reply
+    assert session(brain, "TAKEBACK 8,7") == ["OK"]
+    assert brain.board[7][8] == EMPTY and brain.board[7][7] == OWN
+    # Only an occupied cell can be taken back
+    assert session(brain, "TAKEBACK 8,7", "TAKEBACK 0,0", "TAKEBACK 15,0") == [
+        "ERROR 8,7 is empty", "ERROR 0,0 is empty", "ERROR move 15,0 is off the board"]
+    assert sum(cell != EMPTY for row in brain.board for cell in row) == stones - 1
+
+
+@pytest.mark.parametrize("line,error", [
+    ("7,7", "ERROR bad board line '7,7'"),
+    ("a,7,1", "ERROR bad board line 'a,7,1'"),
+    ("15,7,1", "ERROR bad board line '15,7,1'"),
+    ("7,7,3", "ERROR bad field '3' at 7,7, expected 1 or 2"),
+])
+def test_bad_board_line_is_an_error(brain, line, error):
+    assert session(brain, "START 15", "BOARD", "6,7,2", line, "DONE") == ["OK", error]
+    # Back out of BOARD: the next command is read as a command
+    assert session(brain, "ABOUT")[0].startswith('name="Gomoku"')
+
+
+def test_bad_commands_are_errors(brain):
+    assert session(brain, "TURN 7,7") == ["ERROR no START"]
+    assert session(brain, "START 19") == ["ERROR only 15x15 boards are supported"]
+    assert session(brain, "START 15", "TURN 7", "TURN 7,15", "INFO timeout_turn soon", "FOO") == [
+        "OK", "ERROR bad move '7'", "ERROR move 7,15 is off the board", "ERROR bad timeout_turn", "UNKNOWN FOO"]
+    assert all(cell == EMPTY for row in brain.board for cell in row)
+    assert session(brain, "END", "ABOUT") == []
@@ -0,0 +1,144 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Game Server Tests ========
+# The routes are driven directly, without sockets or search processes:
+# request validation, the scheduler's round-robin order across games, and
+# the 503 answers for a full queue and for a move still queued at its
+# deadline, which must leave no game or queued job behind. Then raw requests
+# over a local socket: an oversized body is refused unread and a client that
+# stops sending is answered 408 instead of holding the connection.
+import asyncio
+import json
+import time
+
+import pytest
+
+import server
+from server import MAX_BODY, DeadlineExceeded, FairScheduler, GameServer
+
+SETTINGS = {"evaluation": "pattern", "opening_book": None}
+
+
+def run(game_server, method, path, body=None):
+    return asyncio.run(game_server.route(method, path, {} if body is None else body))
+
+
+@pytest.fixture
+def game_server():
+    game_server = GameServer(SETTINGS, workers=1)
+    yield game_server
+    game_server.executor.shutdown()
+
+
+@pytest.mark.parametrize("body", [
+    {"ai": "random"},
+    {"depth": 0},
+    {"depth": 7},
+    {"depth": "3"},
+    {"depth": True},  # bool is an int subclass, but not a depth
+    {"time": 0},
+    {"time": "1"},
+    {"time": True},
+])
+def test_new_game_rejects_bad_fields(game_server, body):
+    status, response = run(game_server, "POST", "/games", body)
+    assert status == 400 and "error" in response
+    assert game_server.games == {}
+
+
+def test_human_move_validation(game_server):
+    status, game = run(game_server, "POST", "/games", {"depth": 1, "time": 0.5})
+    assert status == 201 and game["to_move"] == game["human_symbol"]
+    path = f"/games/{game['game']}/move"
+    for body in [{"row": True, "col": 7}, {"row": 7}, {"row": "7", "col": 7}]:
+        assert run(game_server, "POST", path, body)[0] == 400
+    assert run(game_server, "POST", path, {"row": 15, "col": 0})[0] == 400
+    assert run(game_server, "POST", f"/games/{game['game']}/ai")[0] == 409  # The human is to move
+    assert run(game_server, "GET", "/games/99")[0] == 404
+    assert run(game_server, "PUT", f"/games/{game['game']}")[0] == 405
+    assert run(game_server, "GET", f"/games/{game['game']}")[1]["moves"] == []
+
+
+def test_round_robin_across_games():
+    scheduler = FairScheduler(None, workers=0)
+
+    async def order():
+        scheduler.start()
+        for game_id, job in [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("c", 1), ("b", 2)]:
+            asyncio.ensure_future(scheduler.submit(game_id, (game_id, job), time.monotonic() + 60))
+        await asyncio.sleep(0)
+        taken = [scheduler._next()[0] for _ in range(6)]
+        assert scheduler.queued == 0 and not scheduler.turns and not scheduler.queues
+        return taken
+
+    # Each game gets one job per turn however many it has queued
+    assert asyncio.run(order()) == [("a", 1), ("b", 1), ("c", 1), ("a", 2), ("b", 2), ("a", 3)]
+
+
+def test_queued_move_expires_at_its_deadline():
+    scheduler = FairScheduler(None, workers=0)  # No dispatchers: every job waits, as when all workers are busy
+
+    async def expire():
+        scheduler.start()
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await scheduler.submit("a", (), started + 0.05)
+        return time.monotonic() - started
+
+    assert asyncio.run(expire()) < 1
+    assert scheduler.stats()["queue_depth"] == 0 and scheduler.expired == 1
+    assert not scheduler.turns and not scheduler.queues
+
+
+def test_busy_server_answers_503_and_keeps_no_game(game_server):
+    game_server.deadline = 0.05
+    game_server.scheduler = FairScheduler(None, workers=0)
+
+    async def requests():
+        game_server.scheduler.start()
+        # A new game whose first AI move expires in the queue is dropped: its id was never returned
+        status, response = await game_server.route("POST", "/games", {"ai_first": True})
+        assert status == 503 and "error" in response
+        assert game_server.games == {}
+        # A full queue is refused at once
+        game_server.scheduler.max_queued = 0
+        status, _ = await game_server.route("POST", "/games", {"ai_first": True})
+        assert status == 503
+        assert game_server.games == {}
+        # After a human move the game is kept, with the AI still to move
+        status, game = await game_server.route("POST", "/games", {})
+        status, response = await game_server.route("POST", f"/games/{game['game']}/move", {"row": 7, "col": 7})
+        assert status == 503
+        assert game_server.games[game["game"]].to_move == game["ai_symbol"]
+
+    asyncio.run(requests())
+
+
+def exchange(game_server, request):
+    # Sends request to game_server.handle over a local socket, leaving the connection open, and returns
+    # the status and JSON body of the answer
+    async def talk():
+        listener = await asyncio.start_server(game_server.handle, "127.0.0.1", 0)
+        async with listener:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname())
+            writer.write(request)
+            answer = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        head, _, body = answer.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    return asyncio.run(talk())
+
+
+def test_request_limits(game_server, monkeypatch):
+    status, game = exchange(game_server, b"POST /games HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert status == 201
+    # Answered from the header alone, before any of the body arrives
+    status, _ = exchange(game_server, f"POST /games HTTP/1.1\r\nContent-Length: {MAX_BODY + 1}\r\n\r\n".encode())
+    assert status == 413 and len(game_server.games) == 1
+    assert exchange(game_server, b"POST /games HTTP/1.1\r\nContent-Length: x\r\n\r\n")[0] == 400
+
+    monkeypatch.setattr(server, "READ_TIMEOUT", 0.05)
+    started = time.monotonic()
+    assert exchange(game_server, b"GET /stats HTTP/1.1\r\nHost: x\r\n")[0] == 408  # Headers never end
+    assert exchange(game_server, b"POST /games HTTP/1.1\r\nContent-Length: 20\r\n\r\n{")[0] == 408
+    assert time.monotonic() - started < 2 and len(game_server.games) == 1
@@ -0,0 +1,120 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Threat-Space Search Tests ========
+# Known positions through Engine.root_moves: a VCF is played outright, a VCT
+# move leads the root moves for the main search, and against the opponent's
+# VCF only the moves that stop it are left. Then the root cache, and a
+# Deadline that expires while the solver is still working: the result cut
+# short is cached, reused only by calls with no time to improve it.
+import pytest
+
+from gomoku_engine import AI_ALPHABETA, HUMAN, Deadline, Engine, create_board, threat_search
+from gomoku_engine.bitboard import DEFAULT_RADIUS
+from gomoku_engine.board import to_bitboard
+from gomoku_engine.threat_search import ThreatSearch, threat_space_root
+
+# AI_ALPHABETA to move wins by continuous fours starting at (7, 7), with no double four in one move;
+# HUMAN has no four to make
+VCF = ([(8, 6), (6, 8), (9, 7), (4, 10), (9, 6)], [(10, 7), (4, 6), (8, 4), (6, 7), (5, 8)])
+VCF_LINE = [(7, 7), (5, 9), (9, 5), (10, 4), (9, 4)]
+# AI_ALPHABETA has no VCF, but (6, 8) starts a win by threes and fours; HUMAN has no threat of its own
+VCT = ([(7, 7), (4, 6), (8, 8), (7, 8), (8, 6)], [(7, 9), (6, 6), (8, 7), (6, 9), (7, 5)])
+VCT_MOVE = (6, 8)
+
+
+def position(stones):
+    board = create_board()
+    for symbol, cells in zip((AI_ALPHABETA, HUMAN), stones):
+        for r, c in cells:
+            board[r][c] = symbol
+    return board
+
+
+def bitboard(stones):
+    return to_bitboard(position(stones), DEFAULT_RADIUS)
+
+
+class CountdownDeadline(Deadline):
+    # Expires after `checks` calls to expired(), so the solver stops part way through
+    def __init__(self, checks):
+        super().__init__()
+        self.checks = checks
+
+    def expired(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+@pytest.fixture(autouse=True)
+def empty_root_cache():
+    threat_search._root_cache.clear()
+    yield
+    threat_search._root_cache.clear()
+
+
+@pytest.fixture
+def engine():
+    return Engine("pattern", opening_book=None)
+
+
+def test_vcf_is_found_and_played(engine):
+    board = position(VCF)
+    assert ThreatSearch(bitboard(VCF)).vcf(AI_ALPHABETA, HUMAN) == VCF_LINE
+    forced_move, _, _ = engine.root_moves(bitboard(VCF), AI_ALPHABETA, HUMAN)
+    assert forced_move == VCF_LINE[0]
+    assert engine.choose_move(board, AI_ALPHABETA, HUMAN) == VCF_LINE[0]
+    assert engine.choose_move(board, AI_ALPHABETA, HUMAN, use_alpha_beta=False) == VCF_LINE[0]
+
+
+def test_vct_move_is_searched_first(engine):
+    board = bitboard(VCT)
+    assert ThreatSearch(board).vcf(AI_ALPHABETA, HUMAN) is None
+    forced_move, moves, first_move = engine.root_moves(board, AI_ALPHABETA, HUMAN)
+    # Unproven, so not played outright: the main search gets every move, the VCT move first
+    assert forced_move is None and first_move == VCT_MOVE
+    assert moves[0] == VCT_MOVE
+    assert sorted(moves) == sorted(engine.get_all_moves(board))
+
+
+def test_defences_restrict_the_root_moves(engine):
+    board = bitboard(VCF)
+    forced_move, moves, first_move = engine.root_moves(board, HUMAN, AI_ALPHABETA)
+    assert forced_move is None and first_move is None
+    assert VCF_LINE[0] in moves
+    assert len(moves) < len(engine.get_all_moves(board))
+    for r, c in moves:  # Each one stops the VCF
+        board.make(r, c, HUMAN)
+        assert ThreatSearch(board).vcf(AI_ALPHABETA, HUMAN) is None
+        board.unmake(r, c)
+
+
+def test_root_cache_solves_a_position_once(monkeypatch):
+    solves = []
+    solve_root = threat_search._solve_root
+    monkeypatch.setattr(threat_search, "_solve_root", lambda *args: solves.append(1) or solve_root(*args))
+    board = bitboard(VCF)
+    first = threat_space_root(board, AI_ALPHABETA, HUMAN)
+    assert threat_space_root(board, AI_ALPHABETA, HUMAN, Deadline(60)) == first == (VCF_LINE[0], None, None)
+    assert len(solves) == 1
+    threat_space_root(board, HUMAN, AI_ALPHABETA)  # The other side to move is another position
+    assert len(solves) == 2
+
+
+def test_deadline_expiring_mid_solve(monkeypatch):
+    board = bitboard(VCF)
+    solver = ThreatSearch(board, deadline=CountdownDeadline(3))
+    assert solver.vcf(AI_ALPHABETA, HUMAN) is None
+    assert solver.timed_out and solver.nodes > 1
+
+    solves = []
+    solve_root = threat_search._solve_root
+    monkeypatch.setattr(threat_search, "_solve_root", lambda *args: solves.append(1) or solve_root(*args))
+    cut_short = threat_space_root(board, AI_ALPHABETA, HUMAN, CountdownDeadline(3))
+    assert cut_short[0] is None
+    # No time to do better: the cut-short result is reused
+    assert threat_space_root(board, AI_ALPHABETA, HUMAN) == cut_short
+    assert threat_space_root(board, AI_ALPHABETA, HUMAN, CountdownDeadline(0)) == cut_short
+    assert len(solves) == 1
+    # With time left the position is solved again, and the full result replaces it
+    assert threat_space_root(board, AI_ALPHABETA, HUMAN, Deadline(60)) == (VCF_LINE[0], None, None)
+    assert threat_space_root(board, AI_ALPHABETA, HUMAN, Deadline(60)) == (VCF_LINE[0], None, None)
+    assert len(solves) == 2
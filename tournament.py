@@ -0,0 +1,262 @@
+#====== بسم الله الرحمن الرحيم ======
+# ======== Self-Play Tournament ========
+# Plays games between engine configurations without a board printout or any
+# prompt, spread over a process pool, and writes one JSON line per game.
+#
+# A configuration is "evaluation:algorithm@limit" followed by optional settings:
+#   classic:alphabeta@3                  classic evaluation, alpha-beta at depth 3
+#   pattern:minimax@0.5s                 pattern evaluation, minimax, iterative deepening, 0.5 s per move
+#   pattern:alphabeta@2,threat_search=False  any Engine keyword argument
+# The evaluations are those of gomoku_engine/evaluation.py; "Gomoku" and "GUI"
+# name the evaluators the command-line game and the GUI use.
+#
+# Every opening is played twice with colours swapped. Openings are random
+# stones near the centre, or walks through the opening book that pick a random
+# move among those leading to another book position.
+#
+#   python tournament.py CONFIG CONFIG [CONFIG ...] [--games N] [--workers N]
+#                        [--opening random|book] [--opening-plies N] [--output FILE]
+import argparse
+import ast
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+
+from gomoku_engine import BOARD_SIZE, EMPTY, WIN_COUNT, BitBoard, Engine, MoveOrderer, create_board, get_all_moves
+from gomoku_engine.bitboard import DEFAULT_RADIUS
+from gomoku_engine.opening_book import DEFAULT_PATH as DEFAULT_OPENING_BOOK, book_key, open_book, position_stones
+
+FIRST, SECOND = "X", "O"  # Stone symbols in tournament games, whatever the engines call their players
+DEFAULT_GAMES = 100
+DEFAULT_OPENING_PLIES = 4
+DEFAULT_MAX_MOVES = 120  # Plies after the opening before a game is scored as a draw
+TABLE_MB = 16  # Per player and game
+Z_95 = 1.96
+EVALUATION_ALIASES = {"Gomoku": "classic", "GUI": "pattern"}  # Front end -> the evaluation it plays with
+
+
+def parse_config(spec):
+    # {"name", "evaluation", "algorithm", "depth", "time", "settings"} from
+    # "evaluation:algorithm@limit[,name=value...]"
+    head, *overrides = spec.split(",")
+    evaluation, _, rest = head.rpartition(":")
+    algorithm, _, limit = rest.partition("@")
+    if algorithm not in ("minimax", "alphabeta"):
+        raise ValueError(f"{spec}: algorithm must be minimax or alphabeta")
+    if not limit:
+        raise ValueError(f"{spec}: missing @depth or @seconds")
+    settings = {}
+    for override in overrides:
+        name, _, value = override.partition("=")
+        settings[name.strip()] = ast.literal_eval(value.strip())
+    return {
+        "name": spec,
+        "evaluation": EVALUATION_ALIASES.get(evaluation, evaluation or "classic"),
+        "algorithm": algorithm,
+        "depth": None if limit.endswith("s") else int(limit),
+        "time": float(limit[:-1]) if limit.endswith("s") else None,
+        "settings": settings,
+    }
+
+
+# ======== Openings ========
+def random_opening(plies, rng):
+    # plies stones near the centre, alternating colours, none completing a row
+    board = BitBoard(BOARD_SIZE, WIN_COUNT, EMPTY)
+    centre, moves = BOARD_SIZE // 2, []
+    while len(moves) < plies:
+        r, c = centre + rng.randint(-2, 2), centre + rng.randint(-2, 2)
+        if not board.is_empty(r, c):
+            continue
+        board.make(r, c, FIRST if len(moves) % 2 == 0 else SECOND)
+        if board.is_win_at(r, c):
+            board.unmake(r, c)
+            continue
+        moves.append((r, c))
+    return moves
+
+
+def book_opening(book, plies, rng):
+    # Random walk through the book: each move leads to a position the book has a move for
+    board = create_board()
+    moves = []
+    size = BOARD_SIZE
+    while len(moves) < plies:
+        mover, waiting = (FIRST, SECOND) if len(moves) % 2 == 0 else (SECOND, FIRST)
+        choices = []
+        for r, c in get_all_moves(board, DEFAULT_RADIUS):
+            board[r][c] = mover
+            if book.find(book_key(size, *position_stones(board, waiting, mover))[0]) is not None:
+                choices.append((r, c))
+            board[r][c] = EMPTY
+        if not choices:
+            entry = book.lookup(board, mover, waiting)
+            if entry is None:
+                break
+            choices = [entry[0]]
+        r, c = rng.choice(choices)
+        board[r][c] = mover
+        moves.append((r, c))
+    return moves
+
+
+# ======== Games ========
+def _search(engine, config, board, player, opponent, tt, orderer):
+    if config["algorithm"] == "minimax":
+        search = lambda b, p, o, d, dl: engine.minimax_decision(b, p, o, depth=d, deadline=dl)
+    else:
+        search = lambda b, p, o, d, dl: engine.alpha_beta_search(b, p, o, depth=d, tt=tt, orderer=orderer,
+                                                                 deadline=dl)
+    if config["time"] is not None:
+        return engine.iterative_deepening_search(board, player, opponent, config["time"], search)
+    return search(board, player, opponent, config["depth"], None)
+
+
+def play_game(first, second, opening, max_moves=DEFAULT_MAX_MOVES):
+    # Plays first (FIRST stones) against second from the opening moves; returns the result record
+    players = {FIRST: first, SECOND: second}
+    engines = {}
+    try:  # Engines with workers hold processes and shared memory, so they are closed however the game ends
+        for symbol, config in players.items():
+            engines[symbol] = Engine(config["evaluation"], **dict({"table_mb": TABLE_MB, "opening_book": None},
+                                                                  **config["settings"]))
+        tables = {symbol: (engines[symbol].new_table(), MoveOrderer()) for symbol in players}
+        seconds = {FIRST: 0.0, SECOND: 0.0}
+        searched = {FIRST: 0, SECOND: 0}
+        board = create_board()
+        stones = BitBoard(BOARD_SIZE, WIN_COUNT, EMPTY)  # Mirrors board for win tests
+        for i, (r, c) in enumerate(opening):
+            board[r][c] = FIRST if i % 2 == 0 else SECOND
+            stones.make(r, c, board[r][c])
+        player, opponent = (FIRST, SECOND) if len(opening) % 2 == 0 else (SECOND, FIRST)
+        winner, moves = None, []
+        while len(moves) < max_moves and not stones.is_full():
+            engine, config = engines[player], players[player]
+            started = time.perf_counter()
+            move = _search(engine, config, board, player, opponent, *tables[player])
+            seconds[player] += time.perf_counter() - started
+            searched[player] += 1
+            if move is None or board[move[0]][move[1]] != EMPTY:
+                winner = opponent  # An engine that fails to move forfeits
+                break
+            board[move[0]][move[1]] = player
+            stones.make(move[0], move[1], player)
+            moves.append(move)
+            if stones.is_win_at(*move):
+                winner = player
+                break
+            player, opponent = opponent, player
+    finally:
+        for engine in engines.values():
+            engine.close()
+    return {
+        "first": first["name"],
+        "second": second["name"],
+        "opening": opening,
+        "moves": moves,
+        "winner": players[winner]["name"] if winner else None,
+        "result": {FIRST: "first", SECOND: "second", None: "draw"}[winner],
+        "seconds_per_move": {players[s]["name"]: seconds[s] / searched[s] if searched[s] else 0.0 for s in players},
+    }
+
+
+def _play(task):
+    index, first, second, opening, max_moves = task
+    record = play_game(first, second, opening, max_moves)
+    record["game"] = index
+    return record
+
+
+# ======== Statistics ========
+def elo_difference(wins, draws, losses):
+    # (Elo difference, half-width of its 95% interval) from one side's results; infinite at a 0% or 100% score
+    games = wins + draws + losses
+    if not games:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = Z_95 * math.sqrt(variance / games)
+    elo = lambda s: -400 * math.log10(1 / s - 1) if 0 < s < 1 else math.copysign(math.inf, s - 0.5)
+    low, high = elo(max(0.0, score - margin)), elo(min(1.0, score + margin))
+    if math.isinf(low) or math.isinf(high):
+        return elo(score), math.inf
+    return elo(score), (high - low) / 2
+
+
+def summarize(records, names):
+    # Per pair of configurations: W/D/L of the first name, Elo difference and average seconds per move
+    lines = []
+    for a, b in combinations(names, 2):
+        wins = draws = losses = 0
+        time_a, time_b, games = 0.0, 0.0, 0
+        for record in records:
+            if {record["first"], record["second"]} != {a, b}:
+                continue
+            games += 1
+            wins += record["winner"] == a
+            losses += record["winner"] == b
+            draws += record["winner"] is None
+            time_a += record["seconds_per_move"][a]
+            time_b += record["seconds_per_move"][b]
+        if not games:
+            continue
+        elo, margin = elo_difference(wins, draws, losses)
+        lines.append(f"{a} vs {b}: +{wins} ={draws} -{losses}  Elo {elo:+.0f} ± {margin:.0f}  "
+                     f"time/move {time_a / games:.3f}s vs {time_b / games:.3f}s")
+    return lines
+
+
+# ======== Command Line ========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless self-play tournament between engine configurations")
+    parser.add_argument("configs", nargs="+",
+                        help="evaluation:algorithm@depth or evaluation:algorithm@<seconds>s")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="games per pair of configurations")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--opening", choices=("random", "book"), default="random")
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES)
+    parser.add_argument("--book", default=DEFAULT_OPENING_BOOK, help="opening book file for --opening book")
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES)
+    parser.add_argument("--output", default="tournament.jsonl")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    configs = [parse_config(spec) for spec in args.configs]
+    if len(configs) < 2 or len({config["name"] for config in configs}) < len(configs):
+        parser.error("at least two different configurations are needed")
+    rng = random.Random(args.seed)
+    book = open_book(args.book, BOARD_SIZE, WIN_COUNT) if args.opening == "book" else None
+    if args.opening == "book" and book is None:
+        parser.error(f"no opening book at {args.book}")
+
+    tasks = []
+    for a, b in combinations(configs, 2):
+        for _ in range((args.games + 1) // 2):
+            if book is not None:
+                opening = book_opening(book, args.opening_plies, rng)
+            else:
+                opening = random_opening(args.opening_plies, rng)
+            tasks.append((len(tasks), a, b, opening, args.max_moves))
+            tasks.append((len(tasks), b, a, opening, args.max_moves))
+
+    records = []
+    started = time.monotonic()
+    with open(args.output, "w") as output, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for future in as_completed([pool.submit(_play, task) for task in tasks]):
+            record = future.result()
+            records.append(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            print(f"\r{len(records)}/{len(tasks)} games", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    print(f"{len(records)} games in {time.monotonic() - started:.1f}s, results in {args.output}")
+    for line in summarize(records, [config["name"] for config in configs]):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()